@@ -6,6 +6,13 @@ from flask_cors import CORS
 from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from app.utils.cache import ResponseCache
+from app.utils.passwords import PasswordHasher
+from app.utils.jobs import JobQueue
+from app.utils.ids import IdGenerator
+from app.utils.metrics import Metrics
+from app.utils.profiler import QueryProfiler
+from app.utils.serializers import use_orjson
 import os
 from datetime import timedelta
 
@@ -14,6 +21,12 @@ db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
+cache = ResponseCache()
+passwords = PasswordHasher()
+jobs = JobQueue()
+ids = IdGenerator()
+metrics = Metrics()
+query_profiler = QueryProfiler()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"]
@@ -31,15 +44,32 @@ def create_app(config_name=None):
         app.config.from_object('app.config.ProductionConfig')
     elif config_name == 'testing':
         app.config.from_object('app.config.TestingConfig')
+    elif config_name == 'benchmark':
+        app.config.from_object('app.config.BenchmarkConfig')
     else:
         app.config.from_object('app.config.DevelopmentConfig')
     
+    # Faster JSON encoding for every jsonify() response
+    if app.config.get('ORJSON_ENABLED'):
+        use_orjson(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     mail.init_app(app)
+    cache.init_app(app)
+    passwords.init_app(app)
+    jobs.init_app(app)
+    ids.init_app(app)
+    metrics.init_app(app)
+    query_profiler.init_app(app)
     limiter.init_app(app)
+    
+    # Authorization principals are cached per process; Redis shares their invalidations
+    from app.utils.principal import principals
+    principals.init_app(app)
+    
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
     # Register blueprints
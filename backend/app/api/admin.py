@@ -1,15 +1,21 @@
-yesfrom flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
 from sqlalchemy import func
-from app.utils.decorators import admin_required
-from app.utils.validators import validate_product_data
+from app.utils.decorators import admin_required, paginate_response
+from app.utils.cache import product_cache_tags
+from app.utils.stock import commit_order_stock, release_order_stock
+from app.utils.loaders import load_order_detail, order_detail_query, order_item_counts
+from app.utils.exports import stream_orders_csv, stream_orders_ndjson
+from app.utils.pagination import keyset_paginate, wants_total
+from app.utils.rollups import dashboard_summary, record_order_status_change
 from app.models.product import Product
 from app.models.order import Order, OrderStatus, OrderItem
 from app.models.payment import Payment # Import Payment model
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-from app import db
+from app.tasks import notify_users, process_media_upload
+from werkzeug.utils import secure_filename
+from app import db, cache, jobs
+import os
 import uuid
 
 # Ensure Product and db are imported
@@ -38,6 +44,7 @@ def add_product():
         new_product = Product(**data)
         db.session.add(new_product)
         db.session.commit()
+        cache.invalidate(*product_cache_tags(new_product))
         return jsonify({'message': 'Product added successfully', 'product': new_product.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
@@ -53,14 +60,16 @@ def delete_product(product_id):
     if not product:
         return jsonify({'error': 'Product not found'}), 404
 
- try:
- db.session.delete(product)
- db.session.commit()
+    try:
+        cache_tags = product_cache_tags(product)
+        db.session.delete(product)
+        db.session.commit()
+        cache.invalidate(*cache_tags)
 
- return jsonify({'message': 'Product deleted successfully'}), 200
- except Exception as e:
- db.session.rollback()
- return jsonify({'error': str(e)}), 500
+        return jsonify({'message': 'Product deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/admin/products/<uuid:product_id>', methods=['PUT'])
 @jwt_required()
@@ -78,44 +87,68 @@ def update_product(product_id):
     # if not validate_product_data(data, partial=True):
     #     return jsonify({'error': 'Invalid product data'}), 400
 
-    # Update product attributes
- try:
- for key, value in data.items():
- if hasattr(product, key):
- setattr(product, key, value)
- db.session.commit()
+    # Remember where the product was listed before the update
+    previous_category_id = product.category_id
+    previous_collection_id = product.collection_id
 
+    # Update product attributes
+    try:
+        for key, value in data.items():
+            if hasattr(product, key):
+                setattr(product, key, value)
+        db.session.commit()
+        cache.invalidate(*product_cache_tags(product, previous_category_id, previous_collection_id))
 
- return jsonify({'message': 'Product updated successfully', 'product': product.to_dict()}), 200
- except Exception as e:
- db.session.rollback()
- return jsonify({'error': str(e)}), 500
+        return jsonify({'message': 'Product updated successfully', 'product': product.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/admin/orders/<uuid:order_id>/status', methods=['PUT'])
 @jwt_required()
 @admin_required
 def update_order_status(order_id):
- """Update order status"""
- order = Order.query.get(order_id)
- if not order:
- return jsonify({'error': 'Order not found'}), 404
-
- data = request.get_json()
- new_status = data.get('status')
-
- if not new_status:
- return jsonify({'error': 'Status is required'}), 400
-
- try:
- order.status = OrderStatus[new_status.upper()]
- db.session.commit()
- return jsonify({'message': 'Order status updated successfully', 'order': order.to_dict()}), 200
- except KeyError:
- db.session.rollback()
- return jsonify({'error': f'Invalid status value: {new_status}'}), 400
- except Exception as e:
- db.session.rollback()
- return jsonify({'error': str(e)}), 500
+    """Update order status"""
+    order = Order.query.get(order_id)
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+
+    data = request.get_json()
+    new_status = data.get('status')
+
+    if not new_status:
+        return jsonify({'error': 'Status is required'}), 400
+
+    try:
+        status = OrderStatus[new_status.upper()]
+        previous_status = order.status
+        if previous_status == OrderStatus.CANCELLED and status != OrderStatus.CANCELLED:
+            # Its stock is already back on the shelf; the customer has to order again
+            return jsonify({'error': 'A cancelled order cannot be reopened'}), 409
+        order.status = status
+
+        # Confirming keeps held stock for good; cancelling puts it back
+        if status == OrderStatus.CONFIRMED:
+            commit_order_stock(order.id)
+        elif status == OrderStatus.CANCELLED and previous_status != OrderStatus.CANCELLED:
+            order.cancelled_at = datetime.utcnow()
+            release_order_stock(order)
+        record_order_status_change(order, previous_status)
+        if status != previous_status:
+            jobs.defer(
+                notify_users, 'Order update', f'Your order {order.order_number} is now {status.value.replace("_", " ")}.', 'order',
+                user_ids=[str(order.user_id)], data={'order_id': str(order.id), 'status': status.value},
+                idempotency_key=f"order-status:{order.id}:{status.value}"
+            )
+
+        db.session.commit()
+        return jsonify({'message': 'Order status updated successfully', 'order': order.to_dict()}), 200
+    except KeyError:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid status value: {new_status}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/admin/products/<uuid:product_id>/stock', methods=['PUT'])
 @jwt_required()
@@ -124,30 +157,8 @@ def update_product_stock(product_id):
     """Update product stock quantity"""
     product = Product.query.get(product_id)
     if not product:
-
         return jsonify({'error': 'Product not found'}), 404
 
-@admin_bp.route('/admin/orders', methods=['GET'])
-@jwt_required()
-@admin_required
-def get_all_orders():
- """Get all orders"""
-
- orders = Order.query.all()
- return jsonify({'orders': [order.to_dict() for order in orders]}), 200
- data = request.get_json()
- new_status = data.get('status')
-
- if not new_status:
- return jsonify({'error': 'Status is required'}), 400
-
-@admin_bp.route('/dashboard', methods=['GET'])
-@admin_required
-def get_dashboard():
-    """Get admin dashboard data"""
-
- return jsonify({'message': 'Admin dashboard endpoint'}), 200
- return jsonify({'message': 'Product updated successfully', 'product': product.to_dict()}), 200
     stock_data = request.get_json()
     new_stock_quantity = stock_data.get('stock_quantity')
 
@@ -157,19 +168,176 @@ def get_dashboard():
     try:
         product.stock_quantity = new_stock_quantity
         db.session.commit()
+        cache.invalidate(*product_cache_tags(product))
         return jsonify({'message': 'Product stock updated successfully', 'product': product.to_dict()}), 200
     except Exception as e:
- db.session.rollback()
- return jsonify({'error': f'Invalid status value: {new_status}'}), 400
- except Exception as e: # This except block was incorrectly placed and is now removed
- db.session.rollback() # This rollback was also incorrectly placed
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _parse_date_bound(value, end=False):
+    """Parse YYYY-MM-DD or an ISO datetime; a bare end date covers that whole day"""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def _filtered_orders_query(args):
+    """Orders matching the admin status and date range filters in args
+
+    Returns a (query, error) tuple; error is a message for a 400 response.
+    """
+    query = Order.query
+
+    status = args.get('status')
+    if status:
+        try:
+            statuses = [OrderStatus[value.strip().upper()] for value in status.split(',') if value.strip()]
+        except KeyError:
+            return None, f'Invalid status value: {status}'
+        query = query.filter(Order.status.in_(statuses))
+
+    try:
+        if args.get('date_from'):
+            query = query.filter(Order.created_at >= _parse_date_bound(args['date_from']))
+        if args.get('date_to'):
+            query = query.filter(Order.created_at < _parse_date_bound(args['date_to'], end=True))
+    except ValueError:
+        return None, 'Dates must be YYYY-MM-DD or ISO 8601'
+
+    return query, None
+
+@admin_bp.route('/admin/orders', methods=['GET'])
+@jwt_required()
+@admin_required
+@paginate_response
+def get_all_orders(page, per_page, cursor=None):
+    """Get orders, newest first, filtered by status and date range"""
+    query, error = _filtered_orders_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    if cursor is not None:
+        try:
+            orders = keyset_paginate(query, Order, 'created_at', per_page, cursor, include_total=wants_total())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        pagination_data = orders.to_dict()
+    else:
+        orders = query.paginate(page=page, per_page=per_page, error_out=False)
+        pagination_data = {
+            'page': page,
+            'per_page': per_page,
+            'total': orders.total,
+            'total_pages': orders.pages,
+            'has_next': orders.has_next,
+            'has_prev': orders.has_prev
+        }
+
+    counts = order_item_counts([order.id for order in orders.items])
+    return jsonify({
+        'orders': [order.to_dict(total_items=counts.get(order.id, 0)) for order in orders.items],
+        'pagination': pagination_data
+    }), 200
+
+@admin_bp.route('/admin/orders/<uuid:order_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_order_detail(order_id):
+    """Get any order with its items, addresses and payments"""
+    order = order_detail_query().filter(Order.id == order_id).one_or_none()
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+    return jsonify({'order': load_order_detail(order)}), 200
+
+@admin_bp.route('/admin/orders/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_orders():
+    """Stream orders as NDJSON (default) or CSV"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    query, error = _filtered_orders_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    query = query.order_by(Order.created_at, Order.id)
+
+    filename = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    if export_format == 'csv':
+        body, mimetype = stream_orders_csv(query), 'text/csv'
+    else:
+        body, mimetype = stream_orders_ndjson(query), 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no'  # Let nginx pass chunks through as they are produced
+        }
+    )
+
+@admin_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_dashboard():
+    """Get admin dashboard data from the precomputed rollups"""
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+
+    # Rollup buckets are in store-local time
+    offset = timedelta(minutes=current_app.config.get('ANALYTICS_UTC_OFFSET_MINUTES', 0))
+    today = (datetime.utcnow() + offset).replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        end = _parse_date_bound(request.args['date_to'], end=True) if request.args.get('date_to') else today + timedelta(days=1)
+        if request.args.get('date_from'):
+            start = _parse_date_bound(request.args['date_from'])
+        else:
+            start = end - timedelta(days=request.args.get('days', 30, type=int))
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD or ISO 8601'}), 400
+
+    if start >= end:
+        return jsonify({'error': 'date_from must be before date_to'}), 400
+    if granularity == 'hour' and end - start > timedelta(days=31):
+        return jsonify({'error': 'Hourly data is limited to 31 days'}), 400
+
+    summary = dashboard_summary(start, end, granularity)
+    return jsonify({
+        'range': {'from': start.isoformat(), 'to': end.isoformat(), 'granularity': granularity},
+        **summary
+    }), 200
+
+def _stage_upload(file):
+    """Save an uploaded file where the media worker can pick it up"""
+    folder = os.path.join(os.path.dirname(current_app.root_path), current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'staging')
+    os.makedirs(folder, exist_ok=True)
+    extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+    path = os.path.join(folder, f"{uuid.uuid4().hex}{extension}")
+    file.save(path)
+    return path
+
+def _job_status(result):
+    status = {'job_id': result.id, 'status': result.state.lower()}
+    if result.successful():
+        status['result'] = result.result
+    elif result.failed():
+        status['error'] = 'Job failed'
+    return status
+
 @admin_bp.route('/admin/upload/image', methods=['POST'])
 @jwt_required()
 @admin_required
 def upload_image():
-    """Upload image to Cloudinary"""
+    """Stage an image and upload it to Cloudinary in the background
+
+    Optional form fields product_id, alt_text and is_primary attach the
+    uploaded image to a product. Answers 202 with a job to poll, or 200 with
+    the result straight away when jobs run inline.
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in the request'}), 400
 
@@ -178,20 +346,70 @@ def upload_image():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if file:
+    product_id = request.form.get('product_id')
+    if product_id:
         try:
-            # Assuming you have CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET in your config
-            from flask import current_app
-            cloudinary.config(
-                cloud_name=current_app.config.get('CLOUDINARY_CLOUD_NAME'),
-                api_key=current_app.config.get('CLOUDINARY_API_KEY'),
-                api_secret=current_app.config.get('CLOUDINARY_API_SECRET')
-            )
+            product_id = str(uuid.UUID(product_id))
+        except ValueError:
+            return jsonify({'error': 'Invalid product ID'}), 400
+        if not db.session.get(Product, product_id):
+            return jsonify({'error': 'Product not found'}), 404
+
+    try:
+        path = _stage_upload(file)
+        result = jobs.enqueue(
+            process_media_upload, path,
+            product_id=product_id,
+            alt_text=request.form.get('alt_text'),
+            is_primary=request.form.get('is_primary', 'false').lower() == 'true',
+            folder=current_app.config.get('CLOUDINARY_FOLDER')
+        )
+    except Exception as e:
+        current_app.logger.error(f"Image upload error: {str(e)}")
+        return jsonify({'error': f'Image upload failed: {str(e)}'}), 500
 
-            upload_result = cloudinary.uploader.upload(file)
-            return jsonify({'secure_url': upload_result.get('secure_url')}), 200
+    if result.ready():
+        return jsonify(result.result), 200
+    return jsonify(_job_status(result)), 202
 
-        except Exception as e:
-            return jsonify({'error': f'Image upload failed: {str(e)}'}), 500
+@admin_bp.route('/admin/upload/image/<job_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_upload_status(job_id):
+    """Status of a background image upload"""
+    return jsonify(_job_status(jobs.celery.AsyncResult(job_id))), 200
+
+@admin_bp.route('/admin/notifications', methods=['POST'])
+@jwt_required()
+@admin_required
+def broadcast_notification():
+    """Send a notification to the given users, or to every active user
+
+    The fan-out runs as a background job. An Idempotency-Key header makes a
+    resubmitted broadcast a no-op.
+    """
+    data = request.get_json() or {}
+    title = data.get('title')
+    message = data.get('message')
+    if not title or not message:
+        return jsonify({'error': 'Title and message are required'}), 400
+
+    user_ids = data.get('user_ids')
+    if user_ids is not None:
+        try:
+            user_ids = [str(uuid.UUID(str(user_id))) for user_id in user_ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid user ID'}), 400
+
+    idempotency_key = request.headers.get('Idempotency-Key') or uuid.uuid4().hex
+    try:
+        result = jobs.enqueue(
+            notify_users, title, message, data.get('notification_type', 'system'),
+            user_ids=user_ids, data=data.get('data'),
+            idempotency_key=f"broadcast:{idempotency_key}"
+        )
+    except Exception as e:
+        current_app.logger.error(f"Broadcast notification error: {str(e)}")
+        return jsonify({'error': 'Failed to queue notification'}), 500
 
-    return jsonify({'error': 'File upload failed'}), 500
\ No newline at end of file
+    return jsonify({'message': 'Notification queued', **_job_status(result)}), 202
@@ -4,6 +4,7 @@ from app import db, limiter
 from app.models.user import User, UserProfile
 from app.utils.validators import validate_email, validate_password, validate_phone
 from app.utils.decorators import admin_required
+from app.utils.passwords import PasswordHasherBusy
 import uuid
 from datetime import datetime, timedelta
 import requests
@@ -102,6 +103,9 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Registration error: {str(e)}")
@@ -126,7 +130,7 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 403
         
-        # Update last login
+        # Update last login (also persists a rehashed password)
         user.last_login = datetime.utcnow()
         db.session.commit()
         
@@ -141,6 +145,9 @@ def login():
             'refresh_token': refresh_token
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         current_app.logger.error(f"Login error: {str(e)}")
         return jsonify({'error': 'Login failed'}), 500
@@ -264,11 +271,14 @@ def change_password():
             return jsonify({'error': 'New password must be at least 8 characters long'}), 400
         
         # Update password
-        user.password_hash = user._hash_password(data['new_password'])
+        user.set_password(data['new_password'])
         db.session.commit()
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Change password error: {str(e)}")
@@ -483,6 +493,9 @@ def google_callback():
             'refresh_token': refresh_token
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Google callback error: {str(e)}")
@@ -6,6 +6,7 @@ from app.models.product import Product, ProductVariant
 from app.models.coupon import Coupon
 from app.utils.decorators import handle_errors, validate_json
 from app.utils.validators import validate_uuid, validate_quantity
+from app.utils.loaders import cart_items_query, load_cart
 import uuid
 
 cart_bp = Blueprint('cart', __name__)
@@ -25,17 +26,11 @@ def get_cart():
             db.session.add(cart)
             db.session.commit()
         
-        # Calculate totals
-        totals = cart.calculate_totals()
-        
-        # Get cart items with product details
-        cart_items = []
-        for item in cart.items:
-            item_dict = item.to_dict()
-            cart_items.append(item_dict)
+        # Items, products, variants, images and totals in one pass
+        cart_data, cart_items, totals = load_cart(cart)
         
         return jsonify({
-            'cart': cart.to_dict(),
+            'cart': cart_data,
             'items': cart_items,
             'totals': totals
         }), 200
@@ -347,7 +342,7 @@ def validate_cart():
         validation_errors = []
         warnings = []
         
-        for item in cart.items:
+        for item in cart_items_query(cart.id):
             # Check if product is still available
             if not item.is_available():
                 validation_errors.append({
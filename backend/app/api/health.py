@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify
-from app import db
+from flask import Blueprint, Response, jsonify
+from app import db, limiter, metrics
+from app.utils.db_pool import pool_status
+from app.utils.decorators import metrics_token_required
 from sqlalchemy import text
 
 health_bp = Blueprint('health', __name__)
@@ -37,4 +39,25 @@ def readiness_check():
         db.session.execute(text('SELECT 1'))
         return jsonify({'status': 'ready'}), 200
     except Exception:
-        return jsonify({'status': 'not ready'}), 503 
\ No newline at end of file
+        return jsonify({'status': 'not ready'}), 503 
+
+@health_bp.route('/pool', methods=['GET'])
+@limiter.exempt
+@metrics_token_required
+def pool_check():
+    """Connection pool occupancy and checkout waits for this worker process
+
+    Each gunicorn worker has its own pool, so successive calls may land on
+    different workers; 'pid' tells them apart.
+    """
+    return jsonify(pool_status(db.engine)), 200
+
+@health_bp.route('/metrics', methods=['GET'])
+@limiter.exempt
+@metrics_token_required
+def metrics_export():
+    """Prometheus scrape endpoint, aggregated across gunicorn workers"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
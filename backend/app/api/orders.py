@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db, limiter
+from app import db, jobs, limiter
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.cart import Cart, CartItem
 from app.models.user import User, UserAddress
 from app.models.payment import Payment
 from app.utils.decorators import handle_errors, validate_json, admin_required
 from app.utils.validators import validate_uuid
+from app.utils.pagination import keyset_paginate, wants_total
+from app.utils.loaders import cart_items_query, load_order_detail, load_orders, order_detail_query
+from app.utils.rollups import record_order_placed, record_order_status_change, record_payment_change
+from app.utils.stock import InsufficientStock, reserve_order_stock, release_order_stock, stock_line_for
+from app.tasks import create_gateway_order, notify_users, send_order_confirmation
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 import uuid
 
@@ -20,21 +27,31 @@ def get_orders():
     try:
         current_user_id = get_jwt_identity()
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = min(request.args.get('per_page', 10, type=int), 100)
+        cursor = request.args.get('cursor')
+        # Items are included unless the client opts out with ?include=
+        include = request.args.get('include', 'items').split(',')
+        include_items = 'items' in include
         
-        orders = Order.query.filter_by(user_id=current_user_id).order_by(
+        query = Order.query.filter_by(user_id=current_user_id).order_by(
             Order.created_at.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
-        
-        order_data = []
-        for order in orders.items:
-            order_dict = order.to_dict()
-            order_dict['items'] = [item.to_dict() for item in order.items]
-            order_data.append(order_dict)
-        
-        return jsonify({
-            'orders': order_data,
-            'pagination': {
+        )
+        if include_items:
+            query = query.options(selectinload(Order.line_items))
+        
+        # Paginate (keyset mode when a cursor is given)
+        if cursor is not None:
+            try:
+                orders = keyset_paginate(
+                    query, Order, 'created_at', per_page, cursor,
+                    include_total=wants_total()
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination_data = orders.to_dict()
+        else:
+            orders = query.paginate(page=page, per_page=per_page, error_out=False)
+            pagination_data = {
                 'page': page,
                 'per_page': per_page,
                 'total': orders.total,
@@ -42,6 +59,13 @@ def get_orders():
                 'has_next': orders.has_next,
                 'has_prev': orders.has_prev
             }
+        
+        # Orders, items and counts in a fixed number of queries for any page size
+        order_data = load_orders(orders.items, include_items=include_items)
+        
+        return jsonify({
+            'orders': order_data,
+            'pagination': pagination_data
         }), 200
         
     except Exception as e:
@@ -59,25 +83,15 @@ def get_order(order_id):
         if not validate_uuid(order_id):
             return jsonify({'error': 'Invalid order ID'}), 400
         
-        order = Order.query.filter_by(id=order_id, user_id=current_user_id).first()
+        # Items, addresses and payments come back in the same statement
+        order = order_detail_query().filter(
+            Order.id == order_id,
+            Order.user_id == current_user_id
+        ).one_or_none()
         if not order:
             return jsonify({'error': 'Order not found'}), 404
         
-        order_dict = order.to_dict()
-        order_dict['items'] = [item.to_dict() for item in order.items]
-        
-        # Add addresses
-        if order.shipping_address_id:
-            shipping_address = UserAddress.query.get(order.shipping_address_id)
-            order_dict['shipping_address'] = shipping_address.to_dict() if shipping_address else None
-        
-        if order.billing_address_id:
-            billing_address = UserAddress.query.get(order.billing_address_id)
-            order_dict['billing_address'] = billing_address.to_dict() if billing_address else None
-        
-        # Add payments
-        payments = Payment.query.filter_by(order_id=order_id).all()
-        order_dict['payments'] = [payment.to_dict() for payment in payments]
+        order_dict = load_order_detail(order)
         
         return jsonify({'order': order_dict}), 200
         
@@ -129,8 +143,9 @@ def create_order():
             if not billing_address:
                 return jsonify({'error': 'Billing address not found'}), 404
         
-        # Validate cart items
-        for item in cart.items:
+        # Validate cart items (stock itself is re-checked atomically below)
+        cart_items = cart_items_query(cart.id).all()
+        for item in cart_items:
             if not item.is_available():
                 return jsonify({'error': f'Product {item.product.name} is no longer available'}), 400
         
@@ -155,31 +170,41 @@ def create_order():
         db.session.add(order)
         db.session.flush()  # Get order ID
         
-        # Create order items
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                product_variant_id=cart_item.product_variant_id,
-                product_name=cart_item.product.name,
-                product_sku=cart_item.product.sku,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price,
-                total_price=cart_item.total_price,
-                material=cart_item.product.material,
-                weight=cart_item.product.weight,
-                purity=cart_item.product.purity,
-                variant_name=cart_item.selected_variant_name,
-                variant_value=cart_item.selected_variant_value
+        # Create order items with one multi-row INSERT
+        db.session.execute(insert(OrderItem.__table__).values([
+            {
+                'order_id': order.id,
+                'product_id': cart_item.product_id,
+                'product_variant_id': cart_item.product_variant_id,
+                'product_name': cart_item.product.name,
+                'product_sku': cart_item.product.sku,
+                'quantity': cart_item.quantity,
+                'unit_price': cart_item.unit_price,
+                'total_price': cart_item.total_price,
+                'material': cart_item.product.material,
+                'weight': cart_item.product.weight,
+                'purity': cart_item.product.purity,
+                'variant_name': cart_item.selected_variant_name,
+                'variant_value': cart_item.selected_variant_value
+            }
+            for cart_item in cart_items
+        ]))
+        
+        # Reserve stock; online payments hold it only until the payment deadline
+        stock_lines = [line for line in (stock_line_for(item) for item in cart_items) if line]
+        hold_minutes = None
+        if data['payment_method'].upper() != 'COD':
+            hold_minutes = current_app.config.get('STOCK_HOLD_MINUTES', 15)
+        
+        try:
+            reserve_order_stock(order, stock_lines, hold_minutes)
+        except InsufficientStock as e:
+            db.session.rollback()
+            product_name = next(
+                (item.product.name for item in cart_items if item.product_id == e.product_id),
+                'A product in your cart'
             )
-            db.session.add(order_item)
-            
-            # Update product stock
-            if cart_item.product.track_quantity:
-                if cart_item.product_variant:
-                    cart_item.product_variant.stock_quantity -= cart_item.quantity
-                else:
-                    cart_item.product.stock_quantity -= cart_item.quantity
+            return jsonify({'error': f'{product_name} is no longer available in the requested quantity'}), 409
         
         # Clear cart
         cart.clear()
@@ -193,6 +218,21 @@ def create_order():
             payment_status='pending'
         )
         db.session.add(payment)
+        db.session.flush()
+        
+        # Dashboard rollups move in the same transaction as the order
+        record_order_placed(order)
+        record_payment_change(payment)
+        
+        # Email, notification and gateway calls go out after commit, off the request path
+        jobs.defer(send_order_confirmation, str(order.id), idempotency_key=f"order-confirmation:{order.id}")
+        jobs.defer(
+            notify_users, 'Order placed', f'Your order {order.order_number} has been placed.', 'order',
+            user_ids=[str(current_user_id)], data={'order_id': str(order.id)},
+            idempotency_key=f"order-status:{order.id}:{OrderStatus.PLACED.value}"
+        )
+        if payment.payment_method.upper() != 'COD':
+            jobs.defer(create_gateway_order, str(payment.id), idempotency_key=f"gateway-order:{payment.id}")
         
         db.session.commit()
         
@@ -226,16 +266,13 @@ def cancel_order(order_id):
         if not order.can_cancel():
             return jsonify({'error': 'Order cannot be cancelled'}), 400
         
+        previous_status = order.status
         order.status = OrderStatus.CANCELLED
         order.cancelled_at = datetime.utcnow()
         
         # Restore product stock
-        for item in order.items:
-            if item.product.track_quantity:
-                if item.product_variant:
-                    item.product_variant.stock_quantity += item.quantity
-                else:
-                    item.product.stock_quantity += item.quantity
+        release_order_stock(order)
+        record_order_status_change(order, previous_status)
         
         db.session.commit()
         
@@ -269,8 +306,10 @@ def request_return(order_id):
         if not order.can_return():
             return jsonify({'error': 'Order cannot be returned'}), 400
         
+        previous_status = order.status
         order.status = OrderStatus.RETURNED
         order.admin_notes = f"Return requested: {data['reason']}"
+        record_order_status_change(order, previous_status)
         
         db.session.commit()
         
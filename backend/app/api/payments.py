@@ -1,35 +1,124 @@
 from flask import Blueprint, request, jsonify
-import razorpay
-from app.utils.decorators import handle_errors
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from app import db, jobs
+from app.models.order import OrderStatus
+from app.models.payment import Payment
+from app.tasks import create_gateway_order
+from app.utils.decorators import handle_errors, validate_json
+from app.utils.rollups import record_payment_change
+from app.utils.stock import commit_order_stock
+from app.utils.validators import validate_uuid
 from flask import current_app
+import hashlib
+import hmac
 
 payments_bp = Blueprint('payments', __name__)
 
 @payments_bp.route('/create-payment', methods=['POST'])
+@jwt_required()
 @handle_errors
+@validate_json('order_id')
 def create_payment():
- """Create Razorpay order"""
+    """Razorpay order for one of the user's pending online payments
+
+    The gateway order is created by a background job when the order is
+    placed. Until it exists this answers 202 with Retry-After, so the
+    request never waits on Razorpay.
+    """
+    current_user_id = get_jwt_identity()
     data = request.get_json()
-    amount = data.get('amount')
-    currency = data.get('currency', 'INR')
-    receipt = data.get('receipt') # Optional: unique identifier for the order
-
- if not amount or not isinstance(amount, (int, float)) or amount <= 0:
- return jsonify({'error': 'Invalid amount'}), 400
-
- try:
- client = razorpay.Client(auth=(current_app.config['RAZORPAY_KEY_ID'], current_app.config['RAZORPAY_KEY_SECRET']))
- razorpay_order = client.order.create({
- 'amount': int(amount * 100), # Razorpay expects amount in paise
- 'currency': currency,
- 'receipt': receipt or str(uuid.uuid4()) # Generate a receipt if not provided
- })
- return jsonify(razorpay_order), 201
- except Exception as e:
- return jsonify({'error': str(e)}), 500
+    order_id = data['order_id']
+
+    if not validate_uuid(order_id):
+        return jsonify({'error': 'Invalid order ID'}), 400
+
+    payment = Payment.query.filter_by(
+        order_id=order_id,
+        user_id=current_user_id,
+        payment_status='pending'
+    ).order_by(Payment.created_at.desc()).first()
+    if not payment:
+        return jsonify({'error': 'No pending payment for this order'}), 404
+
+    if payment.payment_method.upper() == 'COD':
+        return jsonify({'error': 'Order is cash on delivery'}), 400
+
+    if payment.gateway_transaction_id:
+        return jsonify(payment.gateway_response), 200
+
+    try:
+        # Normally already queued at checkout; the key makes this a no-op then
+        result = jobs.enqueue(create_gateway_order, str(payment.id), idempotency_key=f"gateway-order:{payment.id}")
+    except Exception as e:
+        current_app.logger.error(f"Create payment error: {str(e)}")
+        return jsonify({'error': 'Failed to create payment'}), 500
+
+    if result.ready() and result.result:
+        return jsonify(result.result), 201
+
+    response = jsonify({'status': 'pending', 'message': 'Payment is being prepared, retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 202
 
 @payments_bp.route('/webhook', methods=['POST'])
 @handle_errors
 def payment_webhook():
-    """Handle payment webhooks"""
-    return jsonify({'message': 'Payment webhook endpoint'}), 200 
\ No newline at end of file
+    """Razorpay webhook: record captured and failed payments
+
+    The body must carry a valid X-Razorpay-Signature for
+    RAZORPAY_WEBHOOK_SECRET. A capture marks the payment and its order
+    paid and commits the order's held stock, so the expired-hold sweep
+    no longer releases it. Redelivered events are no-ops.
+    """
+    secret = current_app.config.get('RAZORPAY_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'error': 'Webhook is not configured'}), 503
+
+    expected = hmac.new(secret.encode('utf-8'), request.get_data(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, request.headers.get('X-Razorpay-Signature', '')):
+        return jsonify({'error': 'Invalid signature'}), 400
+
+    event = request.get_json(silent=True) or {}
+    entity = (event.get('payload') or {}).get('payment', {}).get('entity') or {}
+    if event.get('event') not in ('payment.captured', 'payment.failed') or not entity.get('order_id'):
+        return jsonify({'message': 'Event ignored'}), 200
+
+    try:
+        payment = Payment.query.filter_by(
+            gateway_transaction_id=entity['order_id']
+        ).with_for_update().first()
+        if not payment or payment.payment_status == 'success':
+            return jsonify({'message': 'Event ignored'}), 200
+
+        previous_status = payment.payment_status
+        payment.gateway_response = {**(payment.gateway_response or {}), 'payment': entity}
+        payment.processed_at = datetime.utcnow()
+
+        if event['event'] == 'payment.failed':
+            payment.payment_status = 'failed'
+            payment.error_message = entity.get('error_description')
+        elif entity.get('amount') != int((payment.amount * 100).to_integral_value()):
+            # Leave the order unpaid for an admin to resolve
+            current_app.logger.error(f"Payment webhook: amount mismatch for payment {payment.id}")
+            payment.error_message = 'Captured amount does not match the order total'
+        else:
+            payment.payment_status = 'success'
+            payment.transaction_id = entity.get('id')
+            order = payment.order
+            if order is not None:
+                order.payment_status = 'paid'
+                order.transaction_id = entity.get('id')
+                commit_order_stock(order.id)
+                if order.status == OrderStatus.CANCELLED:
+                    # The hold expired before the capture arrived
+                    current_app.logger.error(f"Payment captured for cancelled order {order.order_number}; refund required")
+
+        record_payment_change(payment, previous_status)
+        db.session.commit()
+        return jsonify({'message': 'Payment updated'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Payment webhook error: {str(e)}")
+        return jsonify({'error': 'Failed to process webhook'}), 500
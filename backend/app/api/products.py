@@ -1,80 +1,128 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db, limiter
-from app.models.product import Product, Category, Collection, ProductImage, ProductVariant
+from app.models.product import Product, Category, Collection, ProductImage, ProductVariant, PRODUCT_VIEWS, product_serializer
 from app.models.review import Review
 from app.utils.decorators import handle_errors, paginate_response, cache_response
+from app.utils.cache import add_cache_tags, listing_cache_tags
+from app.utils.loaders import load_product_listing, load_reviews, pick_main_image
+from app.utils.search import apply_product_search, tokenize
+from app.utils.facets import count_product_facets
+from app.utils.pagination import keyset_paginate, wants_total
+from app.utils.serializers import requested_fields
 from app.utils.validators import validate_uuid
 from sqlalchemy import and_, or_, desc, asc
 import math
 
 products_bp = Blueprint('products', __name__)
 
+def _filtered_products_query(args, rank=False):
+    """Active products matching the catalog filters in args
+    
+    Returns a (query, error) tuple; error is a message for a 400 response.
+    """
+    category_id = args.get('category_id')
+    collection_id = args.get('collection_id')
+    search = args.get('search')
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    material = args.get('material')
+    occasion = args.get('occasion')
+    style = args.get('style')
+    featured_only = args.get('featured_only', type=bool)
+    
+    # Build query
+    query = Product.query.filter(Product.is_active == True)
+    
+    # Apply filters
+    if category_id:
+        if not validate_uuid(category_id):
+            return None, 'Invalid category ID'
+        query = query.filter(Product.category_id == category_id)
+    
+    if collection_id:
+        if not validate_uuid(collection_id):
+            return None, 'Invalid collection ID'
+        query = query.filter(Product.collection_id == collection_id)
+    
+    if search:
+        query = apply_product_search(query, search, rank=rank)
+    
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    
+    if material:
+        query = query.filter(Product.material.ilike(f"%{material}%"))
+    
+    if occasion:
+        query = query.filter(Product.occasion.ilike(f"%{occasion}%"))
+    
+    if style:
+        query = query.filter(Product.style.ilike(f"%{style}%"))
+    
+    if featured_only:
+        query = query.filter(Product.is_featured == True)
+    
+    return query, None
+
+def _only_columns_for(query, fields, *also):
+    """Restrict a Product query to the columns the selected fields read"""
+    option = product_serializer.load_only(Product, fields, *also)
+    return query.options(option) if option is not None else query
+
 @products_bp.route('/', methods=['GET'])
 @handle_errors
 @paginate_response
 @cache_response(timeout=300)
-def get_products(page=1, per_page=20):
+def get_products(page=1, per_page=20, cursor=None):
     """Get products with filtering and pagination"""
     try:
-        # Get query parameters
-        category_id = request.args.get('category_id')
-        collection_id = request.args.get('collection_id')
         search = request.args.get('search')
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        material = request.args.get('material')
-        occasion = request.args.get('occasion')
-        style = request.args.get('style')
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
-        featured_only = request.args.get('featured_only', type=bool)
-        
-        # Build query
-        query = Product.query.filter(Product.is_active == True)
-        
-        # Apply filters
-        if category_id:
-            if not validate_uuid(category_id):
-                return jsonify({'error': 'Invalid category ID'}), 400
-            query = query.filter(Product.category_id == category_id)
-        
-        if collection_id:
-            if not validate_uuid(collection_id):
-                return jsonify({'error': 'Invalid collection ID'}), 400
-            query = query.filter(Product.collection_id == collection_id)
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term),
-                    Product.short_description.ilike(search_term),
-                    Product.tags.contains([search])
-                )
-            )
-        
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
         
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
+        # Rank by relevance unless the client asked for an explicit sort
+        rank_by_relevance = bool(search) and 'sort_by' not in request.args
         
-        if material:
-            query = query.filter(Product.material.ilike(f"%{material}%"))
+        query, error = _filtered_products_query(request.args, rank=rank_by_relevance)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if occasion:
-            query = query.filter(Product.occasion.ilike(f"%{occasion}%"))
+        try:
+            fields = requested_fields(product_serializer, 'card', PRODUCT_VIEWS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if style:
-            query = query.filter(Product.style.ilike(f"%{style}%"))
+        add_cache_tags(*listing_cache_tags(request.args.get('category_id'), request.args.get('collection_id')))
         
-        if featured_only:
-            query = query.filter(Product.is_featured == True)
+        if cursor is not None:
+            if rank_by_relevance:
+                return jsonify({'error': 'Cursor pagination requires an explicit sort_by'}), 400
+            if sort_by not in ['name', 'price', 'created_at', 'sort_order']:
+                sort_by = 'created_at'
+            
+            # Keyset mode: seek on (sort key, id), COUNT only on request
+            try:
+                keyset_page = keyset_paginate(
+                    _only_columns_for(query, fields, sort_by), Product, sort_by, per_page, cursor,
+                    descending=(sort_order == 'desc'),
+                    include_total=wants_total()
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            return jsonify({
+                'products': load_product_listing(keyset_page.items, fields=fields),
+                'pagination': keyset_page.to_dict()
+            }), 200
         
         # Apply sorting
-        if sort_by in ['name', 'price', 'created_at', 'sort_order']:
+        if rank_by_relevance:
+            pass
+        elif sort_by in ['name', 'price', 'created_at', 'sort_order']:
             if sort_order == 'desc':
                 query = query.order_by(desc(getattr(Product, sort_by)))
             else:
@@ -83,7 +131,7 @@ def get_products(page=1, per_page=20):
             query = query.order_by(desc(Product.created_at))
         
         # Paginate
-        pagination = query.paginate(
+        pagination = _only_columns_for(query, fields).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
@@ -94,30 +142,8 @@ def get_products(page=1, per_page=20):
         # Calculate total pages
         total_pages = math.ceil(pagination.total / per_page)
         
-        # Get product images and variants
-        product_data = []
-        for product in products:
-            product_dict = product.to_dict()
-            
-            # Add images
-            images = product.images.order_by(ProductImage.sort_order).all()
-            product_dict['images'] = [img.to_dict() for img in images]
-            
-            # Add variants
-            variants = product.variants.filter(ProductVariant.is_active == True).all()
-            product_dict['variants'] = [variant.to_dict() for variant in variants]
-            
-            # Add average rating
-            reviews = product.reviews.filter(Review.is_approved == True).all()
-            if reviews:
-                avg_rating = sum(review.rating for review in reviews) / len(reviews)
-                product_dict['average_rating'] = round(avg_rating, 1)
-                product_dict['review_count'] = len(reviews)
-            else:
-                product_dict['average_rating'] = 0
-                product_dict['review_count'] = 0
-            
-            product_data.append(product_dict)
+        # Images, variants and ratings for the whole page in a fixed number of queries
+        product_data = load_product_listing(products, fields=fields)
         
         return jsonify({
             'products': product_data,
@@ -135,6 +161,34 @@ def get_products(page=1, per_page=20):
         current_app.logger.error(f"Get products error: {str(e)}")
         return jsonify({'error': 'Failed to fetch products'}), 500
 
+@products_bp.route('/facets', methods=['GET'])
+@handle_errors
+@cache_response(timeout=300)
+def get_product_facets():
+    """Get value counts for every catalog facet under the current filters"""
+    try:
+        query, error = _filtered_products_query(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        add_cache_tags(*listing_cache_tags(request.args.get('category_id'), request.args.get('collection_id')))
+        
+        facets, price_buckets, price_range, total = count_product_facets(
+            query,
+            current_app.config['PRICE_FACET_BUCKETS']
+        )
+        
+        return jsonify({
+            'facets': facets,
+            'price_buckets': price_buckets,
+            'price_range': price_range,
+            'total': total
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get product facets error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch product facets'}), 500
+
 @products_bp.route('/<product_id>', methods=['GET'])
 @handle_errors
 @cache_response(timeout=300)
@@ -144,57 +198,62 @@ def get_product(product_id):
         if not validate_uuid(product_id):
             return jsonify({'error': 'Invalid product ID'}), 400
         
-        product = Product.query.get(product_id)
+        try:
+            fields = requested_fields(product_serializer, 'detail', PRODUCT_VIEWS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        product = _only_columns_for(Product.query, fields, 'is_active', 'category_id').get(product_id)
         if not product or not product.is_active:
             return jsonify({'error': 'Product not found'}), 404
         
-        # Get product data
-        product_dict = product.to_dict()
+        # Related products come from the same category, so tag it as well
+        add_cache_tags(f"product:{product.id}", f"category:{product.category_id}")
+        
+        # Get product data; main_image is filled in from the images below
+        product_dict = product.to_dict(include_main_image=False, fields=fields)
         
         # Add images
-        images = product.images.order_by(ProductImage.sort_order).all()
-        product_dict['images'] = [img.to_dict() for img in images]
+        wants = product_serializer.wants
+        if wants(fields, 'images') or wants(fields, 'main_image'):
+            images = product.images.order_by(ProductImage.sort_order).all()
+            if wants(fields, 'main_image'):
+                product_dict['main_image'] = pick_main_image(images)
+            if wants(fields, 'images'):
+                product_dict['images'] = [img.to_dict() for img in images]
         
         # Add variants
-        variants = product.variants.filter(ProductVariant.is_active == True).all()
-        product_dict['variants'] = [variant.to_dict() for variant in variants]
+        if wants(fields, 'variants'):
+            variants = product.variants.filter(ProductVariant.is_active == True).all()
+            product_dict['variants'] = [variant.to_dict() for variant in variants]
         
         # Add reviews
-        reviews = product.reviews.filter(Review.is_approved == True).order_by(desc(Review.created_at)).limit(10).all()
-        product_dict['reviews'] = [review.to_dict() for review in reviews]
+        if wants(fields, 'reviews'):
+            reviews = product.reviews.filter(Review.is_approved == True).order_by(desc(Review.created_at)).limit(10).all()
+            product_dict['reviews'] = load_reviews(reviews)
         
         # Add rating statistics
-        all_reviews = product.reviews.filter(Review.is_approved == True).all()
-        if all_reviews:
-            ratings = [review.rating for review in all_reviews]
-            product_dict['rating_stats'] = {
-                'average_rating': round(sum(ratings) / len(ratings), 1),
-                'total_reviews': len(ratings),
-                'rating_distribution': {
-                    '5': len([r for r in ratings if r == 5]),
-                    '4': len([r for r in ratings if r == 4]),
-                    '3': len([r for r in ratings if r == 3]),
-                    '2': len([r for r in ratings if r == 2]),
-                    '1': len([r for r in ratings if r == 1])
-                }
-            }
-        else:
-            product_dict['rating_stats'] = {
-                'average_rating': 0,
-                'total_reviews': 0,
-                'rating_distribution': {'5': 0, '4': 0, '3': 0, '2': 0, '1': 0}
-            }
+        if wants(fields, 'rating_stats'):
+            product_dict['rating_stats'] = product.get_rating_stats()
         
         # Add related products
-        related_products = Product.query.filter(
-            and_(
-                Product.is_active == True,
-                Product.category_id == product.category_id,
-                Product.id != product.id
+        if wants(fields, 'related_products'):
+            # Shown as product tiles, so only the card fields
+            card = product_serializer.projection('card')
+            related_products = _only_columns_for(Product.query, card).filter(
+                and_(
+                    Product.is_active == True,
+                    Product.category_id == product.category_id,
+                    Product.id != product.id
+                )
+            ).limit(4).all()
+            
+            product_dict['related_products'] = load_product_listing(
+                related_products,
+                include_images=False,
+                include_variants=False,
+                fields=card
             )
-        ).limit(4).all()
-        
-        product_dict['related_products'] = [p.to_dict() for p in related_products]
         
         return jsonify({'product': product_dict}), 200
         
@@ -204,7 +263,7 @@ def get_product(product_id):
 
 @products_bp.route('/categories', methods=['GET'])
 @handle_errors
-@cache_response(timeout=600)
+@cache_response(timeout=600, tags=('categories',))
 def get_categories():
     """Get all product categories"""
     try:
@@ -220,7 +279,7 @@ def get_categories():
 
 @products_bp.route('/collections', methods=['GET'])
 @handle_errors
-@cache_response(timeout=600)
+@cache_response(timeout=600, tags=('collections',))
 def get_collections():
     """Get all product collections"""
     try:
@@ -236,22 +295,28 @@ def get_collections():
 
 @products_bp.route('/featured', methods=['GET'])
 @handle_errors
-@cache_response(timeout=300)
+@cache_response(timeout=300, tags=('listing:all',))
 def get_featured_products():
     """Get featured products"""
     try:
-        featured_products = Product.query.filter(
+        try:
+            fields = requested_fields(product_serializer, 'card', PRODUCT_VIEWS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        featured_products = _only_columns_for(Product.query, fields).filter(
             and_(
                 Product.is_active == True,
                 Product.is_featured == True
             )
         ).order_by(desc(Product.sort_order)).limit(8).all()
         
-        product_data = []
-        for product in featured_products:
-            product_dict = product.to_dict()
-            product_dict['main_image'] = product.get_main_image()
-            product_data.append(product_dict)
+        product_data = load_product_listing(
+            featured_products,
+            include_images=False,
+            include_variants=False,
+            fields=fields
+        )
         
         return jsonify({
             'featured_products': product_data
@@ -264,34 +329,27 @@ def get_featured_products():
 @products_bp.route('/search', methods=['GET'])
 @handle_errors
 @paginate_response
-def search_products(page=1, per_page=20):
+def search_products(page=1, per_page=20, cursor=None):
     """Search products with advanced filtering"""
     try:
         query = request.args.get('q', '')
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
         
+        # Relevance ordering has no stable seek key
+        if cursor is not None:
+            return jsonify({'error': 'Cursor pagination is not supported for search'}), 400
+        
+        try:
+            fields = requested_fields(product_serializer, 'card', PRODUCT_VIEWS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build search query
         search_query = Product.query.filter(Product.is_active == True)
         
-        # Split query into terms
-        terms = query.split()
-        conditions = []
-        
-        for term in terms:
-            term_condition = or_(
-                Product.name.ilike(f"%{term}%"),
-                Product.description.ilike(f"%{term}%"),
-                Product.short_description.ilike(f"%{term}%"),
-                Product.material.ilike(f"%{term}%"),
-                Product.occasion.ilike(f"%{term}%"),
-                Product.style.ilike(f"%{term}%"),
-                Product.tags.contains([term])
-            )
-            conditions.append(term_condition)
-        
-        if conditions:
-            search_query = search_query.filter(and_(*conditions))
+        # Full-text match ordered by relevance
+        search_query = apply_product_search(search_query, query, rank=True)
         
         # Apply additional filters
         category_id = request.args.get('category_id')
@@ -306,11 +364,8 @@ def search_products(page=1, per_page=20):
         if max_price is not None:
             search_query = search_query.filter(Product.price <= max_price)
         
-        # Sort by relevance (you could implement more sophisticated ranking)
-        search_query = search_query.order_by(desc(Product.is_featured), desc(Product.created_at))
-        
         # Paginate
-        pagination = search_query.paginate(
+        pagination = _only_columns_for(search_query, fields).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
@@ -319,11 +374,12 @@ def search_products(page=1, per_page=20):
         products = pagination.items
         
         # Format response
-        product_data = []
-        for product in products:
-            product_dict = product.to_dict()
-            product_dict['main_image'] = product.get_main_image()
-            product_data.append(product_dict)
+        product_data = load_product_listing(
+            products,
+            include_images=False,
+            include_variants=False,
+            fields=fields
+        )
         
         return jsonify({
             'products': product_data,
@@ -342,10 +398,43 @@ def search_products(page=1, per_page=20):
         current_app.logger.error(f"Search products error: {str(e)}")
         return jsonify({'error': 'Failed to search products'}), 500
 
+@products_bp.route('/search/suggestions', methods=['GET'])
+@handle_errors
+@cache_response(timeout=120, tags=('listing:all',))
+def search_suggestions():
+    """Type-ahead suggestions using prefix matching"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(request.args.get('limit', 8, type=int), 20)
+        
+        if not tokenize(query):
+            return jsonify({'suggestions': []}), 200
+        
+        search_query = Product.query.filter(Product.is_active == True).with_entities(
+            Product.id, Product.name, Product.slug, Product.price
+        )
+        search_query = apply_product_search(search_query, query, rank=True)
+        
+        suggestions = [
+            {
+                'id': str(product_id),
+                'name': name,
+                'slug': slug,
+                'price': float(price)
+            }
+            for product_id, name, slug, price in search_query.limit(limit).all()
+        ]
+        
+        return jsonify({'suggestions': suggestions}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Search suggestions error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch suggestions'}), 500
+
 @products_bp.route('/<product_id>/reviews', methods=['GET'])
 @handle_errors
 @paginate_response
-def get_product_reviews(product_id, page=1, per_page=10):
+def get_product_reviews(product_id, page=1, per_page=10, cursor=None):
     """Get product reviews"""
     try:
         if not validate_uuid(product_id):
@@ -362,6 +451,20 @@ def get_product_reviews(product_id, page=1, per_page=10):
             )
         ).order_by(desc(Review.created_at))
         
+        if cursor is not None:
+            try:
+                keyset_page = keyset_paginate(
+                    reviews, Review, 'created_at', per_page, cursor,
+                    include_total=wants_total()
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            return jsonify({
+                'reviews': load_reviews(keyset_page.items),
+                'pagination': keyset_page.to_dict()
+            }), 200
+        
         pagination = reviews.paginate(
             page=page, 
             per_page=per_page, 
@@ -369,7 +472,7 @@ def get_product_reviews(product_id, page=1, per_page=10):
         )
         
         return jsonify({
-            'reviews': [review.to_dict() for review in pagination.items],
+            'reviews': load_reviews(pagination.items),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -1,20 +1,28 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db, limiter
+from app import db, limiter, cache
 from app.models.review import Review, ReviewImage
 from app.models.product import Product
 from app.models.order import Order, OrderItem
-from app.utils.decorators import handle_errors, validate_json, paginate_response
+from app.utils.decorators import handle_errors, validate_json, paginate_response, admin_required
 from app.utils.validators import validate_uuid
+from app.utils.cache import product_cache_tags
+from app.utils.pagination import keyset_paginate, wants_total
 from sqlalchemy import desc
 import uuid
 
 reviews_bp = Blueprint('reviews', __name__)
 
+def _invalidate_rating_caches(product_id):
+    """Evict the product page and every listing that shows its rating"""
+    product = db.session.get(Product, product_id)
+    if product is not None:
+        cache.invalidate(*product_cache_tags(product))
+
 @reviews_bp.route('/product/<product_id>', methods=['GET'])
 @handle_errors
 @paginate_response
-def get_product_reviews(product_id, page=1, per_page=10):
+def get_product_reviews(product_id, page=1, per_page=10, cursor=None):
     """Get reviews for a product"""
     try:
         # Validate product ID
@@ -45,8 +53,26 @@ def get_product_reviews(product_id, page=1, per_page=10):
         if has_images:
             query = query.filter(Review.images.any())
         
-        # Paginate
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate (keyset mode when a cursor is given)
+        if cursor is not None:
+            try:
+                pagination = keyset_paginate(
+                    query, Review, 'created_at', per_page, cursor,
+                    include_total=wants_total()
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination_data = pagination.to_dict()
+        else:
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            pagination_data = {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'total_pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
         reviews = pagination.items
         
         # Get review data with user info
@@ -62,33 +88,12 @@ def get_product_reviews(product_id, page=1, per_page=10):
             review_data.append(review_dict)
         
         # Get rating statistics
-        rating_stats = {
-            'average_rating': 0,
-            'total_reviews': 0,
-            'rating_distribution': {
-                '5': 0, '4': 0, '3': 0, '2': 0, '1': 0
-            }
-        }
-        
-        all_reviews = Review.query.filter_by(product_id=product_id, is_approved=True).all()
-        if all_reviews:
-            ratings = [r.rating for r in all_reviews]
-            rating_stats['average_rating'] = round(sum(ratings) / len(ratings), 1)
-            rating_stats['total_reviews'] = len(ratings)
-            for i in range(1, 6):
-                rating_stats['rating_distribution'][str(i)] = len([r for r in ratings if r == i])
+        rating_stats = product.get_rating_stats()
         
         return jsonify({
             'reviews': review_data,
             'rating_stats': rating_stats,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'total_pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination_data
         }), 200
         
     except Exception as e:
@@ -181,6 +186,9 @@ def add_review():
         db.session.add(review)
         db.session.flush()  # Get review ID without committing
         
+        if review.is_approved:
+            Product.apply_rating_change(product.id, added_rating=review.rating)
+        
         # Add images
         for image_data in images:
             if 'image_url' in image_data:
@@ -192,6 +200,7 @@ def add_review():
                 db.session.add(review_image)
         
         db.session.commit()
+        cache.invalidate(*product_cache_tags(product))
         
         return jsonify({
             'message': 'Review added successfully',
@@ -221,6 +230,9 @@ def update_review(review_id):
         if not review:
             return jsonify({'error': 'Review not found or you are not authorized to update it'}), 404
         
+        # Rating that currently counts towards the product aggregates
+        previous_rating = review.rating if review.is_approved else None
+        
         # Update fields
         if 'rating' in data:
             rating = data['rating']
@@ -252,7 +264,15 @@ def update_review(review_id):
         # Reset approval if needed
         review.is_approved = True  # Auto-approve for now
         
+        if previous_rating != review.rating:
+            Product.apply_rating_change(
+                review.product_id,
+                removed_rating=previous_rating,
+                added_rating=review.rating
+            )
+        
         db.session.commit()
+        _invalidate_rating_caches(review.product_id)
         
         return jsonify({
             'message': 'Review updated successfully',
@@ -281,9 +301,14 @@ def delete_review(review_id):
         if not review:
             return jsonify({'error': 'Review not found or you are not authorized to delete it'}), 404
         
+        if review.is_approved:
+            Product.apply_rating_change(review.product_id, removed_rating=review.rating)
+        
         # Delete review (cascade will delete images)
+        product_id = review.product_id
         db.session.delete(review)
         db.session.commit()
+        _invalidate_rating_caches(product_id)
         
         return jsonify({
             'message': 'Review deleted successfully'
@@ -294,6 +319,49 @@ def delete_review(review_id):
         current_app.logger.error(f"Delete review error: {str(e)}")
         return jsonify({'error': 'Failed to delete review'}), 500
 
+@reviews_bp.route('/<review_id>/moderate', methods=['PUT'])
+@jwt_required()
+@admin_required
+@handle_errors
+@validate_json('is_approved')
+def moderate_review(review_id):
+    """Approve or reject a review (admin only)"""
+    try:
+        data = request.get_json()
+        
+        # Validate review ID
+        if not validate_uuid(review_id):
+            return jsonify({'error': 'Invalid review ID'}), 400
+        
+        is_approved = data['is_approved']
+        if not isinstance(is_approved, bool):
+            return jsonify({'error': 'is_approved must be a boolean'}), 400
+        
+        # Get review
+        review = Review.query.get(review_id)
+        if not review:
+            return jsonify({'error': 'Review not found'}), 404
+        
+        if review.is_approved != is_approved:
+            if is_approved:
+                Product.apply_rating_change(review.product_id, added_rating=review.rating)
+            else:
+                Product.apply_rating_change(review.product_id, removed_rating=review.rating)
+            review.is_approved = is_approved
+        
+        db.session.commit()
+        _invalidate_rating_caches(review.product_id)
+        
+        return jsonify({
+            'message': 'Review moderated successfully',
+            'review': review.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Moderate review error: {str(e)}")
+        return jsonify({'error': 'Failed to moderate review'}), 500
+
 @reviews_bp.route('/<review_id>/helpful', methods=['POST'])
 @jwt_required()
 @handle_errors
@@ -327,7 +395,7 @@ def mark_review_helpful(review_id):
 @jwt_required()
 @handle_errors
 @paginate_response
-def get_user_reviews(page=1, per_page=10):
+def get_user_reviews(page=1, per_page=10, cursor=None):
     """Get reviews by current user"""
     try:
         current_user_id = get_jwt_identity()
@@ -337,8 +405,26 @@ def get_user_reviews(page=1, per_page=10):
             user_id=current_user_id
         ).order_by(desc(Review.created_at))
         
-        # Paginate
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate (keyset mode when a cursor is given)
+        if cursor is not None:
+            try:
+                pagination = keyset_paginate(
+                    query, Review, 'created_at', per_page, cursor,
+                    include_total=wants_total()
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination_data = pagination.to_dict()
+        else:
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            pagination_data = {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'total_pages': pagination.pages,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
         reviews = pagination.items
         
         # Get review data with product info
@@ -356,14 +442,7 @@ def get_user_reviews(page=1, per_page=10):
         
         return jsonify({
             'reviews': review_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'total_pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination_data
         }), 200
         
     except Exception as e:
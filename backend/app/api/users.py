@@ -1,14 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db, cloudinary_client
+from app import db
 from app.models.user import User, UserAddress, UserProfile
-from app.models.wallet import Wallet, Transaction  # Assuming Wallet and Transaction models exist
+# Assuming Wallet and Transaction models exist
+# from app.models.wallet import Wallet, Transaction
 from app.models.payment import Payment # Import Payment model
 from app.models.notification import Notification # Assuming Notification model exists
 # Assuming a SupportTicket model exists
 # from app.models.support import SupportTicket
 from app.utils.decorators import handle_errors, validate_json
 from app.utils.validators import validate_uuid, validate_phone
+from app.utils.rollups import record_payment_change
+import cloudinary
+import cloudinary.uploader
 import uuid
 
 users_bp = Blueprint('users', __name__)
@@ -202,9 +206,11 @@ def add_wallet_funds():
             amount=amount,
             payment_method='wallet_topup', # Or a specific type for wallet top-ups
             payment_status='pending',
-            payment_intent_id=str(uuid.uuid4()) # Placeholder, replace with actual payment gateway intent ID
+            transaction_id=str(uuid.uuid4()) # Placeholder, replace with actual payment gateway intent ID
         )
         db.session.add(payment)
+        db.session.flush()
+        record_payment_change(payment)
         db.session.commit()
 
         # In a real scenario, you would now interact with a payment gateway (e.g., Razorpay)
@@ -240,7 +246,12 @@ def upload_profile_picture():
             return jsonify({'error': 'No selected file'}), 400
 
         if file:
-            upload_result = cloudinary_client.uploader.upload(
+            cloudinary.config(
+                cloud_name=current_app.config.get('CLOUDINARY_CLOUD_NAME'),
+                api_key=current_app.config.get('CLOUDINARY_API_KEY'),
+                api_secret=current_app.config.get('CLOUDINARY_API_SECRET')
+            )
+            upload_result = cloudinary.uploader.upload(
                 file,
                 folder=f"user_profile_pictures/{current_user_id}" # Organize uploads by user ID
             )
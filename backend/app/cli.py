@@ -2,6 +2,9 @@ import click
 from flask.cli import with_appcontext
 from app import db
 from app.models import *
+from app.utils.stock import release_expired_reservations
+from app.utils.query_plans import HOT_QUERIES, explain_hot_queries
+from app.utils.rollups import rebuild_rollups
 
 def register_commands(app):
     """Register CLI commands for the application"""
@@ -62,6 +65,69 @@ def register_commands(app):
             db.session.rollback()
             click.echo(f'Error seeding database: {str(e)}')
     
+    @app.cli.command('refresh-rating-stats')
+    @with_appcontext
+    def refresh_rating_stats():
+        """Recompute product rating aggregates from reviews."""
+        try:
+            updated = Product.refresh_rating_stats()
+            db.session.commit()
+            click.echo(f'Refreshed rating stats for {updated} products.')
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error refreshing rating stats: {str(e)}')
+    
+    @app.cli.command('release-expired-holds')
+    @with_appcontext
+    def release_expired_holds():
+        """Release stock held by unpaid orders past their payment deadline."""
+        try:
+            order_ids = release_expired_reservations()
+            db.session.commit()
+            click.echo(f'Released stock for {len(order_ids)} unpaid orders.')
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error releasing expired holds: {str(e)}')
+    
+    @app.cli.command('backfill-rollups')
+    @click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Rebuild only buckets from this store-local day onwards.')
+    @with_appcontext
+    def backfill_rollups(since):
+        """Rebuild the admin dashboard rollups from orders and payments."""
+        try:
+            processed = rebuild_rollups(since.date() if since else None)
+            db.session.commit()
+            click.echo(f'Rebuilt rollups from {processed} orders.')
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error rebuilding rollups: {str(e)}')
+    
+    @app.cli.command('explain-hot-queries')
+    @click.argument('names', nargs=-1)
+    @click.option('--natural', is_flag=True, help='Let the planner pick seq scans on small tables.')
+    @with_appcontext
+    def explain_queries(names, natural):
+        """EXPLAIN registered hot queries and flag sequential scans."""
+        unknown = [name for name in names if name not in HOT_QUERIES]
+        if unknown:
+            click.echo(f"Unknown queries: {', '.join(unknown)}")
+            click.echo(f"Available: {', '.join(HOT_QUERIES)}")
+            raise SystemExit(2)
+        
+        results = explain_hot_queries(names, prefer_indexes=not natural)
+        flagged = 0
+        for name, scans in results.items():
+            if scans:
+                flagged += 1
+                click.echo(f"SEQ SCAN  {name}: {', '.join(scans)}")
+            else:
+                click.echo(f"ok        {name}")
+        
+        click.echo(f'{flagged} of {len(results)} hot queries scan a table in full.')
+        if flagged:
+            raise SystemExit(1)
+    
     @app.cli.command('create-admin')
     @click.argument('email')
     @click.argument('password')
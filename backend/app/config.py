@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from app.utils.db_pool import TimedQueuePool
 
 class Config:
     """Base configuration class"""
@@ -11,6 +12,19 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'postgresql://localhost/nakhrali_fashion'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool, per gunicorn worker: keep workers x (size + overflow), plus
+    # Celery workers, comfortably under Postgres max_connections
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 4)),  # One per gthread thread
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+        'connect_args': {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    }
+    
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -35,6 +49,7 @@ class Config:
     STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY')
     RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID')
     RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET')
+    RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET')
     
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
@@ -65,15 +80,76 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = 20
     
+    # Catalog facets: upper edges of the price histogram buckets
+    PRICE_FACET_BUCKETS = [1000, 2500, 5000, 10000, 25000, 50000]
+    
+    # Authorization: seconds a user's role/active/verified state is cached per process
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+    PRINCIPAL_CACHE_SIZE = 1024
+    # Shares invalidations between workers; without it a change reaches other workers after the TTL
+    PRINCIPAL_REDIS_URL = os.environ.get('PRINCIPAL_REDIS_URL') or os.environ.get('REDIS_URL')
+    
+    # Password hashing: bcrypt cost, and the per-process pool it runs in
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 8))
+    PASSWORD_HASH_TIMEOUT = 10  # Seconds a request waits for its hash before giving up
+    PASSWORD_HASH_RETRY_AFTER = 1
+    
+    # JSON responses: encode with orjson when it is installed
+    ORJSON_ENABLED = os.environ.get('ORJSON_ENABLED', 'true').lower() == 'true'
+    
+    # Prometheus metrics at /api/health/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Bearer token for /api/health/metrics and /api/health/pool; unset closes them outside debug
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Per-request SQL profiler (development/staging): X-Query-Count header, N+1 and slow query warnings
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'false').lower() == 'true'
+    QUERY_PROFILER_REPEAT_THRESHOLD = int(os.environ.get('QUERY_PROFILER_REPEAT_THRESHOLD', 5))
+    QUERY_PROFILER_SLOW_MS = int(os.environ.get('QUERY_PROFILER_SLOW_MS', 100))
+    
+    # Admin analytics: rollup buckets are kept in store-local time (IST)
+    ANALYTICS_UTC_OFFSET_MINUTES = int(os.environ.get('ANALYTICS_UTC_OFFSET_MINUTES', 330))
+    
+    # Order and ticket numbers (Snowflake ids): each running process needs its own worker id.
+    # Pin one with ID_WORKER_ID (single process per value) or lease one from Redis.
+    ID_WORKER_ID = os.environ.get('ID_WORKER_ID')
+    ID_REDIS_URL = os.environ.get('ID_REDIS_URL') or os.environ.get('REDIS_URL')
+    ID_WORKER_LEASE_SECONDS = 300
+    
+    # Primary keys for new rows: 7 (time-ordered, appends to the index's right edge) or 4 (random)
+    PRIMARY_KEY_UUID_VERSION = int(os.environ.get('PRIMARY_KEY_UUID_VERSION', 7))
+    
+    # Checkout: minutes stock stays held for an unpaid online order
+    STOCK_HOLD_MINUTES = int(os.environ.get('STOCK_HOLD_MINUTES', 15))
+    
+    # Background jobs (Celery); only development and tests may run them inline in the request
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or os.environ.get('REDIS_URL')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or CELERY_BROKER_URL
+    JOBS_ALWAYS_EAGER = False
+    JOBS_LOCK_TIMEOUT = 600  # Seconds a running job keeps its idempotency key to itself
+    JOBS_IDEMPOTENCY_TTL = 7 * 86400  # Seconds a finished job's key blocks repeats
+    JOBS_RESULT_EXPIRES = 86400
+    STOCK_HOLD_SWEEP_SECONDS = 60  # Beat interval for releasing expired stock holds
+    
     # Cache Configuration
     CACHE_TYPE = 'redis' if os.environ.get('REDIS_URL') else 'simple'
     CACHE_REDIS_URL = os.environ.get('REDIS_URL')
     CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'nakhrali:')
+    CACHE_TAG_TIMEOUT = 86400  # Tag indexes must outlive every cached response
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))  # Per worker, in-process cache only
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'true').lower() == 'true'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'postgresql://localhost/nakhrali_fashion'
+    # Without a broker, jobs run inline so no worker is needed locally
+    JOBS_ALWAYS_EAGER = os.environ.get(
+        'JOBS_ALWAYS_EAGER', 'false' if Config.CELERY_BROKER_URL else 'true'
+    ).lower() == 'true'
     
 class ProductionConfig(Config):
     """Production configuration"""
@@ -88,6 +164,14 @@ class ProductionConfig(Config):
     
     # Database URL should be provided via environment variable
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        # Reuse the most recent connection so idle ones age out behind a proxy
+        'pool_use_lifo': True
+    }
+    
+    # Jobs always go through the broker; the app refuses to start without one
+    JOBS_ALWAYS_EAGER = False
     
     # CORS origins for production
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '').split(',')
@@ -99,12 +183,34 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    CACHE_TYPE = 'simple'
+    PRINCIPAL_REDIS_URL = None
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0  # Hash inline
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = None
+    JOBS_ALWAYS_EAGER = True
+
+class BenchmarkConfig(Config):
+    """Benchmark configuration: production settings against a local database"""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or 'sqlite:///benchmark.db'
+    SQLALCHEMY_ENGINE_OPTIONS = Config.SQLALCHEMY_ENGINE_OPTIONS if SQLALCHEMY_DATABASE_URI.startswith('postgresql') else {}
+    CACHE_TYPE = os.environ.get('BENCHMARK_CACHE_TYPE', 'simple')
+    RATELIMIT_ENABLED = False
+    BCRYPT_LOG_ROUNDS = 4  # Only seeding hashes passwords
+    PASSWORD_HASH_WORKERS = 0
+    CELERY_BROKER_URL = 'memory://'  # Jobs are queued but not run, as with a separate worker
+    CELERY_RESULT_BACKEND = None
+    JOBS_ALWAYS_EAGER = False
+    QUERY_PROFILER_ENABLED = False
 
 # Configuration mapping
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 } 
\ No newline at end of file
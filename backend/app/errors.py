@@ -1,4 +1,5 @@
 from flask import jsonify, current_app
+from app.utils.passwords import PasswordHasherBusy
 
 def register_error_handlers(app):
     """Register error handlers for the application"""
@@ -31,6 +32,12 @@ def register_error_handlers(app):
     def too_many_requests(error):
         return jsonify({'error': 'Too many requests'}), 429
     
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        response = jsonify({'error': 'Service is busy, please try again shortly'})
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response, 503
+    
     @app.errorhandler(500)
     def internal_server_error(error):
         current_app.logger.error(f'Internal server error: {error}')
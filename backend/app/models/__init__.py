@@ -9,6 +9,8 @@ from .review import Review, ReviewImage
 from .notification import Notification
 from .blog import BlogPost, BlogCategory
 from .support import SupportTicket, TicketMessage
+from .inventory import StockReservation
+from .analytics import SalesRollup, ProductSalesRollup, CouponRollup, PaymentRollup
 
 __all__ = [
     'User', 'UserAddress', 'UserProfile',
@@ -21,5 +23,7 @@ __all__ = [
     'Review', 'ReviewImage',
     'Notification',
     'BlogPost', 'BlogCategory',
-    'SupportTicket', 'TicketMessage'
+    'SupportTicket', 'TicketMessage',
+    'StockReservation',
+    'SalesRollup', 'ProductSalesRollup', 'CouponRollup', 'PaymentRollup'
 ] 
\ No newline at end of file
@@ -0,0 +1,72 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from app.utils.ids import new_uuid
+
+class SalesRollup(db.Model):
+    """Order aggregates per hour or day and order status"""
+    __tablename__ = 'sales_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'status', name='uq_sales_rollups_bucket_status'),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)  # Store-local time
+    status = db.Column(db.String(30), nullable=False)  # OrderStatus value
+    
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    coupon_orders = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ProductSalesRollup(db.Model):
+    """Daily units and revenue per product for orders that still count as sales"""
+    __tablename__ = 'product_sales_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_date', 'product_id', name='uq_product_sales_rollups_date_product'),
+        db.Index('ix_product_sales_rollups_date_category', 'bucket_date', 'category_id'),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
+    bucket_date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
+    category_id = db.Column(UUID(as_uuid=True), db.ForeignKey('categories.id'), nullable=True)
+    
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CouponRollup(db.Model):
+    """Daily coupon redemptions for orders that still count as sales"""
+    __tablename__ = 'coupon_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_date', 'coupon_code', name='uq_coupon_rollups_date_code'),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
+    bucket_date = db.Column(db.Date, nullable=False)
+    coupon_code = db.Column(db.String(50), nullable=False)
+    
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PaymentRollup(db.Model):
+    """Daily payment counts and amounts per method and status"""
+    __tablename__ = 'payment_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bucket_date', 'payment_method', 'payment_status', name='uq_payment_rollups_date_method_status'),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
+    bucket_date = db.Column(db.Date, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    payment_status = db.Column(db.String(20), nullable=False)
+    
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,13 +1,13 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class BlogCategory(db.Model):
     """Blog categories"""
     __tablename__ = 'blog_categories'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     name = db.Column(db.String(100), nullable=False)
     slug = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.Text, nullable=True)
@@ -31,7 +31,7 @@ class BlogPost(db.Model):
     """Blog posts"""
     __tablename__ = 'blog_posts'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     category_id = db.Column(UUID(as_uuid=True), db.ForeignKey('blog_categories.id'), nullable=True)
     
     # Post details
@@ -1,13 +1,19 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from decimal import Decimal
+from app.utils.serializers import Serializer, Attr, Id, Method, Number, Timestamp
+from app.utils.ids import new_uuid
 
 class Cart(db.Model):
     """Shopping cart model"""
     __tablename__ = 'carts'
+    __table_args__ = (
+        db.Index('ix_carts_user_active', 'user_id', postgresql_where=db.text('is_active = true'),
+                 sqlite_where=db.text('is_active = 1')),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     session_id = db.Column(db.String(255), nullable=True, index=True)  # For guest users
     
@@ -49,19 +55,25 @@ class Cart(db.Model):
                 total_weight += float(item.product.weight) * item.quantity
         return total_weight
     
-    def calculate_totals(self):
-        """Calculate cart totals"""
-        subtotal = sum(item.total_price for item in self.items)
+    def calculate_totals(self, subtotal=None):
+        """Calculate cart totals
+        
+        Pass subtotal when the items are already loaded (see
+        app.utils.loaders.load_cart) to skip re-querying them.
+        """
+        if subtotal is None:
+            subtotal = sum(Decimal(str(item.total_price)) for item in self.items)
+        subtotal = Decimal(str(subtotal))
         
         # Calculate tax (GST - 18% for jewelry)
-        tax_rate = 0.18
+        tax_rate = Decimal('0.18')
         tax_amount = subtotal * tax_rate
         
         # Calculate shipping (free above ₹5000, else ₹200)
         shipping_amount = 0 if subtotal >= 5000 else 200
         
         # Apply coupon discount
-        discount_amount = self.coupon_discount
+        discount_amount = Decimal(str(self.coupon_discount or 0))
         
         # Calculate total
         total_amount = subtotal + tax_amount + shipping_amount - discount_amount
@@ -86,40 +98,44 @@ class Cart(db.Model):
         return datetime.utcnow() > self.expires_at
     
     def clear(self):
-        """Clear all items from cart"""
-        for item in self.items:
-            db.session.delete(item)
+        """Clear all items from cart with a single DELETE"""
+        self.items.delete()
         self.coupon_code = None
         self.coupon_discount = 0
-        self.calculate_totals()
+        self.calculate_totals(subtotal=0)
     
-    def to_dict(self):
-        """Convert cart to dictionary"""
-        return {
-            'id': str(self.id),
-            'user_id': str(self.user_id),
-            'session_id': self.session_id,
-            'subtotal': float(self.subtotal),
-            'tax_amount': float(self.tax_amount),
-            'shipping_amount': float(self.shipping_amount),
-            'discount_amount': float(self.discount_amount),
-            'total_amount': float(self.total_amount),
-            'coupon_code': self.coupon_code,
-            'coupon_discount': float(self.coupon_discount),
-            'is_active': self.is_active,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'total_items': self.get_total_items(),
-            'total_weight': self.get_total_weight(),
-            'is_expired': self.is_expired()
-        }
+    def to_dict(self, total_items=None, total_weight=None):
+        """Convert cart to dictionary
+        
+        total_items and total_weight may be passed in when already computed
+        from loaded items.
+        """
+        if total_items is None:
+            total_items = self.get_total_items()
+        if total_weight is None:
+            total_weight = self.get_total_weight()
+        data = cart_serializer.dump(self)
+        data['total_items'] = total_items
+        data['total_weight'] = total_weight
+        return data
+
+cart_serializer = Serializer(
+    Id('id'), Id('user_id'), Attr('session_id'),
+    Number('subtotal'), Number('tax_amount'), Number('shipping_amount'), Number('discount_amount'),
+    Number('total_amount'), Attr('coupon_code'), Number('coupon_discount'), Attr('is_active'),
+    Timestamp('expires_at'), Timestamp('created_at'), Timestamp('updated_at'),
+    Method('is_expired', 'is_expired'),
+    extra=('total_items', 'total_weight')
+)
 
 class CartItem(db.Model):
     """Individual items in shopping cart"""
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.Index('ix_cart_items_cart_id', 'cart_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     cart_id = db.Column(UUID(as_uuid=True), db.ForeignKey('carts.id'), nullable=False)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     product_variant_id = db.Column(UUID(as_uuid=True), db.ForeignKey('product_variants.id'), nullable=True)
@@ -206,22 +222,24 @@ class CartItem(db.Model):
             'total_price': float(self.total_price)
         }
     
-    def to_dict(self):
-        """Convert cart item to dictionary"""
-        return {
-            'id': str(self.id),
-            'cart_id': str(self.cart_id),
-            'product_id': str(self.product_id),
-            'product_variant_id': str(self.product_variant_id) if self.product_variant_id else None,
-            'quantity': self.quantity,
-            'unit_price': float(self.unit_price),
-            'total_price': float(self.total_price),
-            'selected_variant_name': self.selected_variant_name,
-            'selected_variant_value': self.selected_variant_value,
-            'added_at': self.added_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'is_available': self.is_available(),
-            'price_breakdown': self.get_price_breakdown(),
-            'product': self.product.to_dict() if self.product else None,
-            'product_variant': self.product_variant.to_dict() if self.product_variant else None
-        } 
\ No newline at end of file
+    def to_dict(self, include_product=True):
+        """Convert cart item to dictionary
+        
+        Availability, price breakdown and the variant read the product and
+        variant relationships; load them with the item (see
+        app.utils.loaders.cart_items_query) when serializing many items.
+        """
+        data = cart_item_serializer.dump(self)
+        data['is_available'] = self.is_available()
+        data['price_breakdown'] = self.get_price_breakdown()
+        data['product_variant'] = self.product_variant.to_dict() if self.product_variant else None
+        if include_product:
+            data['product'] = self.product.to_dict() if self.product else None
+        return data
+
+cart_item_serializer = Serializer(
+    Id('id'), Id('cart_id'), Id('product_id'), Id('product_variant_id'), Attr('quantity'),
+    Number('unit_price'), Number('total_price'), Attr('selected_variant_name'), Attr('selected_variant_value'),
+    Timestamp('added_at'), Timestamp('updated_at'),
+    extra=('is_available', 'price_breakdown', 'product_variant', 'product')
+)
@@ -1,13 +1,13 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class Coupon(db.Model):
     """Discount coupons and promotional codes"""
     __tablename__ = 'coupons'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     code = db.Column(db.String(50), unique=True, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -95,8 +95,11 @@ class Coupon(db.Model):
 class CouponUsage(db.Model):
     """Track coupon usage by users"""
     __tablename__ = 'coupon_usages'
+    __table_args__ = (
+        db.Index('ix_coupon_usages_coupon_user', 'coupon_id', 'user_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     coupon_id = db.Column(UUID(as_uuid=True), db.ForeignKey('coupons.id'), nullable=False)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=False)
@@ -0,0 +1,41 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from app.utils.ids import new_uuid
+
+class StockReservation(db.Model):
+    """Stock taken off the shelf for an order, held until payment or expiry"""
+    __tablename__ = 'stock_reservations'
+    
+    HELD = 'held'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
+    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
+    product_variant_id = db.Column(UUID(as_uuid=True), db.ForeignKey('product_variants.id'), nullable=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    
+    # held -> committed (payment received) or held/committed -> released
+    status = db.Column(db.String(20), nullable=False, default=HELD)
+    expires_at = db.Column(db.DateTime, nullable=True)  # None means no payment deadline
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_stock_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'order_id': str(self.order_id),
+            'product_id': str(self.product_id),
+            'product_variant_id': str(self.product_variant_id) if self.product_variant_id else None,
+            'quantity': self.quantity,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
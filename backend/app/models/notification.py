@@ -1,13 +1,16 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class Notification(db.Model):
     """User notifications"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     
     # Notification details
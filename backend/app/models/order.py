@@ -1,7 +1,8 @@
-from app import db
+from app import db, ids
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.serializers import Serializer, Attr, EnumValue, Id, Method, Number, Timestamp
+from app.utils.ids import new_uuid
 from enum import Enum
 
 class OrderStatus(Enum):
@@ -20,8 +21,11 @@ class OrderStatus(Enum):
 class Order(db.Model):
     """Order model for customer purchases"""
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_created', 'user_id', 'created_at'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     order_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     
@@ -56,12 +60,18 @@ class Order(db.Model):
     shipped_at = db.Column(db.DateTime, nullable=True)
     delivered_at = db.Column(db.DateTime, nullable=True)
     cancelled_at = db.Column(db.DateTime, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
     payments = db.relationship('Payment', backref='order', lazy='dynamic')
+    # Plain list of the same items, for eager loading (dynamic relationships can't be)
+    line_items = db.relationship('OrderItem', viewonly=True, order_by='OrderItem.created_at')
+    # Read-only views for loading an order's detail in one statement (see loaders.order_detail_query)
+    payment_records = db.relationship('Payment', viewonly=True, order_by='Payment.created_at')
+    shipping_address = db.relationship('UserAddress', foreign_keys=[shipping_address_id], viewonly=True)
+    billing_address = db.relationship('UserAddress', foreign_keys=[billing_address_id], viewonly=True)
     
     def __init__(self, **kwargs):
         super(Order, self).__init__(**kwargs)
@@ -69,12 +79,12 @@ class Order(db.Model):
             self.order_number = self._generate_order_number()
     
     def _generate_order_number(self):
-        """Generate unique order number"""
-        import random
-        import string
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-        return f"NK{timestamp}{random_suffix}"
+        """Generate unique order number
+        
+        NK plus a Snowflake id in base32: unique across workers and hosts
+        without a database round trip, and sortable by creation time.
+        """
+        return ids.readable('NK')
     
     def get_status_display(self):
         """Get human-readable status"""
@@ -104,47 +114,40 @@ class Order(db.Model):
         """Get total number of items in order"""
         return sum(item.quantity for item in self.items)
     
-    def to_dict(self):
-        """Convert order to dictionary"""
-        return {
-            'id': str(self.id),
-            'order_number': self.order_number,
-            'user_id': str(self.user_id),
-            'status': self.status.value,
-            'status_display': self.get_status_display(),
-            'total_amount': float(self.total_amount),
-            'subtotal': float(self.subtotal),
-            'tax_amount': float(self.tax_amount),
-            'shipping_amount': float(self.shipping_amount),
-            'discount_amount': float(self.discount_amount),
-            'coupon_code': self.coupon_code,
-            'shipping_address_id': str(self.shipping_address_id) if self.shipping_address_id else None,
-            'billing_address_id': str(self.billing_address_id) if self.billing_address_id else None,
-            'shipping_method': self.shipping_method,
-            'tracking_number': self.tracking_number,
-            'estimated_delivery': self.estimated_delivery.isoformat() if self.estimated_delivery else None,
-            'payment_method': self.payment_method,
-            'payment_status': self.payment_status,
-            'transaction_id': self.transaction_id,
-            'customer_notes': self.customer_notes,
-            'admin_notes': self.admin_notes,
-            'placed_at': self.placed_at.isoformat(),
-            'confirmed_at': self.confirmed_at.isoformat() if self.confirmed_at else None,
-            'shipped_at': self.shipped_at.isoformat() if self.shipped_at else None,
-            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None,
-            'cancelled_at': self.cancelled_at.isoformat() if self.cancelled_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'total_items': self.get_total_items(),
-            'can_cancel': self.can_cancel(),
-            'can_return': self.can_return()
-        }
+    def to_dict(self, total_items=None):
+        """Convert order to dictionary
+        
+        Pass total_items when item counts were batch-loaded (see
+        app.utils.loaders.order_item_counts) to skip the per-order items query.
+        """
+        if total_items is None:
+            total_items = self.get_total_items()
+        data = order_serializer.dump(self)
+        data['total_items'] = total_items
+        return data
+
+order_serializer = Serializer(
+    Id('id'), Attr('order_number'), Id('user_id'), EnumValue('status'),
+    Method('status_display', 'get_status_display'),
+    Number('total_amount'), Number('subtotal'), Number('tax_amount'), Number('shipping_amount'),
+    Number('discount_amount'), Attr('coupon_code'), Id('shipping_address_id'), Id('billing_address_id'),
+    Attr('shipping_method'), Attr('tracking_number'), Timestamp('estimated_delivery'),
+    Attr('payment_method'), Attr('payment_status'), Attr('transaction_id'),
+    Attr('customer_notes'), Attr('admin_notes'),
+    Timestamp('placed_at'), Timestamp('confirmed_at'), Timestamp('shipped_at'),
+    Timestamp('delivered_at'), Timestamp('cancelled_at'), Timestamp('created_at'), Timestamp('updated_at'),
+    Method('can_cancel', 'can_cancel'), Method('can_return', 'can_return'),
+    extra=('total_items',)
+)
 
 class OrderItem(db.Model):
     """Individual items in an order"""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=False)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     product_variant_id = db.Column(UUID(as_uuid=True), db.ForeignKey('product_variants.id'), nullable=True)
@@ -173,20 +176,11 @@ class OrderItem(db.Model):
     
     def to_dict(self):
         """Convert order item to dictionary"""
-        return {
-            'id': str(self.id),
-            'order_id': str(self.order_id),
-            'product_id': str(self.product_id),
-            'product_variant_id': str(self.product_variant_id) if self.product_variant_id else None,
-            'product_name': self.product_name,
-            'product_sku': self.product_sku,
-            'quantity': self.quantity,
-            'unit_price': float(self.unit_price),
-            'total_price': float(self.total_price),
-            'material': self.material,
-            'weight': float(self.weight) if self.weight else None,
-            'purity': self.purity,
-            'variant_name': self.variant_name,
-            'variant_value': self.variant_value,
-            'created_at': self.created_at.isoformat()
-        } 
\ No newline at end of file
+        return order_item_serializer.dump(self)
+
+order_item_serializer = Serializer(
+    Id('id'), Id('order_id'), Id('product_id'), Id('product_variant_id'), Attr('product_name'),
+    Attr('product_sku'), Attr('quantity'), Number('unit_price'), Number('total_price'),
+    Attr('material'), Number('weight'), Attr('purity'), Attr('variant_name'), Attr('variant_value'),
+    Timestamp('created_at')
+)
@@ -1,13 +1,13 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class PaymentMethod(db.Model):
     """Available payment methods"""
     __tablename__ = 'payment_methods'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.String(50), nullable=False, unique=True)
     description = db.Column(db.Text, nullable=True)
@@ -35,8 +35,11 @@ class PaymentMethod(db.Model):
 class Payment(db.Model):
     """Payment transactions"""
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_order_id', 'order_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=True)
     
@@ -1,13 +1,14 @@
 from app import db
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from app.utils.serializers import Serializer, Attr, Id, Method, Number, Timestamp
+from app.utils.ids import new_uuid
 
 class Category(db.Model):
     """Product categories like Rings, Earrings, Necklaces, etc."""
     __tablename__ = 'categories'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     name = db.Column(db.String(100), nullable=False, unique=True)
     slug = db.Column(db.String(100), nullable=False, unique=True, index=True)
     description = db.Column(db.Text, nullable=True)
@@ -22,23 +23,18 @@ class Category(db.Model):
     
     def to_dict(self):
         """Convert category to dictionary"""
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'slug': self.slug,
-            'description': self.description,
-            'image': self.image,
-            'is_active': self.is_active,
-            'sort_order': self.sort_order,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return category_serializer.dump(self)
+
+category_serializer = Serializer(
+    Id('id'), Attr('name'), Attr('slug'), Attr('description'), Attr('image'),
+    Attr('is_active'), Attr('sort_order'), Timestamp('created_at'), Timestamp('updated_at')
+)
 
 class Collection(db.Model):
     """Special collections like Festive, Bridal, Officewear"""
     __tablename__ = 'collections'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     name = db.Column(db.String(100), nullable=False, unique=True)
     slug = db.Column(db.String(100), nullable=False, unique=True, index=True)
     description = db.Column(db.Text, nullable=True)
@@ -55,25 +51,24 @@ class Collection(db.Model):
     
     def to_dict(self):
         """Convert collection to dictionary"""
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'slug': self.slug,
-            'description': self.description,
-            'image': self.image,
-            'banner_image': self.banner_image,
-            'is_active': self.is_active,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return collection_serializer.dump(self)
+
+collection_serializer = Serializer(
+    Id('id'), Attr('name'), Attr('slug'), Attr('description'), Attr('image'), Attr('banner_image'),
+    Attr('is_active'), Timestamp('start_date'), Timestamp('end_date'),
+    Timestamp('created_at'), Timestamp('updated_at')
+)
 
 class Product(db.Model):
     """Main product model for jewelry items"""
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_products_active_category_created', 'is_active', 'category_id', 'created_at'),
+        db.Index('ix_products_active_collection_created', 'is_active', 'collection_id', 'created_at'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     name = db.Column(db.String(255), nullable=False)
     slug = db.Column(db.String(255), nullable=False, unique=True, index=True)
     description = db.Column(db.Text, nullable=True)
@@ -103,7 +98,19 @@ class Product(db.Model):
     tags = db.Column(db.JSON, default=[])  # Array of tags
     is_active = db.Column(db.Boolean, default=True)
     is_featured = db.Column(db.Boolean, default=False)
-    sort_order = db.Column(db.Integer, default=0)
+    sort_order = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Rating aggregates over approved reviews, maintained by apply_rating_change
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_1_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_2_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_3_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_4_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_5_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Full-text search document, kept up to date by a database trigger
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite'), nullable=True))
     
     # Relationships
     category_id = db.Column(UUID(as_uuid=True), db.ForeignKey('categories.id'), nullable=False)
@@ -112,7 +119,7 @@ class Product(db.Model):
     variants = db.relationship('ProductVariant', backref='product', lazy='dynamic', cascade='all, delete-orphan')
     reviews = db.relationship('Review', backref='product', lazy='dynamic')
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __init__(self, **kwargs):
@@ -143,6 +150,83 @@ class Product(db.Model):
         """Check if product is low in stock"""
         return self.stock_quantity <= self.low_stock_threshold
     
+    def get_average_rating(self):
+        """Average approved rating rounded to one decimal"""
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    def get_rating_stats(self):
+        """Rating summary read from the materialized aggregates"""
+        return {
+            'average_rating': self.get_average_rating(),
+            'total_reviews': self.rating_count or 0,
+            'rating_distribution': {
+                str(rating): getattr(self, f'rating_{rating}_count') or 0
+                for rating in range(5, 0, -1)
+            }
+        }
+    
+    @classmethod
+    def apply_rating_change(cls, product_id, removed_rating=None, added_rating=None):
+        """Atomically adjust rating aggregates for one approved review change
+        
+        removed_rating is the rating that stops counting (review deleted,
+        unapproved or re-rated) and added_rating the one that starts counting.
+        """
+        deltas = {}
+        for rating, delta in ((removed_rating, -1), (added_rating, 1)):
+            if rating is not None:
+                deltas[rating] = deltas.get(rating, 0) + delta
+        
+        deltas = {rating: delta for rating, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        values = {
+            cls.rating_count: cls.rating_count + sum(deltas.values()),
+            cls.rating_sum: cls.rating_sum + sum(rating * delta for rating, delta in deltas.items())
+        }
+        for rating, delta in deltas.items():
+            column = getattr(cls, f'rating_{rating}_count')
+            values[column] = column + delta
+        
+        db.session.query(cls).filter(cls.id == product_id).update(values, synchronize_session=False)
+    
+    @classmethod
+    def refresh_rating_stats(cls, product_ids=None):
+        """Recompute rating aggregates from the reviews table"""
+        from sqlalchemy import func, case
+        from app.models.review import Review
+        
+        columns = [
+            func.count(Review.id),
+            func.coalesce(func.sum(Review.rating), 0)
+        ] + [
+            func.coalesce(func.sum(case((Review.rating == rating, 1), else_=0)), 0)
+            for rating in range(1, 6)
+        ]
+        query = db.session.query(Review.product_id, *columns).filter(
+            Review.is_approved == True
+        ).group_by(Review.product_id)
+        if product_ids is not None:
+            query = query.filter(Review.product_id.in_(product_ids))
+        stats = {row[0]: row[1:] for row in query.all()}
+        
+        products = cls.query
+        if product_ids is not None:
+            products = products.filter(cls.id.in_(product_ids))
+        
+        updated = 0
+        for product in products:
+            count, total, *histogram = stats.get(product.id, (0, 0, 0, 0, 0, 0, 0))
+            product.rating_count = count
+            product.rating_sum = total
+            for rating, rating_count in zip(range(1, 6), histogram):
+                setattr(product, f'rating_{rating}_count', rating_count)
+            updated += 1
+        return updated
+    
     def get_main_image(self):
         """Get the main product image"""
         main_image = self.images.filter_by(is_primary=True).first()
@@ -152,49 +236,67 @@ class Product(db.Model):
         first_image = self.images.first()
         return first_image.image_url if first_image else None
     
-    def to_dict(self):
-        """Convert product to dictionary"""
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'slug': self.slug,
-            'description': self.description,
-            'short_description': self.short_description,
-            'price': float(self.price),
-            'compare_at_price': float(self.compare_at_price) if self.compare_at_price else None,
-            'cost_price': float(self.cost_price) if self.cost_price else None,
-            'sku': self.sku,
-            'barcode': self.barcode,
-            'material': self.material,
-            'weight': float(self.weight) if self.weight else None,
-            'purity': self.purity,
-            'occasion': self.occasion,
-            'style': self.style,
-            'stock_quantity': self.stock_quantity,
-            'low_stock_threshold': self.low_stock_threshold,
-            'track_quantity': self.track_quantity,
-            'allow_backorder': self.allow_backorder,
-            'meta_title': self.meta_title,
-            'meta_description': self.meta_description,
-            'tags': self.tags,
-            'is_active': self.is_active,
-            'is_featured': self.is_featured,
-            'sort_order': self.sort_order,
-            'category_id': str(self.category_id),
-            'collection_id': str(self.collection_id) if self.collection_id else None,
-            'discount_percentage': self.get_discount_percentage(),
-            'is_in_stock': self.is_in_stock(),
-            'is_low_stock': self.is_low_stock(),
-            'main_image': self.get_main_image(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+    def to_dict(self, include_main_image=True, fields=None):
+        """Convert product to dictionary
+        
+        Pass include_main_image=False when the caller has already loaded the
+        images (see app.utils.loaders) to avoid the per-product image queries.
+        fields is a selection parsed by product_serializer.parse_fields.
+        """
+        data = product_serializer.dump(self, fields)
+        if include_main_image and product_serializer.wants(fields, 'main_image'):
+            data['main_image'] = self.get_main_image()
+        return data
+
+# Keys in extra come from related rows, which the loaders batch-load
+product_serializer = Serializer(
+    Id('id'), Attr('name'), Attr('slug'), Attr('description'), Attr('short_description'),
+    Number('price'), Number('compare_at_price'), Number('cost_price'), Attr('sku'), Attr('barcode'),
+    Attr('material'), Number('weight'), Attr('purity'), Attr('occasion'), Attr('style'),
+    Attr('stock_quantity'), Attr('low_stock_threshold'), Attr('track_quantity'), Attr('allow_backorder'),
+    Attr('meta_title'), Attr('meta_description'), Attr('tags'),
+    Attr('is_active'), Attr('is_featured'), Attr('sort_order'),
+    Id('category_id'), Id('collection_id'),
+    Method('discount_percentage', 'get_discount_percentage', requires=('price', 'compare_at_price')),
+    Method('is_in_stock', 'is_in_stock', requires=('track_quantity', 'stock_quantity')),
+    Method('is_low_stock', 'is_low_stock', requires=('stock_quantity', 'low_stock_threshold')),
+    Method('average_rating', 'get_average_rating', requires=('rating_count', 'rating_sum')),
+    Method('review_count', lambda product: product.rating_count or 0, requires=('rating_count',)),
+    Timestamp('created_at'), Timestamp('updated_at'),
+    extra={
+        'main_image': (), 'images': (), 'variants': (), 'reviews': (), 'related_products': (),
+        'rating_stats': ('rating_count', 'rating_sum') + tuple(f'rating_{rating}_count' for rating in range(1, 6))
+    },
+    projections={
+        # What a product grid tile shows
+        'card': (
+            'name', 'slug', 'price', 'compare_at_price', 'discount_percentage', 'main_image',
+            'average_rating', 'review_count', 'is_in_stock', 'material', 'weight'
+        ),
+        # Storefront product page: everything but internal costs
+        'detail': (
+            'name', 'slug', 'description', 'short_description', 'price', 'compare_at_price', 'sku',
+            'barcode', 'material', 'weight', 'purity', 'occasion', 'style', 'stock_quantity',
+            'low_stock_threshold', 'track_quantity', 'allow_backorder', 'meta_title', 'meta_description',
+            'tags', 'is_active', 'is_featured', 'sort_order', 'category_id', 'collection_id',
+            'discount_percentage', 'is_in_stock', 'is_low_stock', 'average_rating', 'review_count',
+            'created_at', 'updated_at', 'main_image', 'images', 'variants', 'reviews', 'rating_stats',
+            'related_products'
+        ),
+        'admin': None
+    }
+)
+
+PRODUCT_VIEWS = ('card', 'detail')  # Projections the public catalog endpoints accept
 
 class ProductImage(db.Model):
     """Product images with zoom support"""
     __tablename__ = 'product_images'
+    __table_args__ = (
+        db.Index('ix_product_images_product_sort', 'product_id', 'sort_order'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
     alt_text = db.Column(db.String(255), nullable=True)
@@ -204,21 +306,21 @@ class ProductImage(db.Model):
     
     def to_dict(self):
         """Convert image to dictionary"""
-        return {
-            'id': str(self.id),
-            'product_id': str(self.product_id),
-            'image_url': self.image_url,
-            'alt_text': self.alt_text,
-            'is_primary': self.is_primary,
-            'sort_order': self.sort_order,
-            'created_at': self.created_at.isoformat()
-        }
+        return product_image_serializer.dump(self)
+
+product_image_serializer = Serializer(
+    Id('id'), Id('product_id'), Attr('image_url'), Attr('alt_text'),
+    Attr('is_primary'), Attr('sort_order'), Timestamp('created_at')
+)
 
 class ProductVariant(db.Model):
     """Product variants like size, color, metal type"""
     __tablename__ = 'product_variants'
+    __table_args__ = (
+        db.Index('ix_product_variants_product_id', 'product_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)  # e.g., "Size", "Color", "Metal"
     value = db.Column(db.String(100), nullable=False)  # e.g., "18", "Rose Gold", "Yellow Gold"
@@ -231,15 +333,9 @@ class ProductVariant(db.Model):
     
     def to_dict(self):
         """Convert variant to dictionary"""
-        return {
-            'id': str(self.id),
-            'product_id': str(self.product_id),
-            'name': self.name,
-            'value': self.value,
-            'price_adjustment': float(self.price_adjustment),
-            'stock_quantity': self.stock_quantity,
-            'sku': self.sku,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        } 
\ No newline at end of file
+        return product_variant_serializer.dump(self)
+
+product_variant_serializer = Serializer(
+    Id('id'), Id('product_id'), Attr('name'), Attr('value'), Number('price_adjustment'),
+    Attr('stock_quantity'), Attr('sku'), Attr('is_active'), Timestamp('created_at'), Timestamp('updated_at')
+) 
\ No newline at end of file
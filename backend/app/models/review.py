@@ -1,13 +1,18 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.serializers import Serializer, Attr, Id, Timestamp
+from app.utils.ids import new_uuid
 
 class Review(db.Model):
     """Product reviews and ratings"""
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_product_approved_created', 'product_id', 'is_approved', 'created_at'),
+        db.Index('ix_reviews_user_created', 'user_id', 'created_at'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=True)
@@ -23,44 +28,44 @@ class Review(db.Model):
     is_helpful = db.Column(db.Integer, default=0)  # Number of helpful votes
     
     # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     images = db.relationship('ReviewImage', backref='review', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': str(self.id),
-            'user_id': str(self.user_id),
-            'product_id': str(self.product_id),
-            'order_id': str(self.order_id) if self.order_id else None,
-            'rating': self.rating,
-            'title': self.title,
-            'comment': self.comment,
-            'is_verified_purchase': self.is_verified_purchase,
-            'is_approved': self.is_approved,
-            'is_helpful': self.is_helpful,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'images': [img.to_dict() for img in self.images]
-        }
+    def to_dict(self, images=None):
+        """Convert review to dictionary
+        
+        Pass images when they were batch-loaded (see
+        app.utils.loaders.load_reviews) to skip the per-review images query.
+        """
+        if images is None:
+            images = self.images
+        data = review_serializer.dump(self)
+        data['images'] = review_image_serializer.dump_many(images)
+        return data
+
+review_serializer = Serializer(
+    Id('id'), Id('user_id'), Id('product_id'), Id('order_id'), Attr('rating'), Attr('title'),
+    Attr('comment'), Attr('is_verified_purchase'), Attr('is_approved'), Attr('is_helpful'),
+    Timestamp('created_at'), Timestamp('updated_at'),
+    extra=('images',)
+)
 
 class ReviewImage(db.Model):
     """Images attached to reviews"""
     __tablename__ = 'review_images'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     review_id = db.Column(UUID(as_uuid=True), db.ForeignKey('reviews.id'), nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
     alt_text = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'review_id': str(self.review_id),
-            'image_url': self.image_url,
-            'alt_text': self.alt_text,
-            'created_at': self.created_at.isoformat()
-        } 
\ No newline at end of file
+        return review_image_serializer.dump(self)
+
+review_image_serializer = Serializer(
+    Id('id'), Id('review_id'), Attr('image_url'), Attr('alt_text'), Timestamp('created_at')
+)
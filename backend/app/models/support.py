@@ -1,13 +1,13 @@
-from app import db
+from app import db, ids
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class SupportTicket(db.Model):
     """Customer support tickets"""
     __tablename__ = 'support_tickets'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     ticket_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=True)
@@ -37,12 +37,8 @@ class SupportTicket(db.Model):
             self.ticket_number = self._generate_ticket_number()
     
     def _generate_ticket_number(self):
-        """Generate unique ticket number"""
-        import random
-        import string
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-        return f"TKT{timestamp}{random_suffix}"
+        """Generate unique ticket number (TKT plus a Snowflake id, as for orders)"""
+        return ids.readable('TKT')
     
     def to_dict(self):
         return {
@@ -66,7 +62,7 @@ class TicketMessage(db.Model):
     """Messages in support tickets"""
     __tablename__ = 'ticket_messages'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     ticket_id = db.Column(UUID(as_uuid=True), db.ForeignKey('support_tickets.id'), nullable=False)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     
@@ -1,14 +1,13 @@
-from app import db
+from app import db, passwords
 from datetime import datetime
-import bcrypt
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class User(db.Model):
     """User model for authentication and profile management"""
     __tablename__ = 'users'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     phone = db.Column(db.String(15), unique=True, nullable=True, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -44,12 +43,23 @@ class User(db.Model):
         self.role = role
     
     def _hash_password(self, password):
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash password using bcrypt (in the password hashing pool)"""
+        return passwords.hash(password)
+    
+    def set_password(self, password):
+        """Replace the stored password hash"""
+        self.password_hash = self._hash_password(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """Verify password, upgrading the hash when the bcrypt cost has changed
+        
+        The caller commits the session; a rehash only marks the row dirty.
+        """
+        if not passwords.verify(password, self.password_hash):
+            return False
+        if passwords.needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     
     def get_full_name(self):
         """Get user's full name"""
@@ -79,7 +89,7 @@ class UserProfile(db.Model):
     """Extended user profile information"""
     __tablename__ = 'user_profiles'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     date_of_birth = db.Column(db.Date, nullable=True)
     gender = db.Column(db.String(10), nullable=True)  # male, female, other
@@ -108,8 +118,11 @@ class UserProfile(db.Model):
 class UserAddress(db.Model):
     """User address model for delivery and billing"""
     __tablename__ = 'user_addresses'
+    __table_args__ = (
+        db.Index('ix_user_addresses_user_id', 'user_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     address_type = db.Column(db.String(20), default='delivery')  # delivery, billing
     is_default = db.Column(db.Boolean, default=False)
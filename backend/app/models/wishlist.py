@@ -1,13 +1,16 @@
 from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from app.utils.ids import new_uuid
 
 class Wishlist(db.Model):
     """User wishlist model"""
     __tablename__ = 'wishlists'
+    __table_args__ = (
+        db.Index('ix_wishlists_user_id', 'user_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(100), default='My Wishlist')
     is_public = db.Column(db.Boolean, default=False)
@@ -45,8 +48,11 @@ class Wishlist(db.Model):
 class WishlistItem(db.Model):
     """Individual items in wishlist"""
     __tablename__ = 'wishlist_items'
+    __table_args__ = (
+        db.Index('ix_wishlist_items_wishlist_product', 'wishlist_id', 'product_id'),
+    )
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=new_uuid)
     wishlist_id = db.Column(UUID(as_uuid=True), db.ForeignKey('wishlists.id'), nullable=False)
     product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.id'), nullable=False)
     product_variant_id = db.Column(UUID(as_uuid=True), db.ForeignKey('product_variants.id'), nullable=True)
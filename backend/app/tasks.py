@@ -0,0 +1,163 @@
+import os
+import smtplib
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.uploader
+import razorpay
+import razorpay.errors
+import requests
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func, insert, select
+from app import db, cache, jobs, mail
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.product import Product, ProductImage
+from app.models.notification import Notification
+from app.models.user import User
+from app.utils.cache import product_cache_tags
+from app.utils.stock import release_expired_reservations
+
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+@jobs.task(autoretry_for=(smtplib.SMTPException, OSError))
+def send_order_confirmation(order_id):
+    """Email the customer a summary of a newly placed order"""
+    order = db.session.get(Order, order_id)
+    if order is None:
+        return None
+    if not current_app.config.get('MAIL_DEFAULT_SENDER'):
+        current_app.logger.warning(f"MAIL_DEFAULT_SENDER not set; skipping confirmation for {order.order_number}")
+        return None
+
+    lines = [
+        f"{item.quantity} x {item.product_name} - Rs. {float(item.total_price):.2f}"
+        for item in order.items
+    ]
+    body = '\n'.join([
+        f"Hi {order.user.first_name},",
+        '',
+        f"Thank you for your order {order.order_number}.",
+        '',
+        *lines,
+        '',
+        f"Total: Rs. {float(order.total_amount):.2f}",
+        f"Payment method: {order.payment_method}",
+    ])
+    mail.send(Message(
+        subject=f"Your Nakhrali order {order.order_number}",
+        recipients=[order.user.email],
+        body=body
+    ))
+    return order.order_number
+
+
+@jobs.task
+def notify_users(title, message, notification_type='system', user_ids=None, data=None):
+    """Create a Notification for each user, or every active user when user_ids is None"""
+    if user_ids is None:
+        user_ids = db.session.execute(
+            select(User.id).where(User.is_active == True).execution_options(yield_per=NOTIFICATION_BATCH_SIZE)
+        ).scalars()
+
+    created = 0
+    batch = []
+    for user_id in user_ids:
+        batch.append({
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'data': data
+        })
+        if len(batch) >= NOTIFICATION_BATCH_SIZE:
+            db.session.execute(insert(Notification), batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Notification), batch)
+        created += len(batch)
+
+    # One transaction, so a retry never leaves half an audience notified twice
+    db.session.commit()
+    return created
+
+
+@jobs.task(autoretry_for=(cloudinary.exceptions.GeneralError, OSError))
+def process_media_upload(path, product_id=None, alt_text=None, is_primary=False, folder=None):
+    """Upload a staged file to Cloudinary and optionally attach it to a product
+
+    The file is removed from the staging folder once Cloudinary has it.
+    """
+    cloudinary.config(
+        cloud_name=current_app.config.get('CLOUDINARY_CLOUD_NAME'),
+        api_key=current_app.config.get('CLOUDINARY_API_KEY'),
+        api_secret=current_app.config.get('CLOUDINARY_API_SECRET')
+    )
+    upload_result = cloudinary.uploader.upload(path, folder=folder)
+    result = {
+        'secure_url': upload_result.get('secure_url'),
+        'public_id': upload_result.get('public_id'),
+        'width': upload_result.get('width'),
+        'height': upload_result.get('height')
+    }
+
+    if product_id:
+        product = db.session.get(Product, product_id)
+        if product is not None:
+            next_sort = db.session.execute(
+                select(func.coalesce(func.max(ProductImage.sort_order), -1) + 1)
+                .where(ProductImage.product_id == product.id)
+            ).scalar()
+            if is_primary:
+                ProductImage.query.filter_by(product_id=product.id, is_primary=True).update({'is_primary': False})
+            image = ProductImage(
+                product_id=product.id,
+                image_url=result['secure_url'],
+                alt_text=alt_text,
+                is_primary=is_primary,
+                sort_order=next_sort
+            )
+            db.session.add(image)
+            db.session.commit()
+            cache.invalidate(*product_cache_tags(product))
+            result['image'] = image.to_dict()
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return result
+
+
+@jobs.task(autoretry_for=(razorpay.errors.ServerError, razorpay.errors.GatewayError, requests.RequestException))
+def create_gateway_order(payment_id):
+    """Create the Razorpay order for a pending online payment"""
+    payment = db.session.get(Payment, payment_id)
+    if payment is None:
+        return None
+    if payment.gateway_transaction_id:
+        return payment.gateway_response
+
+    client = razorpay.Client(auth=(current_app.config['RAZORPAY_KEY_ID'], current_app.config['RAZORPAY_KEY_SECRET']))
+    razorpay_order = client.order.create({
+        'amount': int((payment.amount * 100).to_integral_value()),  # Razorpay expects amount in paise
+        'currency': payment.currency or 'INR',
+        'receipt': payment.order.order_number if payment.order else str(payment.id),
+        'notes': {'payment_id': str(payment.id)}
+    })
+
+    payment.gateway = 'razorpay'
+    payment.gateway_transaction_id = razorpay_order['id']
+    payment.gateway_response = razorpay_order
+    db.session.commit()
+    return razorpay_order
+
+
+@jobs.task
+def release_expired_holds():
+    """Periodic: release stock held by unpaid orders past their payment deadline"""
+    order_ids = release_expired_reservations()
+    db.session.commit()
+    return len(order_ids)
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+
+
+class SimpleCacheBackend:
+    """In-process cache used when Redis is not configured
+
+    Holds at most max_entries responses, evicting the least recently used
+    first, and sweeps out expired entries at most every sweep_interval
+    seconds. Tag sets only ever hold keys that are still cached.
+    """
+
+    def __init__(self, max_entries=10000, sweep_interval=60):
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _sweep(self, now):
+        for key in [key for key, entry in self._entries.items() if entry[0] < now]:
+            self._discard(key)
+        self._next_sweep = now + self.sweep_interval
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout, tags=()):
+        now = time.time()
+        tags = frozenset(tags)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            self._discard(key)
+            self._entries[key] = (now + timeout, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+
+class RedisCacheBackend:
+    """Redis cache storing each tag as a set of the keys it covers"""
+
+    def __init__(self, url, prefix, tag_timeout):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._tag_timeout = tag_timeout
+
+    def _tag_key(self, tag):
+        return f"{self._prefix}tag:{tag}"
+
+    def get(self, key):
+        return self._client.get(self._prefix + key)
+
+    def set(self, key, value, timeout, tags=()):
+        pipe = self._client.pipeline()
+        pipe.setex(self._prefix + key, timeout, value)
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, self._prefix + key)
+            # Tag sets must outlive every entry they point at
+            pipe.expire(tag_key, max(timeout, self._tag_timeout))
+        pipe.execute()
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = self._client.smembers(tag_key)
+            pipe = self._client.pipeline()
+            if keys:
+                pipe.delete(*keys)
+            pipe.delete(tag_key)
+            pipe.execute()
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self._prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+
+class ResponseCache:
+    """Response cache honoring CACHE_TYPE / CACHE_REDIS_URL"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'simple')
+        redis_url = app.config.get('CACHE_REDIS_URL')
+        prefix = app.config.get('CACHE_KEY_PREFIX', 'nakhrali:')
+        tag_timeout = app.config.get('CACHE_TAG_TIMEOUT', 86400)
+
+        if cache_type == 'redis' and redis_url:
+            self.backend = RedisCacheBackend(redis_url, prefix, tag_timeout)
+        elif cache_type == 'null':
+            self.backend = None
+        else:
+            self.backend = SimpleCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 10000))
+
+        app.extensions['response_cache'] = self
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            current_app.logger.warning(f"Cache get failed for {key}: {str(e)}")
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, timeout, tags=()):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, json.dumps(value), timeout, tags)
+        except Exception as e:
+            current_app.logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    def invalidate(self, *tags):
+        """Evict every cached response carrying any of the given tags"""
+        if self.backend is None or not tags:
+            return
+        try:
+            self.backend.invalidate_tags(set(tags))
+        except Exception as e:
+            current_app.logger.warning(f"Cache invalidation failed for {tags}: {str(e)}")
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+# Query parameters whose mere presence changes the response, even when empty
+# (?cursor= asks for the first keyset page instead of an offset page)
+KEY_PRESENCE_ARGS = frozenset({'cursor'})
+
+
+def make_cache_key():
+    """Build a cache key from the request path and normalized query string"""
+    args = sorted(
+        (key, value)
+        for key in request.args
+        for value in request.args.getlist(key)
+        if value != '' or key in KEY_PRESENCE_ARGS
+    )
+    query_string = urlencode(args)
+    return f"resp:{request.path}?{query_string}" if query_string else f"resp:{request.path}"
+
+
+def add_cache_tags(*tags):
+    """Attach invalidation tags to the response being cached for this request"""
+    if 'cache_tags' not in g:
+        g.cache_tags = set()
+    g.cache_tags.update(str(tag) for tag in tags if tag)
+
+
+def listing_cache_tags(category_id=None, collection_id=None):
+    """Tags for a product listing scoped by the given filters"""
+    tags = []
+    if category_id:
+        tags.append(f"category:{category_id}")
+    if collection_id:
+        tags.append(f"collection:{collection_id}")
+    if not tags:
+        tags.append('listing:all')
+    return tags
+
+
+def product_cache_tags(product, previous_category_id=None, previous_collection_id=None):
+    """Tags to evict when a product is created, changed or removed"""
+    tags = {f"product:{product.id}", 'listing:all'}
+    for category_id in (product.category_id, previous_category_id):
+        if category_id:
+            tags.add(f"category:{category_id}")
+    for collection_id in (product.collection_id, previous_collection_id):
+        if collection_id:
+            tags.add(f"collection:{collection_id}")
+    return tags
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper edges, in milliseconds, of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolWaitStats:
+    """Histogram of how long checkouts waited for a connection, per process"""
+
+    def __init__(self, buckets=WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum_ms = 0.0
+            self._max_ms = 0.0
+            self._timeouts = 0
+
+    def observe(self, wait_ms, timed_out=False):
+        with self._lock:
+            index = next((i for i, edge in enumerate(self.buckets) if wait_ms <= edge), len(self.buckets))
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += wait_ms
+            self._max_ms = max(self._max_ms, wait_ms)
+            if timed_out:
+                self._timeouts += 1
+
+    def snapshot(self):
+        """Cumulative bucket counts by upper edge, as Prometheus reports them"""
+        with self._lock:
+            cumulative = 0
+            buckets = []
+            for edge, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets.append({'le': edge, 'count': cumulative})
+            buckets.append({'le': '+Inf', 'count': self._count})
+            return {
+                'buckets_ms': buckets,
+                'count': self._count,
+                'sum_ms': round(self._sum_ms, 3),
+                'max_ms': round(self._max_ms, 3),
+                'timeouts': self._timeouts
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited
+
+    The wait covers queueing behind other threads and, when the pool is
+    below its size, opening the new connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.observe((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.wait_stats.observe((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def pool_status(engine):
+    """Occupancy and checkout waits of an engine's pool in this worker process"""
+    pool = engine.pool
+    status = {'pid': os.getpid(), 'pool_class': type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        size = pool.size()
+        max_overflow = pool._max_overflow
+        checked_out = pool.checkedout()
+        status.update({
+            'size': size,
+            'max_overflow': max_overflow,
+            'timeout': pool.timeout(),
+            'checked_in': pool.checkedin(),
+            'checked_out': checked_out,
+            # Negative while the pool has not opened all of its base connections yet
+            'overflow': pool.overflow(),
+            'capacity': size + max_overflow if max_overflow >= 0 else None,
+            'saturated': max_overflow >= 0 and checked_out >= size + max_overflow
+        })
+
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats is not None:
+        status['checkout_wait'] = wait_stats.snapshot()
+    return status
@@ -1,17 +1,15 @@
+import hmac
 from functools import wraps
-from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from app.models.user import User
+from flask import current_app, jsonify, request, g, make_response
+from app.utils.principal import current_principal
 
 def admin_required(fn):
     """Decorator to require admin role"""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_principal()
         
-        if not user or not user.is_admin():
+        if not user or not user.is_active or not user.is_admin():
             return jsonify({'error': 'Admin access required'}), 403
         
         return fn(*args, **kwargs)
@@ -21,25 +19,43 @@ def superadmin_required(fn):
     """Decorator to require superadmin role"""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_principal()
         
-        if not user or user.role != 'superadmin':
+        if not user or not user.is_active or user.role != 'superadmin':
             return jsonify({'error': 'Superadmin access required'}), 403
         
         return fn(*args, **kwargs)
     return wrapper
 
+def metrics_token_required(fn):
+    """Decorator to require the METRICS_TOKEN bearer token
+
+    For operational endpoints that scrapers call without a user session.
+    Without a configured token they are only open in debug mode.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        
+        if not token:
+            if current_app.debug:
+                return fn(*args, **kwargs)
+            return jsonify({'error': 'METRICS_TOKEN is not configured'}), 403
+        
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+            return jsonify({'error': 'Invalid metrics token'}), 401
+        
+        return fn(*args, **kwargs)
+    return wrapper
+
 def verified_user_required(fn):
     """Decorator to require verified user"""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_principal()
         
-        if not user or not user.is_verified:
+        if not user or not user.is_active or not user.is_verified:
             return jsonify({'error': 'Email verification required'}), 403
         
         return fn(*args, **kwargs)
@@ -82,7 +98,12 @@ def validate_json(*required_fields):
     return decorator
 
 def paginate_response(fn):
-    """Decorator to handle pagination"""
+    """Decorator to handle pagination
+    
+    Passing ?cursor= (empty for the first page) switches the view to keyset
+    pagination; the view receives the raw cursor string, or None for
+    page/offset mode.
+    """
     @wraps(fn)
     def wrapper(*args, **kwargs):
         page = request.args.get('page', 1, type=int)
@@ -94,17 +115,45 @@ def paginate_response(fn):
         
         kwargs['page'] = page
         kwargs['per_page'] = per_page
+        kwargs['cursor'] = request.args.get('cursor')
         
         return fn(*args, **kwargs)
     return wrapper
 
-def cache_response(timeout=300):
-    """Decorator to cache response (placeholder for Redis implementation)"""
+def cache_response(timeout=300, tags=()):
+    """Decorator to cache JSON responses keyed on path and normalized query string"""
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            # In a real implementation, you'd check Redis cache here
-            # For now, we'll just call the function
-            return fn(*args, **kwargs)
+            from flask import current_app
+            from app import cache
+            from app.utils.cache import make_cache_key
+            
+            if request.method != 'GET':
+                return fn(*args, **kwargs)
+            
+            key = make_cache_key()
+            cached = cache.get(key)
+            if cached is not None:
+                response = current_app.response_class(
+                    cached['body'],
+                    status=cached['status'],
+                    mimetype='application/json'
+                )
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            
+            response = make_response(fn(*args, **kwargs))
+            
+            # Only successful JSON bodies are cached; errors always go to the view
+            if response.status_code == 200 and response.is_json:
+                cache_tags = set(tags) | g.pop('cache_tags', set())
+                cache.set(key, {
+                    'status': response.status_code,
+                    'body': response.get_data(as_text=True)
+                }, timeout, cache_tags)
+            
+            response.headers['X-Cache'] = 'MISS'
+            return response
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
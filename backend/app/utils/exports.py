@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from app import db
+from app.utils.loaders import order_item_counts
+
+ORDER_EXPORT_COLUMNS = [
+    'order_number', 'status', 'payment_method', 'payment_status', 'total_items',
+    'subtotal', 'tax_amount', 'shipping_amount', 'discount_amount', 'total_amount',
+    'coupon_code', 'shipping_method', 'tracking_number', 'user_id', 'id',
+    'placed_at', 'shipped_at', 'delivered_at', 'cancelled_at', 'created_at'
+]
+
+
+def iter_order_chunks(query, chunk_size=500):
+    """Yield (orders, item_counts) chunk by chunk from a server-side cursor
+
+    yield_per streams rows instead of buffering the whole result, and item
+    counts are fetched with one grouped query per chunk, so memory depends
+    on chunk_size rather than on the number of orders.
+    """
+    statement = query.statement.execution_options(yield_per=chunk_size)
+    result = db.session.execute(statement).scalars()
+    for orders in result.partitions(chunk_size):
+        yield orders, order_item_counts([order.id for order in orders])
+
+
+def stream_orders_ndjson(query, chunk_size=500):
+    """One JSON order per line"""
+    for orders, counts in iter_order_chunks(query, chunk_size):
+        yield ''.join(
+            json.dumps(order.to_dict(total_items=counts.get(order.id, 0))) + '\n'
+            for order in orders
+        )
+
+
+def stream_orders_csv(query, chunk_size=500):
+    """Header row, then one CSV row per order"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ORDER_EXPORT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for orders, counts in iter_order_chunks(query, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for order in orders:
+            writer.writerow(order.to_dict(total_items=counts.get(order.id, 0)))
+        yield buffer.getvalue()
@@ -0,0 +1,101 @@
+import uuid
+from sqlalchemy import String, case, cast, func, literal, select, union_all
+from app import db
+from app.models.product import Product
+
+FACET_COLUMNS = ['material', 'occasion', 'style', 'category_id', 'collection_id']
+UUID_FACETS = {'category_id', 'collection_id'}
+
+
+def _price_bucket_expression(price, edges):
+    """Index of the first bucket whose upper edge is above the price"""
+    return case(
+        *[(price < edge, index) for index, edge in enumerate(edges)],
+        else_=len(edges)
+    )
+
+
+def _format_facet_value(facet, value):
+    if facet in UUID_FACETS:
+        return str(uuid.UUID(value))
+    return value
+
+
+def count_product_facets(query, price_edges):
+    """Count facet values, price buckets and price range for a product query
+
+    Every grouped count is combined with UNION ALL so the whole filter panel
+    is computed in one statement against the filtered set.
+
+    Returns (facets, price_buckets, price_range, total).
+    """
+    filtered = query.order_by(None).with_entities(
+        Product.material,
+        Product.occasion,
+        Product.style,
+        Product.category_id,
+        Product.collection_id,
+        Product.price
+    ).subquery()
+
+    selects = []
+    for facet in FACET_COLUMNS:
+        column = filtered.c[facet]
+        selects.append(
+            select(
+                literal(facet).label('facet'),
+                cast(column, String).label('value'),
+                func.count().label('count')
+            ).where(column.isnot(None)).group_by(column)
+        )
+
+    bucket = _price_bucket_expression(filtered.c.price, price_edges)
+    selects.append(
+        select(
+            literal('price_bucket').label('facet'),
+            cast(bucket, String).label('value'),
+            func.count().label('count')
+        ).group_by(bucket)
+    )
+
+    # Min and max ride along as values of single rows carrying the total count
+    selects.append(
+        select(
+            literal('price_min').label('facet'),
+            cast(func.min(filtered.c.price), String).label('value'),
+            func.count().label('count')
+        )
+    )
+    selects.append(
+        select(
+            literal('price_max').label('facet'),
+            cast(func.max(filtered.c.price), String).label('value'),
+            func.count().label('count')
+        )
+    )
+
+    facets = {facet: [] for facet in FACET_COLUMNS}
+    bucket_counts = {}
+    price_range = {'min': None, 'max': None}
+    total = 0
+
+    for facet, value, count in db.session.execute(union_all(*selects)):
+        if facet in facets:
+            facets[facet].append({'value': _format_facet_value(facet, value), 'count': count})
+        elif facet == 'price_bucket':
+            bucket_counts[int(value)] = count
+        else:
+            price_range[facet[len('price_'):]] = float(value) if value is not None else None
+            total = count
+
+    for values in facets.values():
+        values.sort(key=lambda item: (-item['count'], str(item['value'])))
+
+    lower_edges = [0] + list(price_edges)
+    upper_edges = list(price_edges) + [None]
+    price_buckets = [
+        {'min': lower, 'max': upper, 'count': bucket_counts.get(index, 0)}
+        for index, (lower, upper) in enumerate(zip(lower_edges, upper_edges))
+    ]
+
+    return facets, price_buckets, price_range, total
@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+import uuid
+
+# Snowflake layout: 41 bits of milliseconds since EPOCH_MS, 10 bits of
+# worker id, 12 bits of per-millisecond sequence
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32: no I, L, O or U, so numbers read back over the phone
+BASE32_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BASE32_WIDTH = 13  # 63 bits; fixed width keeps string order equal to time order
+
+
+def encode_base32(value, width=BASE32_WIDTH):
+    """Fixed-width Crockford base32 for a non-negative integer"""
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(BASE32_ALPHABET[digit])
+    if value:
+        raise ValueError('Value does not fit in the requested width')
+    return ''.join(reversed(chars))
+
+
+def decode_base32(text):
+    """Inverse of encode_base32"""
+    value = 0
+    for char in text.upper():
+        value = value * 32 + BASE32_ALPHABET.index(char)
+    return value
+
+
+def id_timestamp(snowflake):
+    """Creation time of a Snowflake id, in Unix milliseconds"""
+    return (snowflake >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+
+
+class UUID7Generator:
+    """Time-ordered UUIDs (RFC 9562 version 7)
+
+    48 bits of Unix milliseconds lead the value, so new keys land at the
+    right edge of a B-tree index instead of a random page. The 12-bit
+    rand_a field is a counter within the millisecond (RFC 9562 method 1),
+    so values from one process are strictly increasing; the remaining 62
+    bits are random.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._counter = 0
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+        with self._lock:
+            now = time.time_ns() // 1_000_000
+            if now > self._last_ms:
+                self._last_ms = now
+                # Start low in the counter space so a burst has room to count up
+                self._counter = rand_b >> 53
+            else:
+                self._counter += 1
+                if self._counter > 0xFFF:
+                    self._last_ms += 1
+                    self._counter = 0
+            unix_ms, counter = self._last_ms, self._counter
+        value = (unix_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b
+        return uuid.UUID(int=value)
+
+
+uuid7 = UUID7Generator()
+
+_uuid_factory = uuid7
+
+
+def set_uuid_factory(factory):
+    """Choose the function new_uuid() calls, e.g. uuid7 or uuid.uuid4"""
+    global _uuid_factory
+    _uuid_factory = factory
+
+
+def new_uuid():
+    """Primary key default for every model; see set_uuid_factory"""
+    return _uuid_factory()
+
+
+class RedisWorkerLease:
+    """A worker id leased from Redis so no two live processes share one
+
+    The lease is a key per worker id set with NX and a TTL. It is renewed
+    once half the TTL has passed, and the id is never used past the
+    moment the lease could have expired from this process's point of view.
+    """
+
+    def __init__(self, url, prefix, ttl):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = f"{prefix}idworker:"
+        self.ttl = ttl
+        self.worker_id = None
+        self.expires_at = 0
+
+    def reset(self):
+        self.worker_id = None
+        self.expires_at = 0
+
+    def current(self):
+        """Worker id to use now, renewing or re-acquiring the lease as needed"""
+        now = time.monotonic()
+        if self.worker_id is None or now >= self.expires_at:
+            return self._acquire(now)
+        if now > self.expires_at - self.ttl / 2:
+            self._renew(now)
+            if self.worker_id is None:
+                return self._acquire(now)
+        return self.worker_id
+
+    def _acquire(self, now):
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        start = self._client.incr(f"{self._prefix}next")
+        for offset in range(MAX_WORKER_ID + 1):
+            worker_id = (start + offset) & MAX_WORKER_ID
+            if self._client.set(f"{self._prefix}{worker_id}", owner, nx=True, ex=self.ttl):
+                self.worker_id = worker_id
+                self.expires_at = now + self.ttl
+                return worker_id
+        raise RuntimeError('Every ID worker id is leased; raise WORKER_BITS or lower ID_WORKER_LEASE_SECONDS')
+
+    def _renew(self, now):
+        try:
+            renewed = self._client.expire(f"{self._prefix}{self.worker_id}", self.ttl)
+        except Exception:
+            # Keep using the id until the current lease runs out; the next call retries
+            return
+        if renewed:
+            self.expires_at = now + self.ttl
+        else:
+            # The key is gone (Redis restarted or flushed): take a fresh id
+            self.reset()
+
+
+class IdGenerator:
+    """Snowflake-style ids, unique across processes and hosts and ordered by time
+
+    Each id packs the millisecond, this process's worker id and a
+    per-millisecond sequence, so ids from one process never repeat and ids
+    from different processes cannot collide as long as their worker ids
+    differ. Worker ids come from ID_WORKER_ID (one process per value), or
+    are leased from Redis when ID_REDIS_URL is set; otherwise the process
+    id is used, which is only safe on a single host.
+
+    Generation never blocks: if the clock goes backwards or the sequence
+    runs out within a millisecond, the id borrows the next millisecond.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._worker_id = None
+        self._lease = None
+        self._last_ms = -1
+        self._sequence = 0
+        # A forked gunicorn worker must not reuse the master's worker id or sequence
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        worker_id = app.config.get('ID_WORKER_ID')
+        redis_url = app.config.get('ID_REDIS_URL')
+        self._worker_id = None
+        self._lease = None
+
+        if worker_id not in (None, ''):
+            worker_id = int(worker_id)
+            if not 0 <= worker_id <= MAX_WORKER_ID:
+                raise ValueError(f'ID_WORKER_ID must be between 0 and {MAX_WORKER_ID}')
+            self._worker_id = worker_id
+        elif redis_url:
+            self._lease = RedisWorkerLease(
+                redis_url,
+                app.config.get('CACHE_KEY_PREFIX', 'nakhrali:'),
+                app.config.get('ID_WORKER_LEASE_SECONDS', 300)
+            )
+        elif not (app.debug or app.testing):
+            app.logger.warning('Neither ID_WORKER_ID nor ID_REDIS_URL is set; order numbers are only unique on this host')
+
+        # Existing v4 keys stay valid; the version only affects new rows
+        set_uuid_factory(uuid7 if str(app.config.get('PRIMARY_KEY_UUID_VERSION', 7)) == '7' else uuid.uuid4)
+        app.extensions['ids'] = self
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        if self._lease is not None:
+            self._lease.reset()
+
+    def worker_id(self):
+        if self._worker_id is not None:
+            return self._worker_id
+        if self._lease is not None:
+            return self._lease.current()
+        return os.getpid() & MAX_WORKER_ID
+
+    def next_id(self):
+        """A new 63-bit id"""
+        with self._lock:
+            worker_id = self.worker_id()
+            now = int(time.time() * 1000)
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (
+                ((self._last_ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS))
+                | (worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def readable(self, prefix):
+        """A new id as prefix + 13 base32 characters, e.g. NK0DQ5M3K7ZC04"""
+        return f"{prefix}{encode_base32(self.next_id())}"
@@ -0,0 +1,213 @@
+import threading
+import time
+
+from celery import Celery, Task
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class MemoryIdempotencyStore:
+    """In-process idempotency markers used when Redis is not configured"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.time():
+            del self._entries[key]
+            return None
+        return entry
+
+    def claim(self, key, owner, timeout):
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None and entry[1] != owner:
+                return False
+            self._entries[key] = (time.time() + timeout, owner)
+            return True
+
+    def complete(self, key, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, JobQueue.DONE)
+
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """Idempotency markers shared by every worker through Redis"""
+
+    def __init__(self, url, prefix):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = f"{prefix}job:"
+
+    def claim(self, key, owner, timeout):
+        key = self._prefix + key
+        if self._client.set(key, owner, nx=True, ex=timeout):
+            return True
+        # A retry of the same task may re-enter its own claim
+        current = self._client.get(key)
+        return current is not None and current.decode('utf-8') == owner
+
+    def complete(self, key, ttl):
+        self._client.set(self._prefix + key, JobQueue.DONE, ex=ttl)
+
+    def release(self, key):
+        self._client.delete(self._prefix + key)
+
+
+def _idempotency_key(request):
+    # Eager runs keep custom headers under request.headers; worker runs flatten them onto the request
+    return request.get('idempotency_key') or (request.headers or {}).get('idempotency_key')
+
+
+class FlaskTask(Task):
+    """Celery task that runs inside an app context and honours idempotency keys
+
+    Callers send idempotency_key as a message header (see JobQueue.enqueue).
+    The first run to claim a key does the work; once it succeeds, later runs
+    with the same key are skipped, so a redelivered message or a
+    double-submitted request cannot send a second email or create a second
+    gateway order. A failed run gives the key back so its retry can claim it.
+    """
+    max_retries = 5
+    retry_backoff = True
+    retry_backoff_max = 600
+    retry_jitter = True
+
+    def __call__(self, *args, **kwargs):
+        queue = self.app.job_queue
+        idempotency_key = _idempotency_key(self.request)
+
+        with queue.flask_app.app_context():
+            if idempotency_key is None:
+                return self.run(*args, **kwargs)
+
+            owner = self.request.id or 'inline'
+            if not queue.store.claim(idempotency_key, owner, queue.lock_timeout):
+                current_app.logger.info(f"Skipping {self.name}: {idempotency_key} already handled")
+                return None
+
+            try:
+                result = self.run(*args, **kwargs)
+            except BaseException:
+                queue.store.release(idempotency_key)
+                raise
+
+            queue.store.complete(idempotency_key, queue.idempotency_ttl)
+            return result
+
+    def signature_from_request(self, request=None, *args, **kwargs):
+        # Retries are sent from the request; carry the key over with them
+        signature = super().signature_from_request(request, *args, **kwargs)
+        idempotency_key = _idempotency_key(request or self.request)
+        if idempotency_key is not None:
+            headers = dict(signature.options.get('headers') or {})
+            headers['idempotency_key'] = idempotency_key
+            signature.set(headers=headers)
+        return signature
+
+
+class JobQueue:
+    """Celery bound to the app factory
+
+    Tasks are declared with @jobs.task before any app exists and pick up
+    broker and retry settings in init_app. With JOBS_ALWAYS_EAGER (testing,
+    and development without a broker) tasks run inline in the calling
+    process, so the same code paths work without Redis or a worker.
+    Otherwise CELERY_BROKER_URL is required, so a misconfigured deployment
+    fails at startup instead of sending email and gateway calls inline.
+    """
+    DONE = 'done'
+
+    def __init__(self, app=None):
+        self.celery = Celery('nakhrali', task_cls=FlaskTask, set_as_current=False)
+        self.celery.job_queue = self
+        self.flask_app = None
+        self.store = MemoryIdempotencyStore()
+        self.eager = True
+        self.lock_timeout = 600
+        self.idempotency_ttl = 7 * 86400
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        broker_url = app.config.get('CELERY_BROKER_URL')
+        self.eager = app.config.get('JOBS_ALWAYS_EAGER', False)
+        if not broker_url:
+            if not self.eager:
+                raise RuntimeError('CELERY_BROKER_URL (or REDIS_URL) must be set unless JOBS_ALWAYS_EAGER is on')
+            broker_url = 'memory://'
+        self.lock_timeout = app.config.get('JOBS_LOCK_TIMEOUT', 600)
+        self.idempotency_ttl = app.config.get('JOBS_IDEMPOTENCY_TTL', 7 * 86400)
+
+        self.celery.conf.update(
+            broker_url=broker_url,
+            result_backend=app.config.get('CELERY_RESULT_BACKEND'),
+            task_always_eager=self.eager,
+            task_eager_propagates=True,
+            task_acks_late=True,
+            task_reject_on_worker_lost=True,
+            worker_prefetch_multiplier=1,
+            task_serializer='json',
+            result_serializer='json',
+            accept_content=['json'],
+            result_expires=app.config.get('JOBS_RESULT_EXPIRES', 86400),
+            include=['app.tasks'],
+            beat_schedule={
+                'release-expired-holds': {
+                    'task': 'app.tasks.release_expired_holds',
+                    'schedule': app.config.get('STOCK_HOLD_SWEEP_SECONDS', 60),
+                },
+            },
+        )
+
+        if broker_url.startswith(('redis://', 'rediss://')):
+            self.store = RedisIdempotencyStore(broker_url, app.config.get('CACHE_KEY_PREFIX', 'nakhrali:'))
+        else:
+            self.store = MemoryIdempotencyStore()
+
+        self.flask_app = app
+        app.extensions['job_queue'] = self
+
+    def task(self, *args, **kwargs):
+        """Declare a task; same arguments as Celery.task"""
+        return self.celery.task(*args, **kwargs)
+
+    def enqueue(self, task, *args, idempotency_key=None, **kwargs):
+        """Send a task now and return its AsyncResult"""
+        headers = {'idempotency_key': idempotency_key} if idempotency_key is not None else None
+        return task.apply_async(args=args, kwargs=kwargs, headers=headers)
+
+    def defer(self, task, *args, idempotency_key=None, **kwargs):
+        """Send a task once the current transaction commits
+
+        Workers then never see an order or payment that is not committed
+        yet, and nothing is sent for a request that rolls back.
+        """
+        from app import db
+        db.session.info.setdefault('pending_jobs', []).append((task, args, idempotency_key, kwargs))
+
+    def _send_pending(self, session):
+        for task, args, idempotency_key, kwargs in session.info.pop('pending_jobs', ()):
+            try:
+                self.enqueue(task, *args, idempotency_key=idempotency_key, **kwargs)
+            except Exception as e:
+                # The transaction is already committed; a lost job must not fail the request
+                current_app.logger.error(f"Enqueue {task.name} error: {str(e)}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _send_jobs_after_commit(session):
+    if session.info.get('pending_jobs'):
+        current_app.extensions['job_queue']._send_pending(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_jobs(session):
+    session.info.pop('pending_jobs', None)
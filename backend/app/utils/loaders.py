@@ -0,0 +1,210 @@
+from collections import defaultdict
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.cart import CartItem
+from app.models.order import Order, OrderItem, order_item_serializer
+from app.models.product import (
+    ProductImage, ProductVariant, product_image_serializer, product_serializer, product_variant_serializer
+)
+from app.models.review import ReviewImage
+
+
+def pick_main_image(images):
+    """Primary image if one is flagged, otherwise the first by sort order"""
+    for image in images:
+        if image.is_primary:
+            return image.image_url
+    return images[0].image_url if images else None
+
+
+def load_product_listing(products, include_images=True, include_variants=True, fields=None):
+    """Serialize a page of products using a constant number of queries
+
+    Images and active variants are fetched for the whole page at once and
+    assembled in Python, so the query count does not grow with the number of
+    products. Ratings come from the aggregates stored on the product row.
+    fields is a selection from product_serializer.parse_fields; images and
+    variants that are not selected are not queried at all.
+    """
+    if not products:
+        return []
+
+    include_main_image = product_serializer.wants(fields, 'main_image')
+    include_images = include_images and product_serializer.wants(fields, 'images')
+    include_variants = include_variants and product_serializer.wants(fields, 'variants')
+    product_ids = [product.id for product in products]
+
+    # One images query serves both the main image and the image list
+    images_by_product = defaultdict(list)
+    if include_main_image or include_images:
+        images = ProductImage.query.filter(
+            ProductImage.product_id.in_(product_ids)
+        ).order_by(ProductImage.product_id, ProductImage.sort_order).all()
+        for image in images:
+            images_by_product[image.product_id].append(image)
+
+    variants_by_product = defaultdict(list)
+    if include_variants:
+        variants = ProductVariant.query.filter(
+            ProductVariant.product_id.in_(product_ids),
+            ProductVariant.is_active == True
+        ).all()
+        for variant in variants:
+            variants_by_product[variant.product_id].append(variant)
+
+    encode = product_serializer.encoder(fields)
+    encode_image = product_image_serializer.encoder()
+    encode_variant = product_variant_serializer.encoder()
+    product_data = []
+    for product in products:
+        product_images = images_by_product[product.id]
+        product_dict = encode(product)
+
+        if include_main_image:
+            product_dict['main_image'] = pick_main_image(product_images)
+
+        if include_images:
+            product_dict['images'] = [encode_image(image) for image in product_images]
+
+        if include_variants:
+            product_dict['variants'] = [encode_variant(variant) for variant in variants_by_product[product.id]]
+
+        product_data.append(product_dict)
+
+    return product_data
+
+
+def load_reviews(reviews):
+    """Serialize reviews with their images from a single images query"""
+    if not reviews:
+        return []
+
+    images_by_review = defaultdict(list)
+    images = ReviewImage.query.filter(
+        ReviewImage.review_id.in_([review.id for review in reviews])
+    ).order_by(ReviewImage.created_at).all()
+    for image in images:
+        images_by_review[image.review_id].append(image)
+
+    return [review.to_dict(images=images_by_review[review.id]) for review in reviews]
+
+
+def main_image_subquery(product_id_column):
+    """Correlated scalar subquery for a product's main image URL
+
+    Same choice as pick_main_image: the primary image, else the first by
+    sort order.
+    """
+    return select(ProductImage.image_url).where(
+        ProductImage.product_id == product_id_column
+    ).order_by(
+        desc(ProductImage.is_primary), ProductImage.sort_order
+    ).limit(1).correlate_except(ProductImage).scalar_subquery()
+
+
+def cart_items_query(cart_id):
+    """Cart items with their product and variant joined in"""
+    return CartItem.query.filter(CartItem.cart_id == cart_id).options(
+        joinedload(CartItem.product),
+        joinedload(CartItem.product_variant)
+    ).order_by(CartItem.added_at)
+
+
+def load_cart(cart):
+    """Serialize a cart, its items and totals from a single items query
+
+    Products, variants and main images come back with the items, and the
+    totals, weight and item count are accumulated in the same pass that
+    serializes them. Returns (cart_dict, item_dicts, totals).
+    """
+    rows = cart_items_query(cart.id).add_columns(
+        main_image_subquery(CartItem.product_id).label('main_image')
+    ).all()
+
+    subtotal = 0
+    total_items = 0
+    total_weight = 0
+    item_data = []
+    encode_product = product_serializer.encoder()
+    for item, main_image in rows:
+        product = item.product
+        subtotal += item.total_price
+        total_items += item.quantity
+        if product and product.weight:
+            total_weight += float(product.weight) * item.quantity
+
+        item_dict = item.to_dict(include_product=False)
+        product_dict = None
+        if product:
+            product_dict = encode_product(product)
+            product_dict['main_image'] = main_image
+        item_dict['product'] = product_dict
+        item_data.append(item_dict)
+
+    totals = cart.calculate_totals(subtotal=subtotal)
+    cart_dict = cart.to_dict(total_items=total_items, total_weight=total_weight)
+    return cart_dict, item_data, totals
+
+
+def order_item_counts(order_ids):
+    """Total item quantity per order id, in one grouped query"""
+    if not order_ids:
+        return {}
+    rows = db.session.query(
+        OrderItem.order_id, func.coalesce(func.sum(OrderItem.quantity), 0)
+    ).filter(
+        OrderItem.order_id.in_(order_ids)
+    ).group_by(OrderItem.order_id).all()
+    return {order_id: int(count) for order_id, count in rows}
+
+
+def load_orders(orders, include_items=True):
+    """Serialize a page of orders with a fixed number of queries
+
+    With include_items, load the page with selectinload(Order.line_items)
+    so every order's items arrive in one extra query; item counts are then
+    summed from them. Without, counts come from one grouped query.
+    """
+    if not include_items:
+        counts = order_item_counts([order.id for order in orders])
+        return [order.to_dict(total_items=counts.get(order.id, 0)) for order in orders]
+
+    encode_item = order_item_serializer.encoder()
+    order_data = []
+    for order in orders:
+        items = order.line_items
+        order_dict = order.to_dict(total_items=sum(item.quantity for item in items))
+        order_dict['items'] = [encode_item(item) for item in items]
+        order_data.append(order_dict)
+    return order_data
+
+
+def order_detail_query():
+    """Orders with items, both addresses and payments joined into one statement
+
+    An order has a handful of items and usually one payment, so the
+    items x payments rows this joins stay small.
+    """
+    return Order.query.options(
+        joinedload(Order.line_items),
+        joinedload(Order.payment_records),
+        joinedload(Order.shipping_address),
+        joinedload(Order.billing_address)
+    )
+
+
+def load_order_detail(order):
+    """Serialize an order from order_detail_query() with no further queries"""
+    items = order.line_items
+    order_dict = order.to_dict(total_items=sum(item.quantity for item in items))
+    order_dict['items'] = order_item_serializer.dump_many(items)
+
+    if order.shipping_address_id:
+        order_dict['shipping_address'] = order.shipping_address.to_dict() if order.shipping_address else None
+
+    if order.billing_address_id:
+        order_dict['billing_address'] = order.billing_address.to_dict() if order.billing_address else None
+    
+    order_dict['payments'] = [payment.to_dict() for payment in order.payment_records]
+    return order_dict
@@ -0,0 +1,143 @@
+import os
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Metrics:
+    """Prometheus metrics for requests, database work and the response cache
+
+    Every request records its latency, status, payload sizes, the number of
+    SQL statements it ran and their total time, and whether a cached view
+    was a hit or miss (from the X-Cache header). Labels stay low-cardinality:
+    blueprint and endpoint name, never the URL.
+
+    Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does)
+    so each worker writes its samples to a shared directory and render()
+    aggregates them; otherwise only this process is reported.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.registry = None
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        if not self.enabled:
+            return
+
+        try:
+            import prometheus_client
+        except ImportError:
+            app.logger.warning('prometheus_client is not installed; metrics are disabled')
+            self.enabled = False
+            return
+
+        if self.registry is None:
+            self._create_metrics(prometheus_client)
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            self._listening = True
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions['metrics'] = self
+
+    def _create_metrics(self, prometheus_client):
+        # Own registry so a second create_app in the same process does not register twice
+        self.registry = prometheus_client.CollectorRegistry(auto_describe=True)
+        Counter = prometheus_client.Counter
+        Histogram = prometheus_client.Histogram
+
+        self.requests = Counter(
+            'http_requests_total', 'HTTP requests by endpoint and status',
+            ['blueprint', 'endpoint', 'method', 'status'], registry=self.registry
+        )
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'Time spent handling a request',
+            ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.request_size = Histogram(
+            'http_request_size_bytes', 'Request body size',
+            ['blueprint', 'endpoint'], buckets=SIZE_BUCKETS, registry=self.registry
+        )
+        self.response_size = Histogram(
+            'http_response_size_bytes', 'Response body size; streamed responses are not counted',
+            ['blueprint', 'endpoint'], buckets=SIZE_BUCKETS, registry=self.registry
+        )
+        self.db_queries = Histogram(
+            'db_queries_per_request', 'SQL statements executed per request',
+            ['blueprint', 'endpoint'], buckets=QUERY_COUNT_BUCKETS, registry=self.registry
+        )
+        self.db_time = Histogram(
+            'db_time_per_request_seconds', 'Total SQL time per request',
+            ['blueprint', 'endpoint'], buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.cache_lookups = Counter(
+            'response_cache_lookups_total', 'Response cache lookups by result (hit or miss)',
+            ['blueprint', 'endpoint', 'result'], registry=self.registry
+        )
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+
+        blueprint = request.blueprint or 'app'
+        endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+
+        self.request_latency.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        self.requests.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        if request.content_length:
+            self.request_size.labels(blueprint, endpoint).observe(request.content_length)
+        if not response.is_streamed and response.content_length is not None:
+            self.response_size.labels(blueprint, endpoint).observe(response.content_length)
+
+        self.db_queries.labels(blueprint, endpoint).observe(g.pop('metrics_db_queries', 0))
+        self.db_time.labels(blueprint, endpoint).observe(g.pop('metrics_db_seconds', 0.0))
+
+        cache_status = response.headers.get('X-Cache')
+        if cache_status:
+            self.cache_lookups.labels(blueprint, endpoint, cache_status.lower()).inc()
+        return response
+
+    def render(self):
+        """Text exposition of all metrics, and its content type"""
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            from prometheus_client import multiprocess
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self.registry
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and 'metrics_db_queries' in g:
+        g.metrics_db_queries += 1
+        g.metrics_db_seconds += elapsed
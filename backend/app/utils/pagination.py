@@ -0,0 +1,118 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from flask import request
+from sqlalchemy import asc, desc, tuple_
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, per_page, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+
+    def to_dict(self):
+        data = {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'has_next': self.has_next
+        }
+        if self.total is not None:
+            data['total'] = self.total
+        return data
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['dec', str(value)]
+    if isinstance(value, uuid.UUID):
+        return ['uuid', str(value)]
+    return ['raw', value]
+
+
+def _decode_value(tagged):
+    kind, value = tagged
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    if kind == 'dec':
+        return Decimal(value)
+    if kind == 'uuid':
+        return uuid.UUID(value)
+    if kind == 'raw':
+        return value
+    raise ValueError(f'Unknown cursor value type: {kind}')
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe cursor for the given sort key values"""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return [_decode_value(tagged) for tagged in payload]
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def wants_total():
+    """Whether a cursor-mode client asked for the (COUNT) total"""
+    return request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+
+
+def keyset_paginate(query, model, sort_attr, per_page, cursor=None, descending=True, include_total=False):
+    """Paginate by seeking past the last (sort key, id) seen instead of OFFSET
+
+    An empty cursor starts from the first page. Only when include_total is
+    set does this run a COUNT over the filtered set. The sort column must be
+    NOT NULL: rows with a NULL key fail every seek comparison and would
+    vanish from later pages.
+    """
+    sort_column = getattr(model, sort_attr)
+    if sort_column.nullable:
+        raise TypeError(f'{model.__name__}.{sort_attr} is nullable and cannot be a keyset sort key')
+    id_column = model.id
+    direction = desc if descending else asc
+
+    page_query = query.order_by(None).order_by(direction(sort_column), direction(id_column))
+
+    if cursor:
+        try:
+            sort_value, last_id = decode_cursor(cursor)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        position = tuple_(sort_column, id_column)
+        if descending:
+            page_query = page_query.filter(position < tuple_(sort_value, last_id))
+        else:
+            page_query = page_query.filter(position > tuple_(sort_value, last_id))
+
+    rows = page_query.limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, sort_attr), last.id])
+
+    total = query.order_by(None).count() if include_total else None
+
+    return KeysetPage(items, per_page, next_cursor, total)
@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def _pool_context():
+    # The pool starts from a request thread of a threaded (gthread) worker;
+    # forking there could copy a lock another thread holds, so never fork
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+    def __init__(self, retry_after=1):
+        self.retry_after = retry_after
+        super().__init__('Password hashing is saturated, retry shortly')
+
+
+class PasswordHasher:
+    """Runs bcrypt in a small process pool behind a bounded queue
+
+    Request threads wait on the pool instead of burning CPU themselves, and
+    at most PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE hashes are in
+    flight per worker process; beyond that PasswordHasherBusy is raised
+    instead of piling up logins. PASSWORD_HASH_WORKERS = 0 hashes inline.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = None
+        self.retry_after = 1
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 1)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', 8)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', 1)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size) if self.workers else None
+        self.shutdown()
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Created lazily and per process so gunicorn workers never share a pool forked from the master
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                self._executor_pid = pid
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # A timed-out hash keeps running in the pool, so its slot is only
+        # freed once it actually finishes (or is cancelled before starting)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy(self.retry_after)
+
+    def hash(self, password):
+        """bcrypt hash of the password at the configured cost"""
+        return self._run(_hash_password, password, self.rounds)
+
+    def verify(self, password, password_hash):
+        """Check a password against a stored bcrypt hash"""
+        if not password_hash:
+            return False
+        return self._run(_check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made at a cost other than the configured one"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._executor_pid = None
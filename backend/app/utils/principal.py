@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.user import User
+
+PRINCIPAL_FIELDS = ('role', 'is_active', 'is_verified')
+
+
+class Principal(namedtuple('Principal', ['id', 'role', 'is_active', 'is_verified'])):
+    """The slice of a user that authorization decisions need"""
+    __slots__ = ()
+
+    def is_admin(self):
+        return self.role in ['admin', 'superadmin']
+
+
+class RedisPrincipalGenerations:
+    """Per-user invalidation counters shared by every worker through Redis"""
+
+    def __init__(self, url, prefix, timeout):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = f"{prefix}principal:"
+        self._timeout = timeout
+
+    def get(self, user_id):
+        value = self._client.get(self._prefix + user_id)
+        return int(value) if value else 0
+
+    def bump(self, user_id):
+        pipe = self._client.pipeline()
+        pipe.incr(self._prefix + user_id)
+        # Counters must outlive every cached entry that was stamped with them
+        pipe.expire(self._prefix + user_id, self._timeout)
+        pipe.execute()
+
+
+class PrincipalCache:
+    """Small thread-safe LRU of principals with a per-entry TTL
+
+    The cache is per process. With PRINCIPAL_REDIS_URL set, each entry is
+    stamped with its user's shared generation, which invalidation bumps, so
+    a change made in one worker evicts the entry in every worker on its next
+    hit. Without Redis other workers only see a change once their entry's
+    TTL runs out.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generations = None
+
+    def init_app(self, app):
+        redis_url = app.config.get('PRINCIPAL_REDIS_URL')
+        if redis_url:
+            self.generations = RedisPrincipalGenerations(
+                redis_url,
+                app.config.get('CACHE_KEY_PREFIX', 'nakhrali:'),
+                max(app.config.get('PRINCIPAL_CACHE_TTL', 30) * 10, 3600)
+            )
+        else:
+            self.generations = None
+        self.clear()
+        app.extensions['principal_cache'] = self
+
+    def generation(self, user_id):
+        """Shared generation of a user's principal, or None when it cannot be read"""
+        if self.generations is None:
+            return 0
+        try:
+            return self.generations.get(user_id)
+        except Exception as e:
+            current_app.logger.warning(f"Principal generation lookup failed for {user_id}: {str(e)}")
+            return None
+
+    def get(self, user_id, generation=0, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, cached_generation, principal = entry
+            if expires_at < now or cached_generation != generation:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, user_id, principal, ttl, maxsize, generation=0):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, generation, principal)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.generations is not None:
+            try:
+                self.generations.bump(user_id)
+            except Exception as e:
+                current_app.logger.warning(f"Principal invalidation failed to reach other workers for {user_id}: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principals = PrincipalCache()
+
+
+def load_principal(user_id):
+    """Principal for a user id, or None if the user does not exist
+
+    Looked up in the request, then the process cache, then the database. A
+    database miss loads the full User into the session, so a view that
+    fetches the same user afterwards is served from the identity map.
+    """
+    if user_id is None:
+        return None
+    user_id = str(user_id)
+
+    request_principals = g.setdefault('principals', {})
+    if user_id in request_principals:
+        return request_principals[user_id]
+
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 30)
+    generation = principals.generation(user_id) if ttl else None
+    principal = principals.get(user_id, generation) if generation is not None else None
+
+    if principal is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            request_principals[user_id] = None
+            return None
+        principal = Principal(str(user.id), user.role, bool(user.is_active), bool(user.is_verified))
+        if generation is not None:
+            principals.set(user_id, principal, ttl, current_app.config.get('PRINCIPAL_CACHE_SIZE', 1024), generation)
+
+    request_principals[user_id] = principal
+    return principal
+
+
+def current_principal():
+    """Principal of the JWT bearer for this request"""
+    verify_jwt_in_request()
+    return load_principal(get_jwt_identity())
+
+
+def invalidate_principal(user_id):
+    """Drop a user's cached principal in this request and every worker"""
+    user_id = str(user_id)
+    principals.invalidate(user_id)
+    if has_app_context():
+        g.get('principals', {}).pop(user_id, None)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        invalidate_principal(target.id)
+        # A concurrent request may re-cache the old row before commit; evict again afterwards
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('principal_invalidations', set()).add(str(target.id))
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    invalidate_principal(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_after_commit(session):
+    for user_id in session.info.pop('principal_invalidations', ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_evictions(session):
+    session.info.pop('principal_invalidations', None)
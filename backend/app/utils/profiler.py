@@ -0,0 +1,118 @@
+import os
+import re
+import time
+import traceback
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r'\s+')
+_PARAMS = re.compile(r"%\(\w+\)s|\?|:\w+|\$\d+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def normalize_sql(statement):
+    """Statement shape with parameters, literals and IN-list lengths folded away"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _PARAMS.sub('?', shape)
+    shape = _LITERALS.sub('?', shape)
+    return _PARAM_LISTS.sub('(?, ...)', shape)
+
+
+class QueryProfiler:
+    """Opt-in per-request SQL profiler for development and staging
+
+    Groups every statement a request runs by its normalized shape. When one
+    shape repeats QUERY_PROFILER_REPEAT_THRESHOLD times or more (the usual
+    N+1: a dynamic relationship read inside to_dict() for each row) it logs
+    a warning with the application frames of the first occurrence, which
+    name the serializer and view responsible. Statements slower than
+    QUERY_PROFILER_SLOW_MS are logged as they happen. Every response carries
+    X-Query-Count and X-Query-Time headers.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.repeat_threshold = 5
+        self.slow_ms = 100
+        self._app_root = None
+        self._base_dir = None
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_PROFILER_ENABLED', False)
+        if not self.enabled:
+            return
+
+        self.repeat_threshold = app.config.get('QUERY_PROFILER_REPEAT_THRESHOLD', 5)
+        self.slow_ms = app.config.get('QUERY_PROFILER_SLOW_MS', 100)
+        self._app_root = app.root_path + os.sep
+        self._base_dir = os.path.dirname(app.root_path)
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions['query_profiler'] = self
+
+    def _app_frames(self):
+        """Application frames of the current stack, innermost last"""
+        stack = traceback.StackSummary.extract(traceback.walk_stack(None), lookup_lines=False)
+        frames = [
+            f"{os.path.relpath(frame.filename, self._base_dir)}:{frame.lineno} in {frame.name}"
+            for frame in stack
+            if frame.filename.startswith(self._app_root) and frame.filename != __file__
+        ]
+        return list(reversed(frames))
+
+    def _before_request(self):
+        g.query_profile = {}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or 'query_profile' not in g:
+            return
+        shape = normalize_sql(statement)
+        entry = g.query_profile.get(shape)
+        if entry is None:
+            entry = g.query_profile[shape] = {'count': 0, 'total_ms': 0.0, 'stack': self._app_frames()}
+        conn.info.setdefault('profiler_started', []).append((entry, time.perf_counter()))
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('profiler_started')
+        if not started:
+            return
+        entry, started_at = started.pop()
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+
+        if elapsed_ms >= self.slow_ms:
+            current_app.logger.warning(
+                f"Slow query ({elapsed_ms:.1f} ms) in {request.method} {request.path}: "
+                f"{_WHITESPACE.sub(' ', statement)[:500]}\n  " + '\n  '.join(self._app_frames())
+            )
+
+    def _after_request(self, response):
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return response
+
+        count = sum(entry['count'] for entry in profile.values())
+        total_ms = sum(entry['total_ms'] for entry in profile.values())
+        response.headers['X-Query-Count'] = str(count)
+        response.headers['X-Query-Time'] = f"{total_ms:.1f}ms"
+
+        for shape, entry in profile.items():
+            if entry['count'] >= self.repeat_threshold:
+                current_app.logger.warning(
+                    f"Possible N+1 in {request.method} {request.path} ({request.endpoint}): "
+                    f"{entry['count']} x {shape[:300]} ({entry['total_ms']:.1f} ms)\n  first run from:\n  "
+                    + '\n  '.join(entry['stack'])
+                )
+        return response
@@ -0,0 +1,127 @@
+import uuid
+from sqlalchemy import desc, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app import db
+from app.models.product import Product, ProductImage, ProductVariant
+from app.models.review import Review
+from app.models.order import Order, OrderItem
+from app.models.payment import Payment
+from app.models.cart import Cart, CartItem
+from app.models.wishlist import Wishlist, WishlistItem
+from app.models.notification import Notification
+from app.models.coupon import CouponUsage
+from app.models.user import UserAddress
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that keeps the wrapped statement's bind parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    if compiler.dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (FORMAT JSON) '
+    else:
+        prefix = 'EXPLAIN QUERY PLAN '
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def _sample_id():
+    # The planner only needs a value of the right type, not an existing row
+    return uuid.uuid4()
+
+
+# Representative statements for the per-user and per-product lookups in app/api
+HOT_QUERIES = {
+    'products_by_category': lambda: select(Product).where(
+        Product.is_active == True, Product.category_id == _sample_id()
+    ).order_by(desc(Product.created_at)).limit(20),
+    'products_by_collection': lambda: select(Product).where(
+        Product.is_active == True, Product.collection_id == _sample_id()
+    ).order_by(desc(Product.created_at)).limit(20),
+    'listing_images': lambda: select(ProductImage).where(
+        ProductImage.product_id.in_([_sample_id(), _sample_id()])
+    ).order_by(ProductImage.product_id, ProductImage.sort_order),
+    'listing_variants': lambda: select(ProductVariant).where(
+        ProductVariant.product_id.in_([_sample_id(), _sample_id()]), ProductVariant.is_active == True
+    ),
+    'product_reviews': lambda: select(Review).where(
+        Review.product_id == _sample_id(), Review.is_approved == True
+    ).order_by(desc(Review.created_at)).limit(10),
+    'user_reviews': lambda: select(Review).where(
+        Review.user_id == _sample_id()
+    ).order_by(desc(Review.created_at)).limit(10),
+    'user_orders': lambda: select(Order).where(
+        Order.user_id == _sample_id()
+    ).order_by(desc(Order.created_at)).limit(10),
+    'order_items': lambda: select(OrderItem).where(OrderItem.order_id == _sample_id()),
+    'order_payments': lambda: select(Payment).where(Payment.order_id == _sample_id()),
+    'active_cart': lambda: select(Cart).where(Cart.user_id == _sample_id(), Cart.is_active == True).limit(1),
+    'cart_items': lambda: select(CartItem).where(CartItem.cart_id == _sample_id()),
+    'user_wishlist': lambda: select(Wishlist).where(Wishlist.user_id == _sample_id()).limit(1),
+    'wishlist_item': lambda: select(WishlistItem).where(
+        WishlistItem.wishlist_id == _sample_id(), WishlistItem.product_id == _sample_id()
+    ).limit(1),
+    'user_notifications': lambda: select(Notification).where(
+        Notification.user_id == _sample_id()
+    ).order_by(desc(Notification.created_at)),
+    'coupon_usage': lambda: select(CouponUsage).where(
+        CouponUsage.coupon_id == _sample_id(), CouponUsage.user_id == _sample_id()
+    ),
+    'user_addresses': lambda: select(UserAddress).where(UserAddress.user_id == _sample_id()),
+}
+
+
+def _postgres_seq_scans(plan):
+    """Relations read by a Seq Scan anywhere in a JSON plan tree"""
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        scans.extend(_postgres_seq_scans(child))
+    return scans
+
+
+def _sqlite_seq_scans(rows):
+    """Tables SQLite walks in full: 'SCAN <table>' steps without an index"""
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        if detail.startswith('SCAN ') and 'INDEX' not in detail:
+            scans.append(detail.split()[1])
+    return scans
+
+
+def explain_hot_queries(names=None, prefer_indexes=True):
+    """EXPLAIN each registered hot query and report the tables it scans in full
+
+    On Postgres, prefer_indexes turns enable_seqscan off for the check so a
+    small development table does not hide a missing index: any Seq Scan left
+    in the plan means no usable index exists. Returns {name: [tables]}.
+    """
+    is_postgres = db.engine.dialect.name == 'postgresql'
+    results = {}
+
+    try:
+        if is_postgres and prefer_indexes:
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+
+        for name, build in HOT_QUERIES.items():
+            if names and name not in names:
+                continue
+            # Read the raw cursor: the wrapped SELECT's result types do not apply to plan rows
+            rows = db.session.execute(Explain(build())).cursor.fetchall()
+            if is_postgres:
+                plan = rows[0][0][0]['Plan']
+                results[name] = _postgres_seq_scans(plan)
+            else:
+                results[name] = _sqlite_seq_scans(rows)
+    finally:
+        db.session.rollback()
+
+    return results
@@ -0,0 +1,389 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import delete, update
+from app import db
+from app.models.analytics import SalesRollup, ProductSalesRollup, CouponRollup, PaymentRollup
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment
+from app.models.product import Product
+
+GRANULARITIES = ('hour', 'day')
+
+# Orders in these states no longer count towards sales, units or coupon use
+VOID_STATUSES = {OrderStatus.CANCELLED, OrderStatus.RETURNED, OrderStatus.REFUNDED}
+
+
+def is_live(status):
+    return status not in VOID_STATUSES
+
+
+def _utc_offset():
+    return timedelta(minutes=current_app.config.get('ANALYTICS_UTC_OFFSET_MINUTES', 0))
+
+
+def _local_time(moment):
+    """Shift a naive UTC timestamp to store-local time for bucketing"""
+    return moment + _utc_offset()
+
+
+def bucket_start(moment, granularity):
+    local = _local_time(moment)
+    if granularity == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_date(moment):
+    return _local_time(moment).date()
+
+
+def _upsert(model, keys, deltas, values=None):
+    """Add deltas to the rollup row identified by keys, creating it if missing
+
+    Postgres and SQLite use a single INSERT ... ON CONFLICT DO UPDATE, so
+    concurrent writers to the same bucket add up instead of overwriting.
+    values are plain attributes (not counters) written as given.
+    """
+    values = values or {}
+    table = model.__table__
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**keys, **deltas, **values, updated_at=now)
+        changes = {name: table.c[name] + stmt.excluded[name] for name in deltas}
+        changes.update(values, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=changes))
+        return
+
+    matches = [table.c[name] == value for name, value in keys.items()]
+    changes = {name: table.c[name] + value for name, value in deltas.items()}
+    result = db.session.execute(update(table).where(*matches).values(**changes, **values, updated_at=now))
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**keys, **deltas, **values, updated_at=now))
+
+
+def _order_lines(order):
+    """(product_id, category_id, quantity, total_price) for each order item"""
+    query = db.session.query(
+        OrderItem.product_id, Product.category_id, OrderItem.quantity, OrderItem.total_price
+    ).outerjoin(Product, Product.id == OrderItem.product_id).filter(OrderItem.order_id == order.id)
+    return query.all()
+
+
+def _apply_sales(order, status, sign, units):
+    for granularity in GRANULARITIES:
+        _upsert(SalesRollup, {
+            'granularity': granularity,
+            'bucket_start': bucket_start(order.created_at, granularity),
+            'status': status.value
+        }, {
+            'order_count': sign,
+            'units': sign * units,
+            'revenue': sign * Decimal(order.total_amount or 0),
+            'discount_amount': sign * Decimal(order.discount_amount or 0),
+            'coupon_orders': sign if order.coupon_code else 0
+        })
+
+
+def _apply_live_sales(order, sign, lines):
+    day = bucket_date(order.created_at)
+
+    # Lines for several variants of one product count as one order for it
+    per_product = {}
+    for product_id, category_id, quantity, total_price in lines:
+        _, units, revenue = per_product.get(product_id, (None, 0, Decimal(0)))
+        per_product[product_id] = (category_id, units + quantity, revenue + Decimal(total_price or 0))
+
+    for product_id, (category_id, units, revenue) in per_product.items():
+        _upsert(ProductSalesRollup, {
+            'bucket_date': day,
+            'product_id': product_id
+        }, {
+            'order_count': sign,
+            'units': sign * units,
+            'revenue': sign * revenue
+        }, {'category_id': category_id})
+
+    if order.coupon_code:
+        _upsert(CouponRollup, {
+            'bucket_date': day,
+            'coupon_code': order.coupon_code
+        }, {
+            'order_count': sign,
+            'discount_amount': sign * Decimal(order.discount_amount or 0)
+        })
+
+
+def record_order_placed(order):
+    """Add a new order to the rollups; call after its items are flushed"""
+    lines = _order_lines(order)
+    units = sum(quantity for _, _, quantity, _ in lines)
+    status = order.status or OrderStatus.PLACED
+    _apply_sales(order, status, 1, units)
+    if is_live(status):
+        _apply_live_sales(order, 1, lines)
+
+
+def record_order_status_change(order, previous_status):
+    """Move an order between status buckets and in or out of live sales"""
+    if previous_status == order.status:
+        return
+    lines = _order_lines(order)
+    units = sum(quantity for _, _, quantity, _ in lines)
+    _apply_sales(order, previous_status, -1, units)
+    _apply_sales(order, order.status, 1, units)
+
+    if is_live(previous_status) and not is_live(order.status):
+        _apply_live_sales(order, -1, lines)
+    elif not is_live(previous_status) and is_live(order.status):
+        _apply_live_sales(order, 1, lines)
+
+
+def _apply_payment(payment, status, sign):
+    _upsert(PaymentRollup, {
+        'bucket_date': bucket_date(payment.created_at),
+        'payment_method': payment.payment_method,
+        'payment_status': status
+    }, {
+        'payment_count': sign,
+        'amount': sign * Decimal(payment.amount or 0)
+    })
+
+
+def record_payment_change(payment, previous_status=None):
+    """Count a new payment, or move it to its new status"""
+    if previous_status == payment.payment_status:
+        return
+    if previous_status is not None:
+        _apply_payment(payment, previous_status, -1)
+    _apply_payment(payment, payment.payment_status or 'pending', 1)
+
+
+def rebuild_rollups(since=None, chunk_size=1000):
+    """Recompute every rollup from orders, items and payments
+
+    Rows are streamed and accumulated per bucket, so memory grows with the
+    number of buckets rather than the number of orders. With since (a
+    store-local date), only buckets from that day onwards are rebuilt.
+    Returns the number of orders processed.
+    """
+    since_day = datetime.combine(since, time.min) if since else None
+    utc_since = since_day - _utc_offset() if since_day else None
+
+    for column, bound in ((SalesRollup.bucket_start, since_day),
+                          (ProductSalesRollup.bucket_date, since),
+                          (CouponRollup.bucket_date, since),
+                          (PaymentRollup.bucket_date, since)):
+        stmt = delete(column.class_)
+        if since:
+            stmt = stmt.where(column >= bound)
+        db.session.execute(stmt)
+
+    sales = defaultdict(lambda: defaultdict(Decimal))
+    products = defaultdict(lambda: defaultdict(Decimal))
+    coupons = defaultdict(lambda: defaultdict(Decimal))
+    payments = defaultdict(lambda: defaultdict(Decimal))
+
+    orders = db.session.query(
+        Order.id, Order.created_at, Order.status, Order.total_amount,
+        Order.discount_amount, Order.coupon_code
+    )
+    if utc_since:
+        orders = orders.filter(Order.created_at >= utc_since)
+
+    order_count = 0
+    for order in orders.yield_per(chunk_size):
+        order_count += 1
+        for granularity in GRANULARITIES:
+            entry = sales[(granularity, bucket_start(order.created_at, granularity), order.status.value)]
+            entry['order_count'] += 1
+            entry['revenue'] += Decimal(order.total_amount or 0)
+            entry['discount_amount'] += Decimal(order.discount_amount or 0)
+            entry['coupon_orders'] += 1 if order.coupon_code else 0
+        if order.coupon_code and is_live(order.status):
+            entry = coupons[(bucket_date(order.created_at), order.coupon_code)]
+            entry['order_count'] += 1
+            entry['discount_amount'] += Decimal(order.discount_amount or 0)
+
+    items = db.session.query(
+        OrderItem.order_id, OrderItem.product_id, Product.category_id,
+        OrderItem.quantity, OrderItem.total_price, Order.created_at, Order.status
+    ).join(Order, Order.id == OrderItem.order_id).outerjoin(Product, Product.id == OrderItem.product_id)
+    if utc_since:
+        items = items.filter(Order.created_at >= utc_since)
+
+    # Items arrive grouped by order so each product counts once per order
+    current_order_id, order_products = None, set()
+    for item in items.order_by(OrderItem.order_id).yield_per(chunk_size):
+        if item.order_id != current_order_id:
+            current_order_id, order_products = item.order_id, set()
+        for granularity in GRANULARITIES:
+            sales[(granularity, bucket_start(item.created_at, granularity), item.status.value)]['units'] += item.quantity
+        if is_live(item.status):
+            entry = products[(bucket_date(item.created_at), item.product_id)]
+            entry['category_id'] = item.category_id
+            if item.product_id not in order_products:
+                order_products.add(item.product_id)
+                entry['order_count'] += 1
+            entry['units'] += item.quantity
+            entry['revenue'] += Decimal(item.total_price or 0)
+
+    payment_rows = db.session.query(
+        Payment.created_at, Payment.payment_method, Payment.payment_status, Payment.amount
+    )
+    if utc_since:
+        payment_rows = payment_rows.filter(Payment.created_at >= utc_since)
+
+    for payment in payment_rows.yield_per(chunk_size):
+        entry = payments[(bucket_date(payment.created_at), payment.payment_method, payment.payment_status or 'pending')]
+        entry['payment_count'] += 1
+        entry['amount'] += Decimal(payment.amount or 0)
+
+    now = datetime.utcnow()
+    _bulk_insert(SalesRollup, ('granularity', 'bucket_start', 'status'), sales, now)
+    _bulk_insert(ProductSalesRollup, ('bucket_date', 'product_id'), products, now)
+    _bulk_insert(CouponRollup, ('bucket_date', 'coupon_code'), coupons, now)
+    _bulk_insert(PaymentRollup, ('bucket_date', 'payment_method', 'payment_status'), payments, now)
+
+    return order_count
+
+
+def _bulk_insert(model, key_names, accumulated, now, batch_size=1000):
+    rows = []
+    for key, values in accumulated.items():
+        row = dict(zip(key_names, key))
+        for name, value in values.items():
+            row[name] = int(value) if name in ('order_count', 'units', 'coupon_orders', 'payment_count') else value
+        row['updated_at'] = now
+        rows.append(row)
+
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(model.__table__.insert(), rows[start:start + batch_size])
+
+
+def _money(value):
+    return float(value or 0)
+
+
+def dashboard_summary(start, end, granularity='day', top=10):
+    """Dashboard figures for store-local [start, end), read only from rollups"""
+    sales_rows = SalesRollup.query.filter(
+        SalesRollup.granularity == granularity,
+        SalesRollup.bucket_start >= start,
+        SalesRollup.bucket_start < end
+    ).order_by(SalesRollup.bucket_start).all()
+
+    totals = defaultdict(Decimal)
+    orders_by_status = defaultdict(int)
+    series = {}
+    for row in sales_rows:
+        orders_by_status[row.status] += row.order_count
+        if is_live(OrderStatus(row.status)):
+            for name in ('order_count', 'units', 'revenue', 'discount_amount', 'coupon_orders'):
+                totals[name] += getattr(row, name)
+            point = series.setdefault(row.bucket_start, defaultdict(Decimal))
+            point['order_count'] += row.order_count
+            point['units'] += row.units
+            point['revenue'] += row.revenue
+
+    def aov(values):
+        return _money(values['revenue'] / values['order_count']) if values['order_count'] else 0.0
+
+    start_date, end_date = start.date(), end.date()
+    top_products = db.session.query(
+        ProductSalesRollup.product_id,
+        Product.name,
+        db.func.sum(ProductSalesRollup.units).label('units'),
+        db.func.sum(ProductSalesRollup.revenue).label('revenue')
+    ).outerjoin(Product, Product.id == ProductSalesRollup.product_id).filter(
+        ProductSalesRollup.bucket_date >= start_date,
+        ProductSalesRollup.bucket_date < end_date
+    ).group_by(ProductSalesRollup.product_id, Product.name).order_by(
+        db.desc('units')
+    ).limit(top).all()
+
+    categories = db.session.query(
+        ProductSalesRollup.category_id,
+        db.func.sum(ProductSalesRollup.units).label('units'),
+        db.func.sum(ProductSalesRollup.revenue).label('revenue')
+    ).filter(
+        ProductSalesRollup.bucket_date >= start_date,
+        ProductSalesRollup.bucket_date < end_date
+    ).group_by(ProductSalesRollup.category_id).order_by(db.desc('revenue')).all()
+
+    coupons = db.session.query(
+        CouponRollup.coupon_code,
+        db.func.sum(CouponRollup.order_count).label('order_count'),
+        db.func.sum(CouponRollup.discount_amount).label('discount_amount')
+    ).filter(
+        CouponRollup.bucket_date >= start_date,
+        CouponRollup.bucket_date < end_date
+    ).group_by(CouponRollup.coupon_code).order_by(db.desc('order_count')).all()
+
+    payments = db.session.query(
+        PaymentRollup.payment_method,
+        PaymentRollup.payment_status,
+        db.func.sum(PaymentRollup.payment_count).label('payment_count'),
+        db.func.sum(PaymentRollup.amount).label('amount')
+    ).filter(
+        PaymentRollup.bucket_date >= start_date,
+        PaymentRollup.bucket_date < end_date
+    ).group_by(PaymentRollup.payment_method, PaymentRollup.payment_status).all()
+
+    # Stock levels are current state rather than history, so they are counted live
+    tracked = Product.query.filter(Product.is_active == True, Product.track_quantity == True)
+    low_stock_count = tracked.filter(
+        Product.stock_quantity > 0,
+        Product.stock_quantity <= Product.low_stock_threshold
+    ).count()
+    out_of_stock_count = tracked.filter(Product.stock_quantity <= 0).count()
+
+    return {
+        'totals': {
+            'order_count': int(totals['order_count']),
+            'units': int(totals['units']),
+            'revenue': _money(totals['revenue']),
+            'discount_amount': _money(totals['discount_amount']),
+            'coupon_orders': int(totals['coupon_orders']),
+            'average_order_value': aov(totals)
+        },
+        'orders_by_status': dict(orders_by_status),
+        'series': [{
+            'bucket_start': moment.isoformat(),
+            'order_count': int(point['order_count']),
+            'units': int(point['units']),
+            'revenue': _money(point['revenue']),
+            'average_order_value': aov(point)
+        } for moment, point in sorted(series.items())],
+        'top_products': [{
+            'product_id': str(row.product_id),
+            'name': row.name,
+            'units': int(row.units or 0),
+            'revenue': _money(row.revenue)
+        } for row in top_products],
+        'categories': [{
+            'category_id': str(row.category_id) if row.category_id else None,
+            'units': int(row.units or 0),
+            'revenue': _money(row.revenue)
+        } for row in categories],
+        'coupons': [{
+            'coupon_code': row.coupon_code,
+            'order_count': int(row.order_count or 0),
+            'discount_amount': _money(row.discount_amount)
+        } for row in coupons],
+        'payments': [{
+            'payment_method': row.payment_method,
+            'payment_status': row.payment_status,
+            'payment_count': int(row.payment_count or 0),
+            'amount': _money(row.amount)
+        } for row in payments],
+        'low_stock_count': low_stock_count,
+        'out_of_stock_count': out_of_stock_count
+    }
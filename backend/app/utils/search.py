@@ -0,0 +1,60 @@
+import re
+from sqlalchemy import or_, and_, desc, func
+from app import db
+from app.models.product import Product
+
+# Must match the configuration used by the products_search_vector trigger
+SEARCH_CONFIG = 'english'
+
+
+def tokenize(text):
+    """Split a search string into safe lowercase terms"""
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def supports_full_text():
+    """Full-text search needs the Postgres tsvector column and trigger"""
+    return db.engine.dialect.name == 'postgresql'
+
+
+def build_prefix_tsquery(terms):
+    """AND together prefix matches so partial words work for type-ahead"""
+    return func.to_tsquery(SEARCH_CONFIG, ' & '.join(f"{term}:*" for term in terms))
+
+
+def apply_product_search(query, text, rank=True):
+    """Filter a product query by search text, optionally ordering by relevance
+
+    Postgres uses the GIN-indexed search_vector and ts_rank; other databases
+    (the SQLite testing config) fall back to ILIKE matching on each term.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return query
+
+    if supports_full_text():
+        tsquery = build_prefix_tsquery(terms)
+        query = query.filter(Product.search_vector.op('@@')(tsquery))
+        if rank:
+            query = query.order_by(
+                desc(func.ts_rank(Product.search_vector, tsquery)),
+                desc(Product.is_featured),
+                desc(Product.created_at)
+            )
+        return query
+
+    conditions = []
+    for term in terms:
+        pattern = f"%{term}%"
+        conditions.append(or_(
+            Product.name.ilike(pattern),
+            Product.description.ilike(pattern),
+            Product.short_description.ilike(pattern),
+            Product.material.ilike(pattern),
+            Product.occasion.ilike(pattern),
+            Product.style.ilike(pattern)
+        ))
+    query = query.filter(and_(*conditions))
+    if rank:
+        query = query.order_by(desc(Product.is_featured), desc(Product.created_at))
+    return query
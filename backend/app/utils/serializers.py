@@ -0,0 +1,279 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import load_only
+
+
+class Field:
+    """One output key read from a model attribute
+
+    Subclasses say how the value is converted by returning a Python
+    expression over the attribute; Serializer compiles those expressions
+    into a single function per field selection.
+    """
+
+    def __init__(self, attr, key=None):
+        if not attr.isidentifier():
+            raise ValueError(f'Invalid attribute name: {attr!r}')
+        self.attr = attr
+        self.key = key or attr
+        self.requires = (attr,)
+
+    def expression(self, name):
+        return f"obj.{self.attr}"
+
+
+class Attr(Field):
+    """Plain column value: strings, ints, booleans, JSON"""
+
+
+class Id(Field):
+    """UUID (or any id) rendered as a string, None kept as None"""
+
+    def expression(self, name):
+        return f"(None if (_v := obj.{self.attr}) is None else str(_v))"
+
+
+class Number(Field):
+    """Numeric/Decimal column as a float, None kept as None"""
+
+    def expression(self, name):
+        return f"(None if (_v := obj.{self.attr}) is None else float(_v))"
+
+
+class Timestamp(Field):
+    """Date or datetime as ISO 8601, None kept as None"""
+
+    def expression(self, name):
+        return f"(None if (_v := obj.{self.attr}) is None else _v.isoformat())"
+
+
+class EnumValue(Field):
+    """Enum column as its value"""
+
+    def expression(self, name):
+        return f"(None if (_v := obj.{self.attr}) is None else _v.value)"
+
+
+class Method(Field):
+    """Computed value: a no-argument model method, or a function of the object
+
+    Only point this at code that reads loaded columns, and list those
+    columns in requires so projections load them. Anything that touches
+    a relationship belongs in the caller, which can batch-load it.
+    """
+
+    def __init__(self, key, method, requires=()):
+        if isinstance(method, str):
+            super().__init__(method, key)
+            self.function = None
+        else:
+            self.attr = None
+            self.key = key
+            self.function = method
+        self.requires = tuple(requires)
+
+    def expression(self, name):
+        if self.function is None:
+            return f"obj.{self.attr}()"
+        return f"{name}(obj)"
+
+
+class Serializer:
+    """Declarative, query-free model serializer
+
+    Declare the output fields once; dump() turns an object into a dict
+    using a function compiled for the requested field selection, so each
+    call is a single dict display with no per-field dispatch. Fields only
+    read columns and pure methods, never relationships, so serializing a
+    page of objects cannot issue queries of its own. Keys that need
+    related rows (images, variants, ...) are listed in extra and added by
+    the caller from batch-loaded data.
+
+    projections names fixed field selections (a "card" for listing grids,
+    say); columns() tells the query which columns a selection needs so the
+    rest are never fetched. extra may be a dict mapping each key to the
+    columns the caller reads from the row to build it.
+    """
+
+    def __init__(self, *fields, extra=(), projections=None):
+        self.fields = {field.key: field for field in fields}
+        self.extra_requires = dict(extra) if isinstance(extra, dict) else {}
+        self.extra = frozenset(extra)
+        self.names = frozenset(self.fields) | self.extra
+        self.projections = {}
+        for name, selection in (projections or {}).items():
+            if selection is not None:
+                selection = frozenset(selection) | ({'id'} & self.names)
+                unknown = selection - self.names
+                if unknown:
+                    raise ValueError(f"Projection {name} has unknown fields: {', '.join(sorted(unknown))}")
+            self.projections[name] = selection
+        self._encoders = {}
+
+    def encoder(self, fields=None):
+        """The compiled function for a field selection (None for all fields)"""
+        selection = None if fields is None else frozenset(fields)
+        encoder = self._encoders.get(selection)
+        if encoder is None:
+            encoder = self._encoders[selection] = self._compile(selection)
+        return encoder
+
+    def _compile(self, selection):
+        namespace = {}
+        entries = []
+        for index, (key, field) in enumerate(self.fields.items()):
+            if selection is not None and key not in selection:
+                continue
+            name = f"_f{index}"
+            if isinstance(field, Method) and field.function is not None:
+                namespace[name] = field.function
+            entries.append(f"{key!r}: {field.expression(name)}")
+        source = "def encode(obj):\n    return {" + ", ".join(entries) + "}\n"
+        exec(compile(source, f"<serializer {', '.join(self.fields)}>", 'exec'), namespace)
+        return namespace['encode']
+
+    def dump(self, obj, fields=None):
+        return self.encoder(fields)(obj)
+
+    def dump_many(self, objs, fields=None):
+        encode = self.encoder(fields)
+        return [encode(obj) for obj in objs]
+
+    def parse_fields(self, value, allowed=None):
+        """Field selection from a comma-separated ?fields= value
+
+        Returns None (all fields) for an empty value. id is always
+        included when the serializer has one. Raises ValueError naming
+        any field that is unknown or outside allowed.
+        """
+        if not value:
+            return None
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = requested - (self.names if allowed is None else allowed)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if 'id' in self.names:
+            requested.add('id')
+        return frozenset(requested)
+
+    def wants(self, fields, key):
+        """Whether key is part of a parsed field selection"""
+        return fields is None or key in fields
+
+    def projection(self, name):
+        """Field selection of a named projection; raises ValueError if unknown"""
+        if name not in self.projections:
+            raise ValueError(f"Unknown view: {name}. Choose from {', '.join(self.projections)}")
+        return self.projections[name]
+
+    def columns(self, fields=None):
+        """Model attributes the selection reads, or None when it needs them all"""
+        if fields is None:
+            return None
+        columns = set()
+        for key in fields:
+            field = self.fields.get(key)
+            if field is not None:
+                columns.update(field.requires)
+            else:
+                columns.update(self.extra_requires.get(key, ()))
+        return columns
+
+    def load_only(self, model, fields=None, *also):
+        """load_only() option fetching just what fields (plus also) read
+
+        Returns None for a full selection. Add any attribute the caller
+        reads itself, such as a keyset sort column, to also.
+        """
+        columns = self.columns(fields)
+        if columns is None:
+            return None
+        return load_only(*(getattr(model, name) for name in sorted(columns.union(also))))
+
+
+def requested_fields(serializer, default_view=None, views=None):
+    """Field selection for the current request
+
+    ?fields=a,b,c picks fields directly; otherwise ?view= (or
+    default_view) picks a named projection from views, which defaults to
+    all of the serializer's projections. ?fields= may only name fields
+    that one of those views exposes. Raises ValueError for an unknown
+    field or view.
+    """
+    allowed = None
+    if views is not None:
+        selections = [serializer.projection(view) for view in views]
+        if None not in selections:
+            allowed = frozenset().union(*selections)
+    fields = serializer.parse_fields(request.args.get('fields', ''), allowed)
+    if fields is not None:
+        return fields
+    view = request.args.get('view') or default_view
+    if view is None:
+        return None
+    if views is not None and view not in views:
+        raise ValueError(f"Unknown view: {view}. Choose from {', '.join(views)}")
+    return serializer.projection(view)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson
+
+    Output matches DefaultJSONProvider: sort_keys and compact are honoured
+    (pretty printing uses a two-space indent), and Decimal, date and other
+    non-native types go through the same default() hook. Anything orjson
+    refuses, such as integers beyond 64 bits or custom dumps() arguments,
+    falls back to the stdlib encoder.
+    """
+
+    def __init__(self, app):
+        import orjson
+        self._orjson = orjson
+        super().__init__(app)
+
+    def _options(self, indent=False):
+        orjson = self._orjson
+        # Datetimes go through default() so they keep Flask's HTTP date format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, indent=False):
+        return self._orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._dumps_bytes(obj).decode('utf-8')
+        except TypeError:  # orjson.JSONEncodeError is a TypeError
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return self._orjson.loads(s)
+        except self._orjson.JSONDecodeError:
+            # The stdlib parser also accepts NaN/Infinity; let it decide
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = self._dumps_bytes(obj, indent=indent) + b'\n'
+        except TypeError:  # orjson.JSONEncodeError is a TypeError
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def use_orjson(app):
+    """Install OrjsonProvider on app when orjson is available"""
+    try:
+        app.json = OrjsonProvider(app)
+    except ImportError:
+        app.logger.warning('orjson is not installed; using the standard JSON encoder')
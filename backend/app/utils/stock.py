@@ -0,0 +1,258 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import groupby
+from sqlalchemy import Boolean, Integer, column, event, insert, or_, select, update, values
+from sqlalchemy.orm import Session
+from app import db, cache
+from app.models.product import Product, ProductVariant
+from app.models.inventory import StockReservation
+from app.models.order import Order, OrderStatus
+from app.utils.cache import product_cache_tags
+from app.utils.rollups import record_order_status_change
+
+StockLine = namedtuple('StockLine', ['product_id', 'variant_id', 'quantity', 'allow_backorder'])
+
+
+class InsufficientStock(Exception):
+    """Raised when a conditional stock decrement matches no row"""
+
+    def __init__(self, product_id, variant_id=None):
+        self.product_id = product_id
+        self.variant_id = variant_id
+        super().__init__(f"Insufficient stock for product {product_id}")
+
+
+def stock_line_for(item):
+    """StockLine for a cart or order item, or None when stock is not tracked"""
+    product = item.product
+    if not product or not product.track_quantity:
+        return None
+    return StockLine(product.id, item.product_variant_id, item.quantity, bool(product.allow_backorder))
+
+
+def _lock_order(lines):
+    """Merge lines per stock row and sort them so every checkout locks rows in the same order"""
+    merged = {}
+    for line in lines:
+        table = ProductVariant.__table__ if line.variant_id else Product.__table__
+        row_id = line.variant_id or line.product_id
+        key = (table.name, str(row_id))
+        if key in merged:
+            previous = merged[key]
+            merged[key] = previous._replace(
+                quantity=previous.quantity + line.quantity,
+                allow_backorder=previous.allow_backorder and line.allow_backorder
+            )
+        else:
+            merged[key] = line
+    return [(merged[key], key[0]) for key in sorted(merged)]
+
+
+def _table_for(table_name):
+    return ProductVariant.__table__ if table_name == ProductVariant.__tablename__ else Product.__table__
+
+
+def _note_stock_change(lines):
+    """Remember which products' cached pages go stale when this transaction commits"""
+    db.session.info.setdefault('stock_changed_products', set()).update(line.product_id for line in lines)
+
+
+def _decrement_row(table, line):
+    """Conditionally decrement one row; False when it has too little stock"""
+    row_id = line.variant_id or line.product_id
+    stmt = update(table).where(table.c.id == row_id)
+    if not line.allow_backorder:
+        stmt = stmt.where(table.c.stock_quantity >= line.quantity)
+    stmt = stmt.values(stock_quantity=table.c.stock_quantity - line.quantity).returning(table.c.stock_quantity)
+    return db.session.execute(stmt).first() is not None
+
+
+def _decrement_rows(table, lines):
+    """Conditionally decrement many rows of table in one statement (PostgreSQL)
+
+    Runs UPDATE ... FROM (VALUES ...) joined to a CTE that locks the rows
+    in id order first, so concurrent checkouts still take row locks in the
+    same order. Returns the lines whose row had too little stock.
+    """
+    row_ids = [line.variant_id or line.product_id for line in lines]
+    batch = values(
+        column('id', table.c.id.type), column('quantity', Integer), column('allow_backorder', Boolean),
+        name='lines'
+    ).data([(row_id, line.quantity, line.allow_backorder) for row_id, line in zip(row_ids, lines)])
+    locked = select(table.c.id).where(table.c.id.in_(row_ids)).order_by(table.c.id).with_for_update().cte('locked')
+
+    updated = set(db.session.scalars(
+        update(table)
+        .where(
+            table.c.id == batch.c.id,
+            table.c.id == locked.c.id,
+            or_(batch.c.allow_backorder, table.c.stock_quantity >= batch.c.quantity)
+        )
+        .values(stock_quantity=table.c.stock_quantity - batch.c.quantity)
+        .returning(table.c.id)
+    ))
+    return [line for row_id, line in zip(row_ids, lines) if row_id not in updated]
+
+
+def decrement_stock(lines):
+    """Take stock for every line or raise InsufficientStock
+
+    Each row is decremented by a conditional UPDATE, so the check and the
+    write cannot be interleaved by a concurrent checkout. On PostgreSQL all
+    rows of a table go in a single statement; elsewhere it is one statement
+    per row. The caller's transaction must be rolled back when this raises.
+    """
+    ordered = _lock_order(lines)
+    _note_stock_change(lines)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        for table_name, entries in groupby(ordered, key=lambda entry: entry[1]):
+            short = _decrement_rows(_table_for(table_name), [line for line, _ in entries])
+            if short:
+                raise InsufficientStock(short[0].product_id, short[0].variant_id)
+        return
+
+    for line, table_name in ordered:
+        if not _decrement_row(_table_for(table_name), line):
+            raise InsufficientStock(line.product_id, line.variant_id)
+
+
+def increment_stock(lines):
+    """Put stock back for every line"""
+    _note_stock_change(lines)
+    for line, table_name in _lock_order(lines):
+        table = _table_for(table_name)
+        row_id = line.variant_id or line.product_id
+        db.session.execute(
+            update(table)
+            .where(table.c.id == row_id)
+            .values(stock_quantity=table.c.stock_quantity + line.quantity)
+        )
+
+
+def reserve_order_stock(order, lines, hold_minutes=None):
+    """Decrement stock for an order and record the reservation
+
+    The reservations are written with a single multi-row INSERT.
+
+    With hold_minutes the reservation is held until the payment deadline and
+    released by release_expired_reservations if it is never committed.
+    Without it the stock is committed straight away (e.g. cash on delivery).
+    """
+    lines = list(lines)
+    decrement_stock(lines)
+
+    if hold_minutes:
+        status = StockReservation.HELD
+        expires_at = datetime.utcnow() + timedelta(minutes=hold_minutes)
+    else:
+        status = StockReservation.COMMITTED
+        expires_at = None
+
+    if lines:
+        db.session.execute(insert(StockReservation.__table__).values([
+            {
+                'order_id': order.id,
+                'product_id': line.product_id,
+                'product_variant_id': line.variant_id,
+                'quantity': line.quantity,
+                'status': status,
+                'expires_at': expires_at
+            }
+            for line in lines
+        ]))
+
+
+def commit_order_stock(order_id):
+    """Keep held stock for good once the order is paid or confirmed"""
+    table = StockReservation.__table__
+    result = db.session.execute(
+        update(table)
+        .where(table.c.order_id == order_id, table.c.status == StockReservation.HELD)
+        .values(status=StockReservation.COMMITTED, expires_at=None, updated_at=datetime.utcnow())
+    )
+    return result.rowcount
+
+
+def _claim_reservations(*conditions):
+    """Atomically mark matching reservations released and return what they held
+
+    Claiming with UPDATE ... RETURNING means two concurrent releases of the
+    same order cannot both put its stock back.
+    """
+    table = StockReservation.__table__
+    rows = db.session.execute(
+        update(table)
+        .where(table.c.status.in_([StockReservation.HELD, StockReservation.COMMITTED]), *conditions)
+        .values(status=StockReservation.RELEASED, updated_at=datetime.utcnow())
+        .returning(table.c.order_id, table.c.product_id, table.c.product_variant_id, table.c.quantity)
+    ).all()
+    lines = [StockLine(row.product_id, row.product_variant_id, row.quantity, True) for row in rows]
+    return rows, lines
+
+
+def release_order_stock(order):
+    """Return an order's reserved stock to the shelf, at most once"""
+    table = StockReservation.__table__
+    rows, lines = _claim_reservations(table.c.order_id == order.id)
+
+    if not rows and not StockReservation.query.filter_by(order_id=order.id).count():
+        # Orders placed before reservations existed restock from their items
+        lines = [line for line in (stock_line_for(item) for item in order.items) if line]
+
+    increment_stock(lines)
+    return len(lines)
+
+
+def release_expired_reservations(now=None):
+    """Release holds past their payment deadline and cancel the unpaid orders
+
+    Returns the ids of the orders that were cancelled.
+    """
+    now = now or datetime.utcnow()
+    table = StockReservation.__table__
+    unpaid_orders = select(Order.id).where(
+        Order.status == OrderStatus.PLACED,
+        Order.payment_status == 'pending'
+    )
+    rows, lines = _claim_reservations(
+        table.c.status == StockReservation.HELD,
+        table.c.expires_at.isnot(None),
+        table.c.expires_at < now,
+        table.c.order_id.in_(unpaid_orders)
+    )
+    increment_stock(lines)
+
+    order_ids = {row.order_id for row in rows}
+    if order_ids:
+        for order in Order.query.filter(Order.id.in_(order_ids)):
+            previous_status = order.status
+            order.status = OrderStatus.CANCELLED
+            order.cancelled_at = now
+            order.admin_notes = 'Cancelled automatically: payment not received in time'
+            record_order_status_change(order, previous_status)
+
+    return order_ids
+
+
+@event.listens_for(Session, 'before_commit')
+def _collect_stock_cache_tags(session):
+    # Tags need each product's category and collection, which can only be read before commit
+    product_ids = session.info.pop('stock_changed_products', None)
+    if product_ids:
+        rows = session.execute(
+            select(Product.id, Product.category_id, Product.collection_id).where(Product.id.in_(product_ids))
+        )
+        session.info.setdefault('stock_cache_tags', set()).update(*(product_cache_tags(row) for row in rows))
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_stock_cache_after_commit(session):
+    tags = session.info.pop('stock_cache_tags', None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stock_changes(session):
+    session.info.pop('stock_changed_products', None)
+    session.info.pop('stock_cache_tags', None)
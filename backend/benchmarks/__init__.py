@@ -0,0 +1,10 @@
+"""Request-level benchmarks against a seeded synthetic store
+
+Run from the backend directory:
+
+    python -m benchmarks run --products 500 --users 100 --output before.json
+    python -m benchmarks run --database postgresql://localhost/nakhrali_bench --reset --output after.json
+    python -m benchmarks compare before.json after.json
+
+See benchmarks/README.md.
+"""
@@ -0,0 +1,96 @@
+import argparse
+import os
+import sys
+
+
+def _run(args):
+    from benchmarks.app import make_app, prepare_database
+    from benchmarks.dataset import DatasetSpec, seed
+    from benchmarks.runner import run, save_report
+    from benchmarks.scenarios import SCENARIOS
+
+    if args.no_cache:
+        os.environ['BENCHMARK_CACHE_TYPE'] = 'null'
+    unknown = set(args.scenarios or ()) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Choose from {', '.join(SCENARIOS)}")
+
+    app = make_app(args.database)
+    prepare_database(app, reset=args.reset)
+
+    spec = DatasetSpec(
+        products=args.products, images=args.images, variants=args.variants, reviews=args.reviews,
+        users=args.users, cart_items=args.cart_items, orders=args.orders, order_items=args.order_items
+    )
+    print(f"Seeding {spec.products} products and {spec.users} users...", file=sys.stderr)
+    with app.app_context():
+        dataset = seed(spec, seed=args.seed)
+
+    report = run(
+        app, dataset, scenarios=args.scenarios, iterations=args.iterations,
+        warmup=args.warmup, allocation_samples=args.allocation_samples, seed=args.seed
+    )
+
+    print(f"{'scenario':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'alloc KiB':>10} {'errors':>7}")
+    for name, result in report['scenarios'].items():
+        latency = result['latency_ms']
+        print(
+            f"{name:<16} {latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f} "
+            f"{result['queries']['p50']:>8g} {result['peak_alloc_kib'].get('p50', 0):>10.1f} {result['errors']:>7}"
+        )
+
+    if args.output:
+        save_report(report, args.output)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+
+def _compare(args):
+    from benchmarks.runner import compare, load_report
+
+    rows, regressed = compare(load_report(args.baseline), load_report(args.current), args.threshold)
+    print(f"{'scenario':<16} {'p95 latency ms':<32} {'queries p50':<24} {'peak alloc KiB p50':<32} regressed")
+    for row in rows:
+        print(f"{row[0]:<16} {row[1]:<32} {row[2]:<24} {row[3]:<32} {row[4]}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Request-level benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Seed a database and run the scenarios')
+    run_parser.add_argument('--database', default='sqlite:////tmp/nakhrali-benchmark.db',
+                            help='SQLAlchemy URL of an empty database (default: a SQLite file in /tmp)')
+    run_parser.add_argument('--reset', action='store_true', help='Drop any existing schema first')
+    run_parser.add_argument('--products', type=int, default=500)
+    run_parser.add_argument('--images', type=int, default=3, help='Images per product')
+    run_parser.add_argument('--variants', type=int, default=2, help='Variants per product')
+    run_parser.add_argument('--reviews', type=int, default=5, help='Reviews per product')
+    run_parser.add_argument('--users', type=int, default=100)
+    run_parser.add_argument('--cart-items', type=int, default=2, help='Items in each seeded cart')
+    run_parser.add_argument('--orders', type=int, default=3, help='Past orders per user')
+    run_parser.add_argument('--order-items', type=int, default=2, help='Items per past order')
+    run_parser.add_argument('--scenarios', nargs='+', help='Scenarios to run (default: all)')
+    run_parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario')
+    run_parser.add_argument('--warmup', type=int, default=20)
+    run_parser.add_argument('--allocation-samples', type=int, default=25,
+                            help='Requests per scenario traced for allocations (0 to skip)')
+    run_parser.add_argument('--no-cache', action='store_true', help='Disable the response cache')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', help='Write the JSON report here')
+
+    compare_parser = commands.add_parser('compare', help='Diff two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='Percent growth in p95 latency or allocations that counts as a regression')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        _run(args)
+        return 0
+    return _compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
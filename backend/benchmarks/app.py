@@ -0,0 +1,70 @@
+import os
+import uuid
+from sqlalchemy import inspect, text
+from sqlalchemy.sql import sqltypes
+
+
+def _accept_uuid_strings():
+    """Let SQLite bind UUID strings the way psycopg2 does on Postgres
+
+    Views pass JWT identities and URL ids straight into filters as strings.
+    Postgres casts them; SQLAlchemy's non-native UUID type on SQLite expects
+    uuid.UUID objects, so coerce strings first.
+    """
+    if getattr(sqltypes.Uuid.bind_processor, '_accepts_strings', False):
+        return
+    original = sqltypes.Uuid.bind_processor
+
+    def bind_processor(self, dialect):
+        process = original(self, dialect)
+        if process is None:
+            return None
+
+        def coerce(value):
+            if isinstance(value, str):
+                value = uuid.UUID(value)
+            return process(value)
+        return coerce
+
+    bind_processor._accepts_strings = True
+    sqltypes.Uuid.bind_processor = bind_processor
+
+
+def make_app(database_url):
+    """The real application under BenchmarkConfig, bound to database_url"""
+    # BenchmarkConfig reads these when app.config is first imported
+    os.environ['BENCHMARK_DATABASE_URL'] = database_url
+    from app import create_app
+
+    if not database_url.startswith('postgresql'):
+        _accept_uuid_strings()
+    return create_app('benchmark')
+
+
+def prepare_database(app, reset=False):
+    """Create the schema in an empty database
+
+    Postgres is migrated so the search trigger and partial indexes match
+    production; other databases get create_all. An existing schema is only
+    dropped when reset is set.
+    """
+    from app import db
+
+    with app.app_context():
+        existing = inspect(db.engine).get_table_names()
+        if existing and not reset:
+            raise RuntimeError(
+                f"{db.engine.url.render_as_string(hide_password=True)} already has tables; "
+                "point the benchmark at an empty database or pass --reset"
+            )
+
+        if db.engine.dialect.name == 'postgresql':
+            if existing:
+                with db.engine.begin() as connection:
+                    connection.execute(text('DROP SCHEMA public CASCADE'))
+                    connection.execute(text('CREATE SCHEMA public'))
+            from flask_migrate import upgrade
+            upgrade(directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+        else:
+            db.drop_all()
+            db.create_all()
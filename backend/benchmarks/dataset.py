@@ -0,0 +1,195 @@
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import db
+from app.models.product import Category, Collection, Product, ProductImage, ProductVariant
+from app.models.review import Review
+from app.models.user import User, UserAddress
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment
+
+CATEGORIES = ['Rings', 'Earrings', 'Necklaces', 'Bangles', 'Bracelets', 'Bridal', 'Everyday']
+COLLECTIONS = ['Festive', 'Heritage', 'Minimal']
+MATERIALS = ['Gold', 'Silver', 'Rose Gold', 'Platinum', 'Kundan', 'Oxidised Silver']
+STYLES = ['Traditional', 'Modern', 'Fusion']
+OCCASIONS = ['Bridal', 'Casual', 'Party', 'Festive']
+ADJECTIVES = ['Classic', 'Royal', 'Floral', 'Twisted', 'Delicate', 'Statement', 'Temple', 'Antique']
+KINDS = {
+    'Rings': 'Ring', 'Earrings': 'Jhumka', 'Necklaces': 'Necklace', 'Bangles': 'Bangle',
+    'Bracelets': 'Bracelet', 'Bridal': 'Choker', 'Everyday': 'Stud'
+}
+ORDER_STATUSES = [OrderStatus.DELIVERED, OrderStatus.DELIVERED, OrderStatus.SHIPPED, OrderStatus.CONFIRMED, OrderStatus.CANCELLED]
+SEARCH_TERMS = ['gold', 'silver ring', 'jhumka', 'bridal choker', 'temple necklace', 'rose gold', 'kundan']
+
+DatasetSpec = namedtuple('DatasetSpec', [
+    'products', 'images', 'variants', 'reviews', 'users', 'cart_items', 'orders', 'order_items'
+])
+DatasetSpec.__new__.__defaults__ = (500, 3, 2, 5, 100, 2, 3, 2)
+
+Dataset = namedtuple('Dataset', ['spec', 'category_ids', 'product_ids', 'user_ids', 'address_ids', 'search_terms'])
+
+BATCH_SIZE = 500
+
+
+def _flush_batch(objects):
+    db.session.add_all(objects)
+    db.session.commit()
+    objects.clear()
+
+
+def seed(spec=DatasetSpec(), seed=42):
+    """Seed a synthetic catalog, customers, carts and order history
+
+    Everything is derived from the seed, so two runs with the same spec
+    produce the same data. Products get enough stock that checkout
+    scenarios never run out.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    categories = [Category(name=name, slug=name.lower(), sort_order=i) for i, name in enumerate(CATEGORIES)]
+    collections = [Collection(name=name, slug=name.lower()) for name in COLLECTIONS]
+    db.session.add_all(categories + collections)
+    db.session.commit()
+
+    products = []
+    pending = []
+    for i in range(spec.products):
+        category = rng.choice(categories)
+        material = rng.choice(MATERIALS)
+        name = f"{rng.choice(ADJECTIVES)} {material} {KINDS[category.name]} {i}"
+        price = Decimal(rng.randrange(500, 50000)).quantize(Decimal('0.01'))
+        product = Product(
+            name=name,
+            sku=f"BENCH-{i:06d}",
+            short_description=f"{material} {KINDS[category.name].lower()} for {rng.choice(OCCASIONS).lower()} wear",
+            description=f"Handcrafted {material.lower()} {KINDS[category.name].lower()} in a {rng.choice(STYLES).lower()} style.",
+            price=price,
+            compare_at_price=price * Decimal('1.2') if rng.random() < 0.3 else None,
+            material=material,
+            style=rng.choice(STYLES),
+            occasion=rng.choice(OCCASIONS),
+            tags=[category.slug, material.lower()],
+            stock_quantity=1000000,
+            is_featured=rng.random() < 0.05,
+            category_id=category.id,
+            collection_id=rng.choice(collections).id if rng.random() < 0.4 else None,
+            created_at=now - timedelta(minutes=spec.products - i)
+        )
+        products.append(product)
+        pending.append(product)
+        if len(pending) >= BATCH_SIZE:
+            _flush_batch(pending)
+    _flush_batch(pending)
+
+    for product in products:
+        for j in range(spec.images):
+            pending.append(ProductImage(
+                product_id=product.id,
+                image_url=f"https://images.example.com/{product.sku}/{j}.jpg",
+                alt_text=product.name,
+                is_primary=(j == 0),
+                sort_order=j
+            ))
+        for j in range(spec.variants):
+            pending.append(ProductVariant(
+                product_id=product.id,
+                name='Size',
+                value=str(j + 6),
+                sku=f"{product.sku}-{j}",
+                stock_quantity=1000000
+            ))
+        if len(pending) >= BATCH_SIZE:
+            _flush_batch(pending)
+    _flush_batch(pending)
+
+    users = []
+    for i in range(spec.users):
+        user = User(
+            email=f"bench{i}@example.com",
+            password='benchmark-password',
+            first_name='Bench',
+            last_name=f"User{i}"
+        )
+        user.is_verified = True
+        users.append(user)
+        pending.append(user)
+        if len(pending) >= BATCH_SIZE:
+            _flush_batch(pending)
+    _flush_batch(pending)
+
+    addresses = []
+    for user in users:
+        address = UserAddress(
+            user_id=user.id, first_name=user.first_name, last_name=user.last_name,
+            phone='9999999999', address_line1='1 Benchmark Lane', city='Jaipur',
+            state='Rajasthan', postal_code='302001', is_default=True
+        )
+        addresses.append(address)
+        pending.append(address)
+    _flush_batch(pending)
+
+    if spec.reviews and users:
+        for product in products:
+            for user in rng.sample(users, min(spec.reviews, len(users))):
+                pending.append(Review(
+                    user_id=user.id, product_id=product.id, rating=rng.randint(1, 5),
+                    title='Lovely piece', comment='Exactly as pictured.'
+                ))
+            if len(pending) >= BATCH_SIZE:
+                _flush_batch(pending)
+        _flush_batch(pending)
+        Product.refresh_rating_stats()
+        db.session.commit()
+
+    order_number = 0
+    for user, address in zip(users, addresses):
+        cart = Cart(user_id=user.id)
+        db.session.add(cart)
+        db.session.flush()
+        for product in rng.sample(products, min(spec.cart_items, len(products))):
+            db.session.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=1, unit_price=product.price))
+        db.session.flush()
+        cart.calculate_totals()
+
+        for _ in range(spec.orders):
+            order_number += 1
+            lines = rng.sample(products, min(spec.order_items, len(products)))
+            subtotal = sum((product.price for product in lines), Decimal('0'))
+            placed_at = now - timedelta(days=rng.randrange(1, 180), minutes=rng.randrange(1440))
+            order = Order(
+                order_number=f"NKBENCH{order_number:08d}",
+                user_id=user.id,
+                status=rng.choice(ORDER_STATUSES),
+                subtotal=subtotal,
+                total_amount=subtotal,
+                payment_method='COD',
+                payment_status='paid',
+                shipping_address_id=address.id,
+                billing_address_id=address.id,
+                placed_at=placed_at,
+                created_at=placed_at
+            )
+            db.session.add(order)
+            db.session.flush()
+            for product in lines:
+                db.session.add(OrderItem(
+                    order_id=order.id, product_id=product.id, product_name=product.name,
+                    product_sku=product.sku, quantity=1, unit_price=product.price, total_price=product.price
+                ))
+            db.session.add(Payment(
+                user_id=user.id, order_id=order.id, amount=subtotal,
+                payment_method='COD', payment_status='success', created_at=placed_at
+            ))
+        db.session.commit()
+
+    return Dataset(
+        spec=spec,
+        category_ids=[str(category.id) for category in categories],
+        product_ids=[str(product.id) for product in products],
+        user_ids=[str(user.id) for user in users],
+        address_ids={str(user.id): str(address.id) for user, address in zip(users, addresses)},
+        search_terms=SEARCH_TERMS
+    )
@@ -0,0 +1,199 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+import sqlalchemy
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import db
+from benchmarks.scenarios import SCENARIOS
+
+
+class QueryCounter:
+    """Counts statements run on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+class BenchmarkContext:
+    """Seeded dataset plus per-user auth headers, shared by the scenarios"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._headers = {}
+
+    def next_user(self, rng):
+        return rng.choice(self.dataset.user_ids)
+
+    def auth_headers(self, user_id):
+        if user_id not in self._headers:
+            self._headers[user_id] = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+        return self._headers[user_id]
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    if len(values) == 1:
+        value = round(values[0], 3)
+        return {'p50': value, 'p95': value, 'p99': value, 'mean': value, 'max': value}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {
+        'p50': round(cuts[49], 3),
+        'p95': round(cuts[94], 3),
+        'p99': round(cuts[98], 3),
+        'mean': round(statistics.fmean(values), 3),
+        'max': round(max(values), 3)
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(app, context, build, iterations, warmup, allocation_samples, seed):
+    """Time one scenario; returns its latency, query and allocation summary"""
+    rng = random.Random(seed)
+    client = app.test_client()
+    latencies = []
+    queries = []
+    allocations = []
+    statuses = Counter()
+
+    for _ in range(warmup):
+        build(client, context, rng)()
+
+    for _ in range(iterations):
+        request = build(client, context, rng)
+        with QueryCounter(db.engine) as counter:
+            started = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - started
+        latencies.append(elapsed * 1000)
+        queries.append(counter.count)
+        statuses[str(response.status_code)] += 1
+
+    # Separate pass: tracing allocations slows requests down too much to time them
+    if allocation_samples:
+        tracemalloc.start()
+        try:
+            for _ in range(allocation_samples):
+                request = build(client, context, rng)
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                request()
+                _, peak = tracemalloc.get_traced_memory()
+                allocations.append((peak - before) / 1024)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'requests': iterations,
+        'errors': sum(count for status, count in statuses.items() if not status.startswith('2')),
+        'status_codes': dict(statuses),
+        'latency_ms': _percentiles(latencies),
+        'queries': _percentiles(queries),
+        'peak_alloc_kib': _percentiles(allocations)
+    }
+
+
+def run(app, dataset, scenarios=None, iterations=200, warmup=20, allocation_samples=25, seed=42):
+    """Run the scenarios against the app and return the JSON-ready report"""
+    context = BenchmarkContext(dataset)
+    results = {}
+    with app.app_context():
+        for index, name in enumerate(scenarios or SCENARIOS):
+            results[name] = run_scenario(
+                app, context, SCENARIOS[name], iterations, warmup, allocation_samples, seed + index
+            )
+            db.session.remove()
+        dialect = db.engine.dialect.name
+
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'database': dialect,
+            'cache': app.config.get('CACHE_TYPE'),
+            'dataset': dataset.spec._asdict(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'allocation_samples': allocation_samples,
+            'seed': seed
+        },
+        'scenarios': results
+    }
+
+
+def compare(baseline, current, threshold=10.0):
+    """Rows comparing two reports, and whether any scenario regressed
+
+    A scenario regresses when its p95 latency or median peak allocation
+    grows by more than threshold percent, or its median query count grows
+    at all.
+    """
+    rows = []
+    regressed = False
+    for name, now in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            rows.append((name, 'new', '', '', ''))
+            continue
+
+        def change(section, stat):
+            old = before[section].get(stat)
+            new = now[section].get(stat)
+            if old is None or new is None:
+                return None, ''
+            percent = ((new - old) / old * 100) if old else (0.0 if new == old else float('inf'))
+            return percent, f"{old:g} -> {new:g} ({percent:+.1f}%)"
+
+        latency, latency_text = change('latency_ms', 'p95')
+        queries, queries_text = change('queries', 'p50')
+        allocation, allocation_text = change('peak_alloc_kib', 'p50')
+        flags = []
+        if latency is not None and latency > threshold:
+            flags.append('latency')
+        if queries is not None and queries > 0:
+            flags.append('queries')
+        if allocation is not None and allocation > threshold:
+            flags.append('allocations')
+        regressed = regressed or bool(flags)
+        rows.append((name, latency_text, queries_text, allocation_text, ', '.join(flags)))
+    return rows, regressed
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,65 @@
+"""Scripted shopper journeys
+
+Each scenario takes (client, context, rng), runs any untimed setup through
+the client and returns a zero-argument callable that issues the one request
+being measured.
+"""
+
+
+def browse_listing(client, context, rng):
+    params = {'page': rng.randint(1, 5), 'per_page': 20}
+    if rng.random() < 0.5:
+        params['category_id'] = rng.choice(context.dataset.category_ids)
+    if rng.random() < 0.3:
+        params['sort_by'] = rng.choice(['price', 'name'])
+    return lambda: client.get('/api/products/', query_string=params)
+
+
+def product_detail(client, context, rng):
+    product_id = rng.choice(context.dataset.product_ids)
+    return lambda: client.get(f'/api/products/{product_id}')
+
+
+def search(client, context, rng):
+    term = rng.choice(context.dataset.search_terms)
+    return lambda: client.get('/api/products/search', query_string={'q': term, 'per_page': 20})
+
+
+def add_to_cart(client, context, rng):
+    user_id = context.next_user(rng)
+    headers = context.auth_headers(user_id)
+    # Keep carts small so the scenario measures adding, not an ever-growing cart
+    client.delete('/api/cart/clear', headers=headers)
+    body = {'product_id': rng.choice(context.dataset.product_ids), 'quantity': 1}
+    return lambda: client.post('/api/cart/add', json=body, headers=headers)
+
+
+def checkout(client, context, rng):
+    user_id = context.next_user(rng)
+    headers = context.auth_headers(user_id)
+    client.delete('/api/cart/clear', headers=headers)
+    for product_id in rng.sample(context.dataset.product_ids, 2):
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+    body = {'shipping_address_id': context.dataset.address_ids[user_id], 'payment_method': 'COD'}
+    return lambda: client.post('/api/orders/create', json=body, headers=headers)
+
+
+def order_history(client, context, rng):
+    headers = context.auth_headers(context.next_user(rng))
+    return lambda: client.get('/api/orders/', query_string={'per_page': 10}, headers=headers)
+
+
+def cart_view(client, context, rng):
+    headers = context.auth_headers(context.next_user(rng))
+    return lambda: client.get('/api/cart/', headers=headers)
+
+
+SCENARIOS = {
+    'browse_listing': browse_listing,
+    'product_detail': product_detail,
+    'search': search,
+    'add_to_cart': add_to_cart,
+    'cart_view': cart_view,
+    'checkout': checkout,
+    'order_history': order_history,
+}
@@ -0,0 +1,5 @@
+from app import create_app, jobs
+
+# Entry point for `celery -A celery_worker.celery worker` and `... beat`
+app = create_app()
+celery = jobs.celery
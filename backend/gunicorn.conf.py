@@ -0,0 +1,24 @@
+import os
+import shutil
+import tempfile
+
+# Bind, workers and threads come from the command line (Procfile / Dockerfile)
+
+# Prometheus multiprocess mode: each worker writes its samples here and
+# /api/health/metrics aggregates them. Must be set before workers import the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'nakhrali-metrics'))
+
+
+def on_starting(server):
+    # Samples left over from a previous master would be added to the new totals
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -97,14 +97,28 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        is_postgres = connection.dialect.name == 'postgresql'
+        if is_postgres:
+            # The app engine sets DB_STATEMENT_TIMEOUT_MS for requests; index
+            # builds and backfills must be allowed to run to completion
+            connection.exec_driver_sql('SET statement_timeout = 0')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
             **conf_args
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if is_postgres:
+                # Pooled connections go back with the request timeout
+                connection.rollback()
+                connection.exec_driver_sql('RESET statement_timeout')
+                connection.commit()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,46 @@
+"""Product rating aggregates
+
+Revision ID: 3b8e1c2d9a47
+Revises: f49ca041a35c
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1c2d9a47'
+down_revision = 'f49ca041a35c'
+branch_labels = None
+depends_on = None
+
+
+RATING_COLUMNS = ['rating_count', 'rating_sum'] + [f'rating_{rating}_count' for rating in range(1, 6)]
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        for column in RATING_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the approved reviews that already exist
+    histogram = ',\n'.join(
+        f"        rating_{rating}_count = (SELECT COUNT(*) FROM reviews r "
+        f"WHERE r.product_id = products.id AND r.is_approved AND r.rating = {rating})"
+        for rating in range(1, 6)
+    )
+    op.execute(f"""
+        UPDATE products SET
+        rating_count = (SELECT COUNT(*) FROM reviews r
+                        WHERE r.product_id = products.id AND r.is_approved),
+        rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r
+                      WHERE r.product_id = products.id AND r.is_approved),
+{histogram}
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        for column in reversed(RATING_COLUMNS):
+            batch_op.drop_column(column)
@@ -0,0 +1,70 @@
+"""Product full-text search vector
+
+Revision ID: 7c4f2a9e1d58
+Revises: 3b8e1c2d9a47
+Create Date: 2026-10-18 11:40:05.502913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4f2a9e1d58'
+down_revision = '3b8e1c2d9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Non-Postgres databases use the ILIKE fallback in app.utils.search
+        with op.batch_alter_table('products', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_vector', sa.Text(), nullable=True))
+        return
+
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Name and tags rank above attributes, which rank above the descriptions
+    op.execute("""
+        CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(
+                    CASE WHEN json_typeof(NEW.tags) = 'array'
+                         THEN (SELECT string_agg(tag, ' ') FROM json_array_elements_text(NEW.tags) AS tag)
+                    END, '')), 'A') ||
+                setweight(to_tsvector('english', concat_ws(' ', NEW.material, NEW.occasion, NEW.style)), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'C') ||
+                setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER products_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, tags, material, occasion, style, short_description, description
+        ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """)
+
+    # Populate existing rows through the trigger
+    op.execute("UPDATE products SET name = name")
+
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_products_search_vector', table_name='products')
+        op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+        op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+        op.drop_column('products', 'search_vector')
+        return
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('search_vector')
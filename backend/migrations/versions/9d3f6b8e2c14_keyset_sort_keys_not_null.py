@@ -0,0 +1,42 @@
+"""Keyset sort keys not null
+
+Revision ID: 9d3f6b8e2c14
+Revises: e1a7c3f95b26
+Create Date: 2026-10-18 17:21:36.904152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f6b8e2c14'
+down_revision = 'e1a7c3f95b26'
+branch_labels = None
+depends_on = None
+
+# Keyset pagination seeks past (sort key, id); a NULL key drops out of every comparison
+CREATED_AT_TABLES = ('products', 'reviews', 'orders')
+
+
+def upgrade():
+    op.execute("UPDATE products SET sort_order = 0 WHERE sort_order IS NULL")
+    for table in CREATED_AT_TABLES:
+        op.execute(f"UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.alter_column('sort_order', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+    for table in CREATED_AT_TABLES[1:]:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(CREATED_AT_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.alter_column('sort_order', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,65 @@
+"""Composite and partial indexes for hot query shapes
+
+Revision ID: c5e9b7d40f13
+Revises: a2d6e8f31c70
+Create Date: 2026-10-18 13:42:17.650931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9b7d40f13'
+down_revision = 'a2d6e8f31c70'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra kwargs) matching the filters and orderings in app/api
+INDEXES = [
+    ('ix_products_active_category_created', 'products', ['is_active', 'category_id', 'created_at'], {}),
+    ('ix_products_active_collection_created', 'products', ['is_active', 'collection_id', 'created_at'], {}),
+    ('ix_product_images_product_sort', 'product_images', ['product_id', 'sort_order'], {}),
+    ('ix_product_variants_product_id', 'product_variants', ['product_id'], {}),
+    ('ix_reviews_product_approved_created', 'reviews', ['product_id', 'is_approved', 'created_at'], {}),
+    ('ix_reviews_user_created', 'reviews', ['user_id', 'created_at'], {}),
+    ('ix_orders_user_created', 'orders', ['user_id', 'created_at'], {}),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], {}),
+    ('ix_payments_order_id', 'payments', ['order_id'], {}),
+    ('ix_carts_user_active', 'carts', ['user_id'], {
+        'postgresql_where': sa.text('is_active = true'),
+        'sqlite_where': sa.text('is_active = 1')
+    }),
+    ('ix_cart_items_cart_id', 'cart_items', ['cart_id'], {}),
+    ('ix_wishlists_user_id', 'wishlists', ['user_id'], {}),
+    ('ix_wishlist_items_wishlist_product', 'wishlist_items', ['wishlist_id', 'product_id'], {}),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], {}),
+    ('ix_coupon_usages_coupon_user', 'coupon_usages', ['coupon_id', 'user_id'], {}),
+    ('ix_user_addresses_user_id', 'user_addresses', ['user_id'], {}),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Build concurrently so live tables are not locked against writes
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, **kwargs)
+        return
+
+    for name, table, columns, kwargs in INDEXES:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        return
+
+    for name, table, columns, kwargs in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,82 @@
+"""Admin dashboard rollups
+
+Revision ID: e1a7c3f95b26
+Revises: c5e9b7d40f13
+Create Date: 2026-10-18 15:08:52.384117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a7c3f95b26'
+down_revision = 'c5e9b7d40f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_rollups',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('discount_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('coupon_orders', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket_start', 'status', name='uq_sales_rollups_bucket_status')
+    )
+    op.create_table('product_sales_rollups',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('bucket_date', sa.Date(), nullable=False),
+    sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('category_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_date', 'product_id', name='uq_product_sales_rollups_date_product')
+    )
+    with op.batch_alter_table('product_sales_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_product_sales_rollups_date_category', ['bucket_date', 'category_id'], unique=False)
+
+    op.create_table('coupon_rollups',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('bucket_date', sa.Date(), nullable=False),
+    sa.Column('coupon_code', sa.String(length=50), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('discount_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_date', 'coupon_code', name='uq_coupon_rollups_date_code')
+    )
+    op.create_table('payment_rollups',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('bucket_date', sa.Date(), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('payment_status', sa.String(length=20), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_date', 'payment_method', 'payment_status', name='uq_payment_rollups_date_method_status')
+    )
+
+
+def downgrade():
+    op.drop_table('payment_rollups')
+    op.drop_table('coupon_rollups')
+    with op.batch_alter_table('product_sales_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_sales_rollups_date_category')
+
+    op.drop_table('product_sales_rollups')
+    op.drop_table('sales_rollups')
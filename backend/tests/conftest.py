@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db as _db
+from app.models.user import User, UserAddress
+from benchmarks.app import _accept_uuid_strings
+
+# Views filter by JWT identities and URL ids as strings, which Postgres casts
+_accept_uuid_strings()
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(db):
+    """Context manager collecting the SQL statements executed inside it"""
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    return counter
+
+
+@pytest.fixture
+def customer(db):
+    """A customer with a default delivery address"""
+    user = User(email='buyer@example.com', password='a-long-password', first_name='Asha', last_name='Rao')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserAddress(
+        user_id=user.id, is_default=True, first_name='Asha', last_name='Rao', phone='9876543210',
+        address_line1='12 MG Road', city='Bengaluru', state='Karnataka', postal_code='560001'
+    ))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization headers carrying an access token for a user"""
+
+    def headers(user):
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    return headers
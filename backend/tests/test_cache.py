@@ -0,0 +1,24 @@
+import time
+from app.utils.cache import SimpleCacheBackend
+
+
+def test_simple_cache_evicts_least_recently_used():
+    cache = SimpleCacheBackend(max_entries=2)
+    cache.set('a', 1, 60, tags=('listing:all',))
+    cache.set('b', 2, 60, tags=('listing:all',))
+    cache.get('a')
+    cache.set('c', 3, 60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache._tags == {'listing:all': {'a'}}
+
+
+def test_simple_cache_sweeps_expired_entries_and_their_tags():
+    cache = SimpleCacheBackend(sweep_interval=0)
+    cache.set('old', 1, 0.01, tags=('product:1',))
+    time.sleep(0.02)
+    cache.set('new', 2, 60)
+
+    assert list(cache._entries) == ['new']
+    assert cache._tags == {}
@@ -0,0 +1,81 @@
+from decimal import Decimal
+import pytest
+from app.models.cart import Cart, CartItem
+from app.models.product import Category, Product, ProductImage, ProductVariant
+
+
+@pytest.fixture
+def rings(db):
+    """Four rings, each with two images; the second image is the primary one"""
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    products = []
+    for i in range(4):
+        product = Product(
+            name=f'Ring {i}', sku=f'RING-{i}', price=Decimal('1000.00'), weight=Decimal('2.5'),
+            category_id=category.id, stock_quantity=10
+        )
+        db.session.add(product)
+        db.session.flush()
+        db.session.add_all([
+            ProductImage(product_id=product.id, image_url=f'/ring-{i}-side.jpg', sort_order=0),
+            ProductImage(product_id=product.id, image_url=f'/ring-{i}.jpg', sort_order=1, is_primary=True),
+        ])
+        products.append(product)
+    db.session.add(ProductVariant(
+        product_id=products[0].id, name='Size', value='18', price_adjustment=Decimal('500.00'), stock_quantity=1
+    ))
+    db.session.commit()
+    return products
+
+
+def _fill_cart(db, user, products):
+    cart = Cart(user_id=user.id)
+    db.session.add(cart)
+    db.session.flush()
+    for product in products:
+        variant = product.variants.first()
+        db.session.add(CartItem(
+            cart_id=cart.id, product_id=product.id, product_variant=variant,
+            quantity=2, unit_price=product.price
+        ))
+    db.session.commit()
+
+
+def _get_cart(client, headers, count_queries):
+    with count_queries() as statements:
+        response = client.get('/api/cart/', headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+def test_cart_query_count_does_not_grow_with_items(db, client, customer, rings, auth_headers, count_queries):
+    headers = auth_headers(customer)
+    _fill_cart(db, customer, rings[:1])
+    _, one_item = _get_cart(client, headers, count_queries)
+
+    Cart.query.filter_by(user_id=customer.id).update({'is_active': False})
+    _fill_cart(db, customer, rings)
+    body, four_items = _get_cart(client, headers, count_queries)
+
+    assert len(body['items']) == 4
+    assert four_items == one_item <= 3
+
+
+def test_cart_totals_and_items_come_from_the_joined_rows(db, client, customer, rings, auth_headers, count_queries):
+    _fill_cart(db, customer, rings[:2])
+
+    body, _ = _get_cart(client, auth_headers(customer), count_queries)
+
+    first, second = body['items']
+    assert first['product']['main_image'] == '/ring-0.jpg'
+    assert first['product_variant']['value'] == '18'
+    assert first['total_price'] == 3000.0
+    # Two of the one-off size 18 variant are not in stock
+    assert first['is_available'] is False
+    assert second['product_variant'] is None and second['is_available'] is True
+    assert body['cart']['total_items'] == 4
+    assert body['cart']['total_weight'] == 10.0
+    assert body['totals']['subtotal'] == 5000.0
+    assert body['totals']['shipping_amount'] == 0
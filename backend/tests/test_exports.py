@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Category, Product
+from app.models.user import User
+from app.utils.exports import ORDER_EXPORT_COLUMNS, stream_orders_ndjson
+
+
+@pytest.fixture
+def admin(db):
+    user = User(email='admin@example.com', password='a-long-password', first_name='Meera', last_name='Nair', role='admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def orders(db, customer):
+    """Five orders a day apart, oldest first, with i + 1 items each; the last is cancelled"""
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name='Ring', sku='RING-1', price=Decimal('500.00'), category_id=category.id)
+    db.session.add(product)
+    db.session.flush()
+    start = datetime(2026, 3, 1)
+    orders = []
+    for i in range(5):
+        order = Order(
+            user_id=customer.id, payment_method='COD', created_at=start + timedelta(days=i),
+            status=OrderStatus.CANCELLED if i == 4 else OrderStatus.PLACED,
+            subtotal=Decimal('500.00') * (i + 1), total_amount=Decimal('500.00') * (i + 1)
+        )
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(
+            order_id=order.id, product_id=product.id, product_name=product.name,
+            quantity=i + 1, unit_price=Decimal('500.00'), total_price=Decimal('500.00') * (i + 1)
+        ))
+        orders.append(order)
+    db.session.commit()
+    return [order.order_number for order in orders]
+
+
+def test_ndjson_export_streams_every_order_oldest_first(client, admin, orders, auth_headers):
+    response = client.get('/api/admin/admin/orders/export', headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'].endswith('.ndjson')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['order_number'] for row in rows] == orders
+    assert [row['total_items'] for row in rows] == [1, 2, 3, 4, 5]
+
+
+def test_csv_export_applies_status_and_date_filters(client, admin, orders, auth_headers):
+    response = client.get(
+        '/api/admin/admin/orders/export?format=csv&status=placed&date_from=2026-03-02',
+        headers=auth_headers(admin)
+    )
+
+    assert response.mimetype == 'text/csv'
+    reader = csv.DictReader(io.StringIO(response.get_data(as_text=True)))
+    assert reader.fieldnames == ORDER_EXPORT_COLUMNS
+    rows = list(reader)
+    assert [row['order_number'] for row in rows] == orders[1:4]
+    assert [row['total_items'] for row in rows] == ['2', '3', '4']
+    assert rows[0]['status'] == 'placed'
+
+
+def test_export_rejects_bad_requests(client, admin, customer, orders, auth_headers):
+    headers = auth_headers(admin)
+
+    assert client.get('/api/admin/admin/orders/export?format=xml', headers=headers).status_code == 400
+    assert client.get('/api/admin/admin/orders/export?status=lost', headers=headers).status_code == 400
+    assert client.get('/api/admin/admin/orders/export', headers=auth_headers(customer)).status_code == 403
+
+
+def test_export_queries_per_chunk_not_per_order(db, orders, count_queries):
+    query = Order.query.order_by(Order.created_at, Order.id)
+
+    with count_queries() as statements:
+        chunks = list(stream_orders_ndjson(query, chunk_size=2))
+
+    assert [chunk.count('\n') for chunk in chunks] == [2, 2, 1]
+    # The orders themselves, then one item count query per chunk
+    assert len(statements) == 1 + len(chunks)
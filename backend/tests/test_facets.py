@@ -0,0 +1,69 @@
+from decimal import Decimal
+import pytest
+from app.models.product import Category, Product
+
+
+@pytest.fixture
+def catalog(db):
+    """Rings and earrings across materials and prices, plus an inactive ring"""
+    rings = Category(name='Rings', slug='rings')
+    earrings = Category(name='Earrings', slug='earrings')
+    db.session.add_all([rings, earrings])
+    db.session.flush()
+    for sku, category, material, occasion, price, active in (
+        ('R1', rings, 'Gold', 'Wedding', '800.00', True),
+        ('R2', rings, 'Gold', None, '3000.00', True),
+        ('R3', rings, 'Silver', 'Daily', '1200.00', True),
+        ('R4', rings, 'Gold', 'Wedding', '60000.00', False),
+        ('E1', earrings, 'Gold', 'Daily', '30000.00', True),
+        ('E2', earrings, 'Silver', 'Daily', '700.00', True),
+    ):
+        db.session.add(Product(
+            name=f'Piece {sku}', sku=sku, price=Decimal(price), category_id=category.id,
+            material=material, occasion=occasion, is_active=active
+        ))
+    db.session.commit()
+    return rings, earrings
+
+
+def _counts(values):
+    return {item['value']: item['count'] for item in values}
+
+
+def test_facets_count_the_filtered_set(client, catalog, count_queries):
+    rings, _ = catalog
+    url = f'/api/products/facets?category_id={rings.id}'
+
+    with count_queries() as statements:
+        body = client.get(url).get_json()
+
+    assert len(statements) == 1
+    assert body['total'] == 3
+    assert _counts(body['facets']['material']) == {'Gold': 2, 'Silver': 1}
+    assert body['facets']['material'][0]['value'] == 'Gold'
+    assert _counts(body['facets']['occasion']) == {'Wedding': 1, 'Daily': 1}
+    assert _counts(body['facets']['category_id']) == {str(rings.id): 3}
+    assert body['facets']['collection_id'] == []
+    assert body['price_range'] == {'min': 800.0, 'max': 3000.0}
+    assert [bucket['count'] for bucket in body['price_buckets']] == [1, 1, 1, 0, 0, 0, 0]
+    assert body['price_buckets'][1] == {'min': 1000, 'max': 2500, 'count': 1}
+
+
+def test_facets_follow_attribute_and_price_filters(client, catalog):
+    rings, earrings = catalog
+
+    body = client.get('/api/products/facets?material=gold&min_price=1000').get_json()
+
+    assert body['total'] == 2
+    assert _counts(body['facets']['category_id']) == {str(rings.id): 1, str(earrings.id): 1}
+    assert body['price_range'] == {'min': 3000.0, 'max': 30000.0}
+    assert body['price_buckets'][-1] == {'min': 50000, 'max': None, 'count': 0}
+
+
+def test_facets_of_an_empty_set(client, catalog):
+    body = client.get('/api/products/facets?material=platinum').get_json()
+
+    assert body['total'] == 0
+    assert all(values == [] for values in body['facets'].values())
+    assert body['price_range'] == {'min': None, 'max': None}
+    assert sum(bucket['count'] for bucket in body['price_buckets']) == 0
@@ -0,0 +1,73 @@
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.utils.db_pool import TimedQueuePool, pool_status
+
+TOKEN = 'scrape-token'
+
+
+@pytest.fixture
+def metrics_token(app):
+    app.config['METRICS_TOKEN'] = TOKEN
+    return {'Authorization': f'Bearer {TOKEN}'}
+
+
+def test_pool_status_requires_the_metrics_token(client, metrics_token):
+    assert client.get('/api/health/pool').status_code == 401
+    assert client.get('/api/health/pool', headers={'Authorization': 'Bearer guess'}).status_code == 401
+
+    response = client.get('/api/health/pool', headers=metrics_token)
+
+    assert response.status_code == 200
+    assert {'pid', 'pool_class'} <= set(response.get_json())
+
+
+def test_pool_status_is_closed_without_a_configured_token(app, client):
+    app.config['METRICS_TOKEN'] = None
+
+    assert client.get('/api/health/pool').status_code == 403
+
+
+def test_pool_status_reports_saturation_and_checkout_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    status = pool_status(engine)
+    held.close()
+    engine.dispose()
+
+    assert status['checked_out'] == 1 and status['saturated'] is True
+    assert status['checkout_wait']['count'] == 2
+    assert status['checkout_wait']['timeouts'] == 1
+    assert status['checkout_wait']['max_ms'] >= 50
+
+
+def _samples(text, name):
+    return {
+        tuple(sorted(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples if sample.name == name
+    }
+
+
+def test_metrics_count_requests_cache_results_and_queries(client, metrics_token):
+    for _ in range(2):
+        assert client.get('/api/products/').status_code == 200
+    assert client.get('/api/health/metrics').status_code == 401
+
+    response = client.get('/api/health/metrics', headers=metrics_token)
+
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    listing = (('blueprint', 'products'), ('endpoint', 'products.get_products'))
+    assert _samples(text, 'http_requests_total')[listing + (('method', 'GET'), ('status', '200'))] == 2
+    lookups = _samples(text, 'response_cache_lookups_total')
+    assert lookups[listing + (('result', 'miss'),)] == 1
+    assert lookups[listing + (('result', 'hit'),)] == 1
+    assert _samples(text, 'db_queries_per_request_count')[listing] == 2
@@ -0,0 +1,154 @@
+import threading
+import time
+import uuid
+import pytest
+from app.utils import ids
+from app.utils.ids import (
+    EPOCH_MS, MAX_SEQUENCE, IdGenerator, UUID7Generator, decode_base32, encode_base32, id_timestamp,
+    new_uuid, set_uuid_factory, uuid7
+)
+
+
+class FrozenClock:
+    """Stands in for the time module with a clock the test moves by hand"""
+
+    def __init__(self, ms):
+        self.ms = ms
+
+    def time(self):
+        return self.ms / 1000
+
+    def time_ns(self):
+        return self.ms * 1_000_000
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FrozenClock(EPOCH_MS + 1_000_000)
+    monkeypatch.setattr(ids, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def generator(app):
+    app.config['ID_WORKER_ID'] = 7
+    return IdGenerator(app)
+
+
+def _worker(snowflake):
+    return (snowflake >> ids.SEQUENCE_BITS) & ids.MAX_WORKER_ID
+
+
+def test_snowflakes_increase_within_and_across_milliseconds(generator, clock):
+    first = [generator.next_id() for _ in range(3)]
+    clock.ms += 1
+    second = generator.next_id()
+
+    assert first == sorted(set(first))
+    assert first[1] - first[0] == 1
+    assert second > first[-1]
+    assert id_timestamp(second) == clock.ms
+    assert {_worker(snowflake) for snowflake in first + [second]} == {7}
+
+
+def test_snowflakes_stay_monotonic_when_the_clock_steps_back(generator, clock):
+    before = generator.next_id()
+    clock.ms -= 5000
+
+    after = generator.next_id()
+
+    assert after > before
+    assert id_timestamp(after) == id_timestamp(before)
+
+
+def test_exhausted_sequence_borrows_the_next_millisecond(generator, clock):
+    start = clock.ms
+    batch = [generator.next_id() for _ in range(MAX_SEQUENCE + 2)]
+
+    assert batch == sorted(set(batch))
+    assert id_timestamp(batch[MAX_SEQUENCE]) == start
+    assert id_timestamp(batch[-1]) == start + 1
+    assert batch[-1] & MAX_SEQUENCE == 0
+
+
+def test_snowflakes_are_unique_across_threads(generator):
+    generated = []
+
+    def work():
+        batch = [generator.next_id() for _ in range(2000)]
+        assert batch == sorted(batch)
+        generated.extend(batch)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(generated)) == 8000
+
+
+def test_readable_ids_sort_like_the_numbers_they_encode(generator, clock):
+    readable = []
+    for _ in range(3):
+        readable.append(generator.readable('NK'))
+        clock.ms += 40_000_000_000  # Far enough apart to change the leading digits
+
+    assert readable == sorted(readable)
+    assert all(len(value) == 15 and value.startswith('NK') for value in readable)
+    numbers = [decode_base32(value[2:]) for value in readable]
+    assert numbers == sorted(numbers)
+    assert encode_base32(numbers[0]) == readable[0][2:]
+    with pytest.raises(ValueError):
+        encode_base32(1 << 65)
+
+
+def test_worker_id_must_fit_its_bits(app):
+    app.config['ID_WORKER_ID'] = ids.MAX_WORKER_ID + 1
+
+    with pytest.raises(ValueError):
+        IdGenerator(app)
+
+
+def test_uuid7_layout_and_timestamp(clock):
+    value = UUID7Generator()()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert value.int >> 80 == clock.ms
+
+
+def test_uuid7_increase_within_and_across_milliseconds(clock):
+    generate = UUID7Generator()
+    burst = [generate() for _ in range(100)]
+    clock.ms += 1
+    later = generate()
+
+    assert burst == sorted(set(burst))
+    assert {value.int >> 80 for value in burst} == {clock.ms - 1}
+    assert later > burst[-1]
+    # A step back in time keeps counting on from the last millisecond
+    clock.ms -= 5000
+    assert generate() > later
+
+
+def test_uuid7_counter_overflow_borrows_the_next_millisecond(clock):
+    generate = UUID7Generator()
+    batch = [generate() for _ in range(0x1000 + 1)]
+
+    assert batch == sorted(set(batch))
+    assert batch[-1].int >> 80 == clock.ms + 1
+
+
+def test_new_rows_get_uuid7_keys_unless_configured_otherwise(app, db, customer):
+    assert customer.id.version == 7
+
+    app.config['PRIMARY_KEY_UUID_VERSION'] = 4
+    IdGenerator(app)
+    try:
+        assert new_uuid().version == 4
+    finally:
+        set_uuid_factory(uuid7)
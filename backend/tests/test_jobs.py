@@ -0,0 +1,75 @@
+import pytest
+from flask import Flask
+from app import jobs
+from app.config import DevelopmentConfig, ProductionConfig, TestingConfig
+from app.utils.jobs import JobQueue, MemoryIdempotencyStore
+
+calls = []
+
+
+class TransientError(Exception):
+    pass
+
+
+@jobs.task(autoretry_for=(TransientError,), retry_backoff=False, max_retries=3)
+def flaky_job(failures, label):
+    """Fails its first `failures` runs, then records label"""
+    calls.append(label)
+    if len(calls) <= failures:
+        raise TransientError(label)
+    return label
+
+
+@pytest.fixture(autouse=True)
+def reset_calls(app):
+    calls.clear()
+    assert isinstance(jobs.store, MemoryIdempotencyStore)
+
+
+@pytest.fixture
+def retrying(monkeypatch):
+    # Propagating eager errors would surface the first Retry instead of running the retries
+    monkeypatch.setitem(jobs.celery.conf, 'task_eager_propagates', False)
+
+
+def test_production_never_runs_jobs_inline():
+    assert ProductionConfig.JOBS_ALWAYS_EAGER is False
+    assert TestingConfig.JOBS_ALWAYS_EAGER is True
+    assert DevelopmentConfig.JOBS_ALWAYS_EAGER is (not DevelopmentConfig.CELERY_BROKER_URL)
+
+
+def test_job_queue_refuses_to_start_without_a_broker():
+    app = Flask(__name__)
+    app.config.update(CELERY_BROKER_URL=None, JOBS_ALWAYS_EAGER=False)
+
+    with pytest.raises(RuntimeError, match='CELERY_BROKER_URL'):
+        JobQueue(app)
+
+
+def test_failed_job_is_retried_until_it_succeeds(app, retrying):
+    result = jobs.enqueue(flaky_job, 2, 'receipt', idempotency_key='receipt:1')
+
+    assert result.successful() and result.result == 'receipt'
+    assert calls == ['receipt'] * 3
+
+    # The retries kept the key, and its success now blocks repeats
+    assert jobs.enqueue(flaky_job, 0, 'repeat', idempotency_key='receipt:1').result is None
+    assert calls == ['receipt'] * 3
+
+
+def test_job_with_a_used_idempotency_key_runs_once(app):
+    jobs.enqueue(flaky_job, 0, 'first', idempotency_key='order-confirmation:1')
+    jobs.enqueue(flaky_job, 0, 'second', idempotency_key='order-confirmation:1')
+    jobs.enqueue(flaky_job, 0, 'other', idempotency_key='order-confirmation:2')
+
+    assert calls == ['first', 'other']
+
+
+def test_job_that_gives_up_frees_its_idempotency_key(app, retrying):
+    result = jobs.enqueue(flaky_job, 10, 'attempt', idempotency_key='gateway-order:1')
+
+    assert isinstance(result.result, TransientError)
+    assert calls == ['attempt'] * 4
+
+    calls.clear()
+    assert jobs.enqueue(flaky_job, 0, 'again', idempotency_key='gateway-order:1').get() == 'again'
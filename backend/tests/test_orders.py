@@ -0,0 +1,95 @@
+from decimal import Decimal
+import pytest
+from app.models.order import Order, OrderItem
+from app.models.payment import Payment
+from app.models.product import Category, Product
+from app.models.user import User
+
+
+@pytest.fixture
+def product(db):
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name='Ring', sku='RING-1', price=Decimal('500.00'), category_id=category.id)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def _place_orders(db, user, product, count):
+    """count orders, each with a one-piece and a two-piece line"""
+    for _ in range(count):
+        order = Order(
+            user_id=user.id, payment_method='COD', shipping_address_id=user.addresses.first().id,
+            subtotal=Decimal('1500.00'), total_amount=Decimal('1500.00')
+        )
+        db.session.add(order)
+        db.session.flush()
+        for quantity in (1, 2):
+            db.session.add(OrderItem(
+                order_id=order.id, product_id=product.id, product_name=product.name, quantity=quantity,
+                unit_price=Decimal('500.00'), total_price=Decimal('500.00') * quantity
+            ))
+    db.session.commit()
+
+
+def _history(client, headers, count_queries, query=''):
+    with count_queries() as statements:
+        response = client.get(f'/api/orders/{query}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['orders'], len(statements)
+
+
+@pytest.mark.parametrize('query', ['', '?include=none', '?cursor='])
+def test_order_history_query_count_does_not_grow_with_orders(db, client, customer, product, auth_headers,
+                                                              count_queries, query):
+    headers = auth_headers(customer)
+    _place_orders(db, customer, product, 1)
+    _, one_order = _history(client, headers, count_queries, query)
+
+    _place_orders(db, customer, product, 5)
+    orders, six_orders = _history(client, headers, count_queries, query)
+
+    assert len(orders) == 6
+    assert six_orders == one_order
+    assert all(order['total_items'] == 3 for order in orders)
+    if 'include=none' in query:
+        assert 'items' not in orders[0]
+    else:
+        assert [item['quantity'] for item in orders[0]['items']] == [1, 2]
+
+
+def test_order_detail_is_one_statement(db, client, customer, product, auth_headers, count_queries):
+    headers = auth_headers(customer)
+    _place_orders(db, customer, product, 1)
+    order = Order.query.one()
+    db.session.add(Payment(
+        user_id=customer.id, order_id=order.id, amount=order.total_amount, payment_method='COD'
+    ))
+    db.session.commit()
+    url = f'/api/orders/{order.id}'
+    # The first request also loads the signed-in customer
+    assert client.get(url, headers=headers).status_code == 200
+
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+
+    assert len(statements) == 1
+    detail = response.get_json()['order']
+    assert detail['total_items'] == 3
+    assert [item['quantity'] for item in detail['items']] == [1, 2]
+    assert detail['shipping_address']['city'] == 'Bengaluru'
+    assert 'billing_address' not in detail
+    assert [payment['payment_method'] for payment in detail['payments']] == ['COD']
+
+
+def test_order_detail_is_only_served_to_its_owner(db, client, customer, product, auth_headers):
+    _place_orders(db, customer, product, 1)
+    other = User(email='second@example.com', password='a-long-password', first_name='Ravi', last_name='Iyer')
+    db.session.add(other)
+    db.session.commit()
+    url = f'/api/orders/{Order.query.one().id}'
+
+    assert client.get(url, headers=auth_headers(other)).status_code == 404
+    assert client.get('/api/orders/not-a-uuid', headers=auth_headers(customer)).status_code == 400
@@ -0,0 +1,53 @@
+from decimal import Decimal
+import pytest
+from app.models.product import Category, Product
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+@pytest.fixture
+def products(db):
+    """Seven products whose sort_order values tie in pairs"""
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    for i in range(7):
+        db.session.add(Product(
+            name=f'Ring {i}', sku=f'RING-{i}', price=Decimal('999.00'),
+            category_id=category.id, sort_order=i // 2
+        ))
+    db.session.commit()
+    return Product.query.all()
+
+
+def _walk(client, **params):
+    seen, cursor = [], ''
+    while cursor is not None:
+        body = client.get('/api/products/', query_string={**params, 'cursor': cursor, 'per_page': 2}).get_json()
+        seen.extend(product['id'] for product in body['products'])
+        cursor = body['pagination']['next_cursor']
+    return seen
+
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_cursor_pages_visit_every_product_once(client, products, direction):
+    ids = _walk(client, sort_by='sort_order', sort_order=direction)
+
+    sort_orders = {str(product.id): product.sort_order for product in products}
+    assert sorted(ids) == sorted(sort_orders)
+    assert len(ids) == len(set(ids))
+    orders = [sort_orders[product_id] for product_id in ids]
+    assert orders == sorted(orders, reverse=(direction == 'desc'))
+
+
+def test_keyset_sort_key_must_be_not_null(products):
+    with pytest.raises(TypeError):
+        keyset_paginate(Product.query, Product, 'compare_at_price', 2)
+
+
+def test_cursor_round_trips_typed_values(products):
+    product = products[0]
+    values = [product.created_at, product.price, product.id]
+
+    assert decode_cursor(encode_cursor(values)) == values
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
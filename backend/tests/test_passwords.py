@@ -0,0 +1,59 @@
+import threading
+import pytest
+from app import passwords
+from app.utils.passwords import PasswordHasher, PasswordHasherBusy
+
+
+def _login(client, password='a-long-password'):
+    return client.post('/api/auth/login', json={'email': 'buyer@example.com', 'password': password})
+
+
+def test_full_hashing_queue_answers_503_with_retry_after(client, customer, monkeypatch):
+    monkeypatch.setattr(passwords, 'workers', 1)
+    monkeypatch.setattr(passwords, 'retry_after', 3)
+    # Every slot is taken by logins already in flight
+    monkeypatch.setattr(passwords, '_slots', threading.BoundedSemaphore(1))
+    passwords._slots.acquire()
+
+    response = _login(client)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+
+
+def test_login_rehashes_a_password_made_at_an_old_cost(db, client, customer, monkeypatch):
+    assert customer.password_hash.startswith('$2b$04$')
+    monkeypatch.setattr(passwords, 'rounds', 5)
+
+    assert _login(client).status_code == 200
+
+    db.session.expire_all()
+    assert customer.password_hash.startswith('$2b$05$')
+    assert _login(client).status_code == 200
+    assert _login(client, 'wrong-password').status_code == 401
+
+
+def test_pool_hashes_in_worker_processes(app):
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_SIZE=0)
+    hasher = PasswordHasher(app)
+    try:
+        password_hash = hasher.hash('a-long-password')
+        assert hasher.verify('a-long-password', password_hash)
+        assert not hasher.verify('wrong-password', password_hash)
+        assert hasher._executor._mp_context.get_start_method() != 'fork'
+    finally:
+        hasher.shutdown()
+        app.extensions['password_hasher'] = passwords
+
+
+def test_busy_is_raised_without_queueing(app):
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_SIZE=0)
+    hasher = PasswordHasher(app)
+    try:
+        hasher._slots.acquire()
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('a-long-password')
+        assert hasher._executor is None
+    finally:
+        hasher.shutdown()
+        app.extensions['password_hasher'] = passwords
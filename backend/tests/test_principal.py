@@ -0,0 +1,88 @@
+import time
+from sqlalchemy import update
+from app.models.user import User
+from app.utils.principal import Principal, PrincipalCache, load_principal, principals
+
+
+class SharedGenerations:
+    """One set of generation counters seen by every cache, as Redis is by every worker"""
+
+    def __init__(self):
+        self.counters = {}
+
+    def get(self, user_id):
+        return self.counters.get(user_id, 0)
+
+    def bump(self, user_id):
+        self.counters[user_id] = self.get(user_id) + 1
+
+
+def _principal_in_new_request(app, user_id):
+    # A fresh app context gives the request its own g and session
+    with app.app_context(), app.test_request_context():
+        return load_principal(user_id)
+
+
+def test_principal_is_memoised_per_request(app, customer, count_queries):
+    app.config['PRINCIPAL_CACHE_TTL'] = 0
+    user_id = str(customer.id)
+    with app.test_request_context():
+        with count_queries() as first:
+            load_principal(user_id)
+        with count_queries() as second:
+            principal = load_principal(user_id)
+
+    assert len(first) == 1
+    assert second == []
+    assert principal == Principal(user_id, 'user', True, False)
+
+
+def test_process_cache_serves_later_requests_until_the_ttl(app, customer, count_queries):
+    _principal_in_new_request(app, customer.id)
+    with count_queries() as statements:
+        _principal_in_new_request(app, customer.id)
+    assert statements == []
+
+    ttl = app.config['PRINCIPAL_CACHE_TTL']
+    assert principals.get(str(customer.id), now=time.monotonic() + ttl + 1) is None
+    with count_queries() as statements:
+        _principal_in_new_request(app, customer.id)
+    assert len(statements) == 1
+
+
+def test_committed_role_change_evicts_the_principal(app, db, customer):
+    assert _principal_in_new_request(app, customer.id).role == 'user'
+
+    customer.role = 'admin'
+    db.session.commit()
+
+    assert principals.get(str(customer.id)) is None
+    assert _principal_in_new_request(app, customer.id).is_admin()
+
+
+def test_rolled_back_change_leaves_no_pending_eviction(app, db, customer):
+    customer.role = 'admin'
+    db.session.flush()
+    db.session.rollback()
+    assert 'principal_invalidations' not in db.session.info
+
+    assert _principal_in_new_request(app, customer.id).role == 'user'
+    customer.first_name = 'Asha K'
+    db.session.commit()
+
+    assert principals.get(str(customer.id)).role == 'user'
+
+
+def test_invalidation_in_another_worker_evicts_the_principal(app, db, customer, monkeypatch):
+    shared = SharedGenerations()
+    monkeypatch.setattr(principals, 'generations', shared)
+    other_worker = PrincipalCache()
+    other_worker.generations = shared
+    assert _principal_in_new_request(app, customer.id).role == 'user'
+
+    # The other worker changes the role and invalidates through the shared counters
+    db.session.execute(update(User).where(User.id == customer.id).values(role='admin'))
+    db.session.commit()
+    other_worker.invalidate(str(customer.id))
+
+    assert _principal_in_new_request(app, customer.id).is_admin()
@@ -0,0 +1,81 @@
+from decimal import Decimal
+import pytest
+from app.models.product import Category, Product, ProductImage, ProductVariant, product_serializer
+from app.utils.loaders import load_product_listing
+
+
+@pytest.fixture
+def catalog(db):
+    """Ten products, each with two images and two variants"""
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    for i in range(10):
+        product = Product(name=f'Ring {i}', sku=f'RING-{i}', price=Decimal('999.00'), category_id=category.id)
+        db.session.add(product)
+        db.session.flush()
+        for j in range(2):
+            db.session.add(ProductImage(
+                product_id=product.id, image_url=f'https://images.example.com/{i}/{j}.jpg',
+                is_primary=(j == 0), sort_order=j
+            ))
+            db.session.add(ProductVariant(product_id=product.id, name='Size', value=str(j + 6)))
+    db.session.commit()
+
+
+def _products(limit):
+    return Product.query.order_by(Product.sku).limit(limit).all()
+
+
+def test_listing_query_count_does_not_grow_with_products(catalog, count_queries):
+    one = _products(1)
+    with count_queries() as one_queries:
+        load_product_listing(one)
+
+    many = _products(10)
+    with count_queries() as many_queries:
+        listing = load_product_listing(many)
+
+    assert len(many_queries) == len(one_queries)
+    assert len(listing) == 10
+    assert all(len(product['images']) == 2 and len(product['variants']) == 2 for product in listing)
+    assert listing[0]['main_image'] == 'https://images.example.com/0/0.jpg'
+
+
+def test_listing_skips_unselected_relations(catalog, count_queries):
+    products = _products(10)
+    with count_queries() as queries:
+        listing = load_product_listing(products, fields=frozenset({'id', 'name'}))
+
+    assert queries == []
+    assert set(listing[0]) == {'id', 'name'}
+
+
+def test_listing_endpoint_query_count_does_not_grow_with_page_size(client, catalog, count_queries):
+    # Different page sizes have different cache keys, so both requests reach the view
+    with count_queries() as one_queries:
+        assert client.get('/api/products/?per_page=1&cursor=').status_code == 200
+
+    with count_queries() as many_queries:
+        response = client.get('/api/products/?per_page=10&cursor=')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['products']) == 10
+    assert len(many_queries) == len(one_queries)
+
+
+def test_listings_default_to_the_card_view(client, catalog):
+    card = {'id'} | product_serializer.projection('card')
+    listing = client.get('/api/products/').get_json()['products']
+    featured = client.get('/api/products/featured').get_json()['featured_products']
+
+    assert set(listing[0]) == card
+    assert all(set(product) <= card for product in featured)
+
+
+def test_detail_view_stays_available(client, catalog):
+    listing = client.get('/api/products/?view=detail').get_json()['products']
+    product = client.get(f"/api/products/{listing[0]['id']}").get_json()['product']
+
+    assert {'description', 'images', 'variants'} <= set(listing[0])
+    assert {'description', 'images', 'variants', 'reviews'} <= set(product)
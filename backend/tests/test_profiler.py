@@ -0,0 +1,59 @@
+import logging
+from decimal import Decimal
+import pytest
+from flask import jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.models.order import Order
+from app.utils.profiler import QueryProfiler, normalize_sql
+
+
+@pytest.fixture
+def profiler(app):
+    app.config.update(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_REPEAT_THRESHOLD=3)
+    profiler = QueryProfiler(app)
+
+    @app.route('/_orders')
+    def list_orders():
+        # Each to_dict() without total_items counts that order's items separately
+        return jsonify([order.to_dict() for order in Order.query.all()])
+
+    yield profiler
+    event.remove(Engine, 'before_cursor_execute', profiler._before_cursor_execute)
+    event.remove(Engine, 'after_cursor_execute', profiler._after_cursor_execute)
+
+
+def _place_orders(db, user, count):
+    for _ in range(count):
+        db.session.add(Order(user_id=user.id, subtotal=Decimal('500.00'), total_amount=Decimal('500.00')))
+    db.session.commit()
+
+
+def test_normalize_sql_folds_parameters_and_in_lists():
+    assert normalize_sql("SELECT *\n  FROM t WHERE a = ? AND b IN (?, ?, ?) AND c = 'x' LIMIT 10") == \
+        'SELECT * FROM t WHERE a = ? AND b IN (?, ...) AND c = ? LIMIT ?'
+    assert normalize_sql('SELECT * FROM t WHERE id = %(id_1)s') == normalize_sql('SELECT * FROM t WHERE id = :id')
+
+
+def test_repeated_statement_is_flagged_with_its_origin(db, client, customer, profiler, caplog):
+    _place_orders(db, customer, 4)
+
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/_orders')
+
+    assert response.headers['X-Query-Count'] == '5'
+    assert response.headers['X-Query-Time'].endswith('ms')
+    warnings = [record.getMessage() for record in caplog.records if 'Possible N+1' in record.getMessage()]
+    assert len(warnings) == 1
+    assert 'GET /_orders (list_orders): 4 x SELECT order_items.id' in warnings[0]
+    assert 'app/models/order.py' in warnings[0] and 'in get_total_items' in warnings[0]
+
+
+def test_statements_below_the_threshold_are_not_flagged(db, client, customer, profiler, caplog):
+    _place_orders(db, customer, 2)
+
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/_orders')
+
+    assert response.headers['X-Query-Count'] == '3'
+    assert not [record for record in caplog.records if 'Possible N+1' in record.getMessage()]
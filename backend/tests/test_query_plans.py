@@ -0,0 +1,37 @@
+from sqlalchemy import select
+from app.models.product import Product
+from app.utils import query_plans
+from app.utils.query_plans import HOT_QUERIES, explain_hot_queries
+
+
+def _explain(app, *args):
+    return app.test_cli_runner().invoke(args=['explain-hot-queries', *args])
+
+
+def test_every_hot_query_is_served_by_an_index(app, db):
+    result = _explain(app)
+
+    assert result.exit_code == 0
+    assert result.output.count('ok        ') == len(HOT_QUERIES)
+    assert result.output.endswith(f'0 of {len(HOT_QUERIES)} hot queries scan a table in full.\n')
+
+
+def test_unindexed_query_is_flagged(app, db, monkeypatch):
+    monkeypatch.setitem(query_plans.HOT_QUERIES, 'products_by_material',
+                        lambda: select(Product).where(Product.material == 'Gold'))
+
+    assert explain_hot_queries(['products_by_material']) == {'products_by_material': ['products']}
+    result = _explain(app, 'products_by_material', 'order_items')
+    assert result.exit_code == 1
+    assert result.output.splitlines() == [
+        'ok        order_items',
+        'SEQ SCAN  products_by_material: products',
+        '1 of 2 hot queries scan a table in full.',
+    ]
+
+
+def test_unknown_query_names_are_rejected(app, db):
+    result = _explain(app, 'products_by_colour')
+
+    assert result.exit_code == 2
+    assert result.output.startswith('Unknown queries: products_by_colour\n')
@@ -0,0 +1,70 @@
+from decimal import Decimal
+import pytest
+from app.models.product import Category, Product
+from app.models.user import User
+
+
+@pytest.fixture
+def product(db):
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name='Ring', sku='RING-1', price=Decimal('999.00'), category_id=category.id)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+@pytest.fixture
+def reviewers(db, customer):
+    other = User(email='second@example.com', password='a-long-password', first_name='Ravi', last_name='Iyer')
+    db.session.add(other)
+    db.session.commit()
+    return customer, other
+
+
+def _rating_stats(client, product):
+    # The product page is cached, so this also checks that review writes evict it
+    return client.get(f'/api/products/{product.id}').get_json()['product']['rating_stats']
+
+
+def _listed_rating(client):
+    listed = client.get('/api/products/').get_json()['products'][0]
+    return listed['average_rating'], listed['review_count']
+
+
+def _aggregates(db, product):
+    db.session.expire_all()
+    return (product.rating_count, product.rating_sum,
+            [getattr(product, f'rating_{rating}_count') for rating in range(1, 6)])
+
+
+def test_rating_aggregates_follow_review_writes(db, client, product, reviewers, auth_headers):
+    first, second = (auth_headers(user) for user in reviewers)
+    assert _rating_stats(client, product)['total_reviews'] == 0
+    assert _listed_rating(client) == (0, 0)
+
+    response = client.post('/api/reviews/add', json={'product_id': str(product.id), 'rating': 5}, headers=first)
+    assert response.status_code == 201
+    first_review = response.get_json()['review']['id']
+    response = client.post('/api/reviews/add', json={'product_id': str(product.id), 'rating': 3}, headers=second)
+    second_review = response.get_json()['review']['id']
+
+    assert _aggregates(db, product) == (2, 8, [0, 0, 1, 0, 1])
+    stats = _rating_stats(client, product)
+    assert stats['average_rating'] == 4.0
+    assert stats['rating_distribution'] == {'5': 1, '4': 0, '3': 1, '2': 0, '1': 0}
+    assert _listed_rating(client) == (4.0, 2)
+
+    assert client.put(f'/api/reviews/{first_review}', json={'rating': 2}, headers=first).status_code == 200
+    assert _aggregates(db, product) == (2, 5, [0, 1, 1, 0, 0])
+    assert _rating_stats(client, product)['average_rating'] == 2.5
+
+    assert client.delete(f'/api/reviews/{second_review}', headers=second).status_code == 200
+    assert _aggregates(db, product) == (1, 2, [0, 1, 0, 0, 0])
+    assert _rating_stats(client, product)['average_rating'] == 2.0
+
+    # The incremental aggregates match a full recount
+    Product.refresh_rating_stats([product.id])
+    db.session.commit()
+    assert _aggregates(db, product) == (1, 2, [0, 1, 0, 0, 0])
@@ -0,0 +1,43 @@
+from decimal import Decimal
+from app.models.analytics import ProductSalesRollup
+from app.models.order import Order, OrderItem
+from app.models.product import Category, Product
+from app.models.user import User
+from app.utils.rollups import rebuild_rollups, record_order_placed
+
+
+def _product_rollups():
+    return sorted(
+        (row.product_id, row.order_count, row.units, row.revenue)
+        for row in ProductSalesRollup.query.all()
+    )
+
+
+def test_incremental_product_rollups_match_backfill(db):
+    category = Category(name='Rings', slug='rings')
+    user = User(email='buyer@example.com', password='a-long-password', first_name='A', last_name='B')
+    db.session.add_all([category, user])
+    db.session.flush()
+    product = Product(name='Ring', sku='RING-1', price=Decimal('500.00'), category_id=category.id)
+    db.session.add(product)
+    db.session.flush()
+
+    order = Order(user_id=user.id, payment_method='COD', subtotal=Decimal('1500.00'), total_amount=Decimal('1500.00'))
+    db.session.add(order)
+    db.session.flush()
+    # Two sizes of the same ring on one order
+    for quantity in (1, 2):
+        db.session.add(OrderItem(
+            order_id=order.id, product_id=product.id, product_name=product.name,
+            quantity=quantity, unit_price=Decimal('500.00'), total_price=Decimal('500.00') * quantity
+        ))
+    db.session.flush()
+    record_order_placed(order)
+    db.session.commit()
+
+    incremental = _product_rollups()
+    rebuild_rollups()
+    db.session.commit()
+
+    assert incremental == [(product.id, 1, 3, Decimal('1500.00'))]
+    assert _product_rollups() == incremental
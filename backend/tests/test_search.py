@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.models.product import Category, Product
+from app.utils import search
+from app.utils.search import apply_product_search, tokenize
+
+
+@pytest.fixture
+def catalog(db):
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    now = datetime.utcnow()
+    for days_old, name, description, featured, active in (
+        (3, 'Gold Ring', None, True, True),
+        (1, 'Plain Band', 'A gold ring for every day', False, True),
+        (2, 'Gold Ring Deluxe', None, False, True),
+        (0, 'Silver Ring', None, False, True),
+        (0, 'Gold Chain', None, True, True),
+        (0, 'Gold Ring Retired', None, True, False),
+    ):
+        db.session.add(Product(
+            name=name, sku=name.upper().replace(' ', '-'), description=description,
+            price=Decimal('999.00'), category_id=category.id,
+            is_featured=featured, is_active=active, created_at=now - timedelta(days=days_old)
+        ))
+    db.session.commit()
+
+
+def test_tokenize_keeps_only_word_characters():
+    assert tokenize("Gold  ring's & <b>22k</b>") == ['gold', 'ring', 's', 'b', '22k', 'b']
+    assert tokenize(None) == []
+
+
+def test_fallback_search_matches_every_term_and_ranks_featured_then_newest(client, catalog):
+    body = client.get('/api/products/search?q=gold+ring').get_json()
+
+    assert [product['name'] for product in body['products']] == ['Gold Ring', 'Plain Band', 'Gold Ring Deluxe']
+    assert body['pagination']['total'] == 3
+
+
+def test_listing_search_uses_relevance_unless_a_sort_is_given(client, catalog):
+    ranked = client.get('/api/products/?search=gold+ring').get_json()['products']
+    by_name = client.get('/api/products/?search=gold+ring&sort_by=name&sort_order=asc').get_json()['products']
+    suggestions = client.get('/api/products/search/suggestions?q=GOLD').get_json()['suggestions']
+
+    assert [product['name'] for product in ranked] == ['Gold Ring', 'Plain Band', 'Gold Ring Deluxe']
+    assert [product['name'] for product in by_name] == ['Gold Ring', 'Gold Ring Deluxe', 'Plain Band']
+    assert [product['name'] for product in suggestions] == ['Gold Chain', 'Gold Ring', 'Plain Band', 'Gold Ring Deluxe']
+
+
+def test_postgres_search_uses_the_indexed_vector_and_ts_rank(db, monkeypatch):
+    monkeypatch.setattr(search, 'supports_full_text', lambda: True)
+
+    query = apply_product_search(Product.query, 'gold ri', rank=True)
+    sql = ' '.join(str(query.statement.compile(dialect=postgresql.dialect())).split())
+
+    assert 'products.search_vector @@ to_tsquery(%(to_tsquery_1)s, %(to_tsquery_2)s)' in sql
+    assert 'ORDER BY ts_rank(products.search_vector, to_tsquery(' in sql
+    assert query.statement.compile(dialect=postgresql.dialect()).params['to_tsquery_2'] == 'gold:* & ri:*'
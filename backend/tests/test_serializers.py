@@ -0,0 +1,53 @@
+from decimal import Decimal
+import pytest
+from app.models.product import Category, Product, product_serializer
+from app.utils.serializers import Attr, Id, Serializer
+
+
+@pytest.fixture
+def product(db):
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(
+        name='Ring', sku='RING-1', price=Decimal('999.00'), cost_price=Decimal('400.00'),
+        description='Hand finished', category_id=category.id
+    )
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def test_parse_fields_always_keeps_id_and_rejects_unknown_names():
+    assert product_serializer.parse_fields('') is None
+    assert product_serializer.parse_fields(' name, price ,') == {'id', 'name', 'price'}
+    with pytest.raises(ValueError, match='Unknown fields: colour, shape'):
+        product_serializer.parse_fields('name,shape,colour')
+    with pytest.raises(ValueError, match='Unknown fields: cost_price'):
+        product_serializer.parse_fields('name,cost_price', allowed=product_serializer.projection('detail'))
+
+
+def test_projections_must_name_declared_fields():
+    with pytest.raises(ValueError, match='Projection card has unknown fields: title'):
+        Serializer(Id('id'), Attr('name'), projections={'card': ('title',)})
+
+
+def test_fields_parameter_selects_and_fetches_only_those_columns(client, product, count_queries):
+    with count_queries() as statements:
+        response = client.get('/api/products/?fields=name,price')
+
+    assert response.status_code == 200
+    assert set(response.get_json()['products'][0]) == {'id', 'name', 'price'}
+    listing_sql = next(statement for statement in statements if 'FROM products' in statement)
+    assert 'products.price' in listing_sql
+    assert 'products.description' not in listing_sql
+
+
+@pytest.mark.parametrize('query', ['fields=name,shape', 'fields=cost_price', 'view=admin'])
+def test_fields_outside_the_public_views_are_rejected(client, product, query):
+    listing = client.get(f'/api/products/?{query}')
+    detail = client.get(f'/api/products/{product.id}?{query}')
+
+    assert listing.status_code == 400
+    assert detail.status_code == 400
+    assert 'Unknown' in listing.get_json()['error']
@@ -0,0 +1,238 @@
+import hashlib
+import hmac
+import json
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy.dialects import postgresql
+from app import tasks
+from app.api import orders
+from app.models.analytics import PaymentRollup
+from app.models.inventory import StockReservation
+from app.models.order import Order, OrderStatus
+from app.models.payment import Payment
+from app.models.product import Category, Product
+from app.tasks import release_expired_holds
+from app.utils import stock
+from app.utils.stock import StockLine
+
+WEBHOOK_SECRET = 'webhook-secret'
+
+
+class FakeRazorpayClient:
+    """Answers create_gateway_order the way Razorpay's orders API does"""
+
+    def __init__(self, auth):
+        self.order = self
+
+    def create(self, data):
+        return {'id': f"order_{data['receipt']}", 'amount': data['amount'], 'currency': data['currency']}
+
+
+@pytest.fixture
+def ring(db):
+    """A tracked product with five in stock"""
+    category = Category(name='Rings', slug='rings')
+    db.session.add(category)
+    db.session.flush()
+    product = Product(name='Ring', sku='RING-1', price=Decimal('500.00'), category_id=category.id, stock_quantity=5)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+class Shopper:
+    """Drives the cart and order APIs as one customer"""
+
+    def __init__(self, client, customer, headers):
+        self.client = client
+        self.customer = customer
+        self.headers = headers
+
+    def add(self, product, quantity):
+        response = self.client.post('/api/cart/add', json={
+            'product_id': str(product.id), 'quantity': quantity
+        }, headers=self.headers)
+        assert response.status_code == 200, response.get_json()
+
+    def order(self, payment_method='RAZORPAY'):
+        return self.client.post('/api/orders/create', json={
+            'shipping_address_id': str(self.customer.addresses.first().id), 'payment_method': payment_method
+        }, headers=self.headers)
+
+    def cancel(self, order_id):
+        return self.client.post(f'/api/orders/{order_id}/cancel', headers=self.headers)
+
+
+@pytest.fixture
+def shopper(app, client, customer, auth_headers, monkeypatch):
+    app.config['RAZORPAY_WEBHOOK_SECRET'] = WEBHOOK_SECRET
+    monkeypatch.setattr(tasks.razorpay, 'Client', FakeRazorpayClient)
+    return Shopper(client, customer, auth_headers(customer))
+
+
+def _checkout(shopper, product, quantity, payment_method='RAZORPAY'):
+    shopper.add(product, quantity)
+    response = shopper.order(payment_method)
+    assert response.status_code == 201, response.get_json()
+    order_id = uuid.UUID(response.get_json()['order_id'])
+    return Order.query.get(order_id), Payment.query.filter_by(order_id=order_id).one()
+
+
+def _send_webhook(client, event, payment, amount=None):
+    body = json.dumps({
+        'event': event,
+        'payload': {'payment': {'entity': {
+            'id': f'pay_{payment.id.hex[:14]}',
+            'order_id': payment.gateway_transaction_id,
+            'amount': int(payment.amount * 100) if amount is None else amount,
+        }}}
+    }).encode('utf-8')
+    signature = hmac.new(WEBHOOK_SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return client.post('/api/payments/webhook', data=body, content_type='application/json',
+                       headers={'X-Razorpay-Signature': signature})
+
+
+def _reservations(order_id):
+    return [(row.status, row.quantity) for row in StockReservation.query.filter_by(order_id=order_id)]
+
+
+def test_postgres_batch_decrement_is_one_locked_update(db, monkeypatch):
+    lines = [
+        StockLine(uuid.uuid4(), None, 2, False),
+        StockLine(uuid.uuid4(), None, 1, True),
+    ]
+    statements = []
+    # Only the first row had enough stock
+    monkeypatch.setattr(db.session, 'scalars', lambda stmt: statements.append(stmt) or [lines[0].product_id])
+
+    assert stock._decrement_rows(Product.__table__, lines) == [lines[1]]
+    assert len(statements) == 1
+
+    sql = ' '.join(str(statements[0].compile(dialect=postgresql.dialect())).split())
+    assert sql.startswith('WITH locked AS (SELECT products.id AS id FROM products WHERE products.id IN')
+    assert 'ORDER BY products.id FOR UPDATE)' in sql
+    assert 'UPDATE products SET stock_quantity=(products.stock_quantity - lines.quantity)' in sql
+    assert 'FROM (VALUES (' in sql and ') AS lines (id, quantity, allow_backorder)' in sql
+    assert 'products.id = locked.id' in sql
+    assert '(lines.allow_backorder OR products.stock_quantity >= lines.quantity)' in sql
+    assert sql.endswith('RETURNING products.id')
+
+
+def test_online_checkout_holds_stock_until_the_webhook_commits_it(db, client, ring, shopper):
+    order, payment = _checkout(shopper, ring, 2)
+
+    db.session.expire_all()
+    assert ring.stock_quantity == 3
+    assert _reservations(order.id) == [(StockReservation.HELD, 2)]
+    assert payment.gateway_transaction_id == f'order_{order.order_number}'
+
+    # Razorpay redelivers events; the second delivery must change nothing
+    for _ in range(2):
+        assert _send_webhook(client, 'payment.captured', payment).status_code == 200
+
+    db.session.expire_all()
+    assert payment.payment_status == 'success'
+    assert order.payment_status == 'paid'
+    assert _reservations(order.id) == [(StockReservation.COMMITTED, 2)]
+    assert PaymentRollup.query.filter_by(payment_status='success').one().payment_count == 1
+    assert PaymentRollup.query.filter_by(payment_status='pending').one().payment_count == 0
+
+    # A paid order keeps its stock after the payment deadline
+    StockReservation.query.update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+    assert release_expired_holds() == 0
+    db.session.expire_all()
+    assert ring.stock_quantity == 3
+    assert order.status == OrderStatus.PLACED
+
+
+def test_webhook_with_a_short_amount_leaves_the_order_unpaid(db, client, ring, shopper):
+    order, payment = _checkout(shopper, ring, 1)
+
+    assert _send_webhook(client, 'payment.captured', payment, amount=100).status_code == 200
+
+    db.session.expire_all()
+    assert payment.payment_status == 'pending'
+    assert order.payment_status == 'pending'
+    assert _reservations(order.id) == [(StockReservation.HELD, 1)]
+
+
+def test_webhook_rejects_a_bad_signature(db, client, ring, shopper):
+    order, payment = _checkout(shopper, ring, 1)
+
+    response = client.post('/api/payments/webhook', json={
+        'event': 'payment.captured',
+        'payload': {'payment': {'entity': {'order_id': payment.gateway_transaction_id, 'amount': 50000}}}
+    }, headers={'X-Razorpay-Signature': 'forged'})
+
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert payment.payment_status == 'pending'
+
+
+def test_checkout_refuses_to_oversell(db, ring, shopper, monkeypatch):
+    shopper.add(ring, 2)
+    reserve = orders.reserve_order_stock
+
+    def reserve_after_another_checkout(order, lines, hold_minutes):
+        # Another checkout takes four rings between the availability check and the reservation
+        stock.decrement_stock([StockLine(ring.id, None, 4, False)])
+        reserve(order, lines, hold_minutes)
+
+    monkeypatch.setattr(orders, 'reserve_order_stock', reserve_after_another_checkout)
+
+    response = shopper.order()
+
+    assert response.status_code == 409
+    db.session.expire_all()
+    assert ring.stock_quantity == 5
+    assert Order.query.count() == 0
+    assert StockReservation.query.count() == 0
+
+
+def test_cancel_puts_stock_back_once(db, ring, shopper):
+    order, _ = _checkout(shopper, ring, 2, payment_method='COD')
+    db.session.expire_all()
+    assert ring.stock_quantity == 3
+    assert _reservations(order.id) == [(StockReservation.COMMITTED, 2)]
+
+    assert shopper.cancel(order.id).status_code == 200
+    assert shopper.cancel(order.id).status_code == 400
+    assert stock.release_order_stock(order) == 0
+    db.session.commit()
+
+    db.session.expire_all()
+    assert ring.stock_quantity == 5
+    assert order.status == OrderStatus.CANCELLED
+    assert _reservations(order.id) == [(StockReservation.RELEASED, 2)]
+
+
+def test_expired_hold_is_released_once_and_its_order_cancelled(db, ring, shopper):
+    order, _ = _checkout(shopper, ring, 2)
+    StockReservation.query.update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+
+    assert release_expired_holds() == 1
+    assert release_expired_holds() == 0
+
+    db.session.expire_all()
+    assert ring.stock_quantity == 5
+    assert order.status == OrderStatus.CANCELLED
+    assert _reservations(order.id) == [(StockReservation.RELEASED, 2)]
+
+
+def test_expired_holds_are_swept_without_a_webhook_secret(app, db, ring, shopper):
+    expired, _ = _checkout(shopper, ring, 2)
+    StockReservation.query.update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+    live, _ = _checkout(shopper, ring, 1)
+    db.session.commit()
+    app.config['RAZORPAY_WEBHOOK_SECRET'] = None
+
+    assert release_expired_holds() == 1
+
+    db.session.expire_all()
+    assert ring.stock_quantity == 4
+    assert expired.status == OrderStatus.CANCELLED
+    assert live.status == OrderStatus.PLACED